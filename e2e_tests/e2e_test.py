@@ -63,8 +63,8 @@ def test_e2e(capsys):
     # end-to-end test
     try:
         ################################################################################################################
-        print_section_header(f"1a. sampling (train)")
-        run_cli("python script_sampling.py --percent 50")
+        print_section_header(f"1a. sampling (train, nested percents)")
+        run_cli("python script_sampling.py --percent 10 20 50")
         print_section_finish()
 
         ################################################################################################################
@@ -75,6 +75,23 @@ def test_e2e(capsys):
         ################################################################################################################
         print_section_header(f"1c. sampling (disjunct)")
         run_cli("python e2e_tests/script_sampling_disjunct.py")
+        for _directory_path in e2e_dirs:
+            clear_directory(_directory_path)
+        print_section_finish()
+
+        ################################################################################################################
+        print_section_header(f"1d. sampling (train)")
+        run_cli("python script_sampling.py --percent 50")
+        print_section_finish()
+
+        ################################################################################################################
+        print_section_header(f"1e. sampling (eval)")
+        run_cli("python script_sampling.py --percent 20 --evaluation 1")
+        print_section_finish()
+
+        ################################################################################################################
+        print_section_header(f"1f. sampling (disjunct)")
+        run_cli("python e2e_tests/script_sampling_disjunct.py")
         print_section_finish()
 
         ################################################################################################################
@@ -2,49 +2,47 @@
 EXECUTION: python script_sampling_disjunct.py
 
 PURPOSE: the script
-     - reads the SAMPLING.json file in <data_train> & <data_eval>
+     - reads the SAMPLING.idx (or SAMPLING.json) file in <data_train> & <data_eval>
      - checks whether the indices for each combination <category> & <language> are disjunct
+       (after nested sampling of several percents, the training indices of the largest percent are used)
 """
 from src.env import Env
-from os.path import join, isfile
 from itertools import product
-from src.helpers import read_json
+from src.sample_indices import read_sample_indices, get_train_key
 
 
 def main():
     env = Env()
     categories, languages, _, _ = env.read_sampling_weights()
 
-    # read SAMPLING.json for data_train & data_eval
+    # read SAMPLING.idx (or SAMPLING.json) for data_train & data_eval
     path_sampling = {
-        "train": join(env.data_train, "SAMPLING.json"),
-        "eval": join(env.data_eval, "SAMPLING.json"),
+        "train": env.data_train,
+        "eval": env.data_eval,
     }
-    for key in path_sampling:
-        assert isfile(path_sampling[key]), f"ERROR! file = {path_sampling[key]} does not exist."
-
     sampling = {
-        key: read_json(path_sampling[key])
+        key: read_sample_indices(path_sampling[key])
         for key in path_sampling.keys()
     }
 
     # check that all keys are present
-    assert sampling["train"].keys() == sampling["eval"].keys(), \
-        f"ERROR! keys are not the same for train ({sampling['train'].keys()} and eval ({sampling['eval'].keys()}"
-
+    # (training keys are '<category>_<language>_<percent>p.jsonl' after nested sampling of several percents)
+    train_keys = {}
     for category, language in product(categories, languages):
         category_language = f"{category}_{language}.jsonl"
-        for key in sampling.keys():
-            assert category_language in sampling[key], f"ERROR! {category_language} not in sampling[{key}]."
+        assert category_language in sampling["eval"], f"ERROR! {category_language} not in sampling[eval]."
+        train_keys[category_language] = get_train_key(sampling["train"].keys(), category, language)
+        assert train_keys[category_language] is not None, f"ERROR! {category_language} not in sampling[train]."
+    assert set(sampling["eval"].keys()) == set(train_keys.keys()), \
+        f"ERROR! keys are not the same for train ({sampling['train'].keys()} and eval ({sampling['eval'].keys()}"
 
     # make sure that train & eval indices are disjunct for all categories & languages
-    for category, language in product(categories, languages):
-        category_language = f"{category}_{language}.jsonl"
-        indices_train = sampling["train"][category_language]
+    for category_language, train_key in train_keys.items():
+        indices_train = sampling["train"][train_key]
         indices_eval = sampling["eval"][category_language]
         indices_intersection = set(indices_train).intersection(indices_eval)
         assert len(indices_intersection) == 0, \
-            f"ERROR! train & eval indices are not disjunct for key = {category_language}: {indices_intersection}"
+            f"ERROR! train & eval indices are not disjunct for key = {train_key}: {indices_intersection}"
 
     print("> script_sampling_disjunct successful.")
 
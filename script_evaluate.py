@@ -25,6 +25,8 @@ from src.helpers import get_languages
 from src.analysis import _analyze_vocab, extract_vocab
 from src.evaluation.helpers import get_tokenizer, instantiate_nested_dict, write_json, get_vocab_size
 from src.evaluation.evaluate import evaluate
+from src.compression import is_jsonl
+from src.concatenation import is_manifest
 from src.evaluation.prune_vocab_size import prune_vocab_size
 
 env = Env()
@@ -37,7 +39,7 @@ def main(_tokenizer_name: str, _vocab_size: Optional[int] = None, _vocab_size_pr
 
     if _vocab_size is None:
         _vocab_size = get_vocab_size(_tokenizer)
-    _data_eval = [join(env.data_eval, elem) for elem in os.listdir(env.data_eval) if elem.endswith(".jsonl")]
+    _data_eval = [join(env.data_eval, elem) for elem in os.listdir(env.data_eval) if is_jsonl(elem) or is_manifest(elem)]
 
     # _vocab_sizes = _vocab_size_pruned + [_vocab_size]
     if _vocab_size_pruned is None:
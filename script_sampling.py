@@ -1,113 +1,776 @@
 """
 EXECUTION: python script_data_sampling.py
-           --percent <percent>  # e.g. 10
+           --percent <percent>  # e.g. 10, or several percents, e.g. 10 20 50 (nested samples, only if --evaluation 0)
            [--evaluation 0]     # 0 = <data_train>, 1 = <data_eval>
+           [--evaluation_percent 0]  # e.g. 1, sample <data_train> & disjunct <data_eval> in the same scan
+           [--single_pass 1]    # 1 = count & sample documents in one pass, 0 = count documents in a separate pass
+           [--sample_indices_format binary]  # binary = SAMPLING.idx, json = SAMPLING.json
+           [--line_index 1]     # 1 = use line index <data_original>/<category>_<language>.jsonl.lineidx if up to date
+           [--workers 1]        # nr. of processes that sample the combinations of <category> & <language> in parallel
+           [--seed None]        # e.g. 42, for reproducible sampling (independent of --workers)
+           [--shards 1]         # nr. of byte ranges per original file that are sampled in parallel (if --single_pass 1)
+           [--cache 1]          # 1 = skip unchanged combinations of <category> & <language> (only if --seed is given)
+           [--unit documents]   # documents = <percent>% of the documents, bytes = <percent>% of the bytes
+           [--budget None]      # e.g. 2G, with --unit bytes: <percent>% of <budget> instead of the original file size
+           [--compression none] # none = .jsonl, gz = .jsonl.gz, zst = .jsonl.zst (sampled data files)
+           [--dedup none]       # none, text = drop exact duplicates (md5 of the text), md5 = trust the md5 field if present
+           [--dedup_capacity 10000000]  # expected nr. of distinct sampled documents (size of the Bloom filter)
 
 PURPOSE: for each combination of <category> & <language> (as specified in SAMPLING_WEIGHTS.csv), the script
-         - reads the original data file at <data_original>/<category>_<language>.jsonl
-         - samples <percent>% of the data
-         - writes the sampled data file at <data_train>/<category>_<language>_<percent>p.jsonl
+         - reads the original data file at <data_original>/<category>_<language>.jsonl (or .jsonl.gz / .jsonl.zst)
+         - samples <percent>% of the data (keeping only the line numbers & byte offsets of the sampled documents in memory)
+         - writes the sampled data file at <data_train>/<category>_<language>.jsonl
+           (several percents: the nested sampled data files at <data_train>/<category>_<language>_<percent>p.jsonl)
+         - writes the indices of the sampled documents to <data_train>/SAMPLING.idx (or SAMPLING.json)
+         - writes the fingerprints of the sampled files to <data_train>/SAMPLING_CACHE.json
+         - writes throughput metrics (bytes read, MB/s, docs/s, peak memory, ETA) for each combination
+           to <data_train>/SAMPLING_METRICS.ndjson
+
+         if --evaluation_percent > 0, the training data (<percent>%) and the disjunct evaluation data
+         (<evaluation_percent>%) are sampled in the same scan, the latter is written to <data_eval> (incl. SAMPLING.idx)
+         and concatenated by language (<data_eval>/all_<language>.jsonl)
+
+         with --unit bytes --budget <budget>, the weights refer to an absolute number of bytes per combination
+         instead of the size of its original file, e.g. --percent 100 --budget 2G samples 2 GB of each combination
+         with weight 1 in SAMPLING_WEIGHTS.csv (1 GB for weight 0.5), or the whole original file if it is smaller.
+
+         the nr. of documents of the original files is taken from <data_original>/CATALOG.json if it is up to date.
+         the catalog (and the line indices) can be created with scripts/data_processing/script_catalog.py
+
+         if --dedup is used, sampled documents whose text was already written (in any combination of <category> & <language>)
+         are dropped. the texts are tracked with a Bloom filter that is shared by all worker processes.
+         with --workers 1, the first occurrence (in the order of SAMPLING_WEIGHTS.csv & the original files) is kept.
 """
 import argparse
 import os
-import json
-from itertools import product
-from os.path import isfile, dirname, getsize, join
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from bisect import bisect_left
+from itertools import accumulate, product
+from os.path import basename, isfile, dirname, getsize
+import random
 import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from src.env import Env
-from src.sampling import reservoir_sampling
-from src.logger import Logger
+from src.sampling import reservoir_sampling_skip, single_pass_sampling, index_sampling, byte_ranges, copy_byte_ranges
+from src.sampling import get_cell_seed, sharded_sampling, nested_ranks, copy_ranked_byte_ranges
+from src.sampling import budget_candidates, budget_threshold, select_budget
+from src.line_index import get_line_index, LineIndex
+from src.catalog import Catalog
+from src.compression import open_jsonl, get_jsonl_suffix, is_compressed, strip_jsonl_suffix, COMPRESSIONS, JSONL_SUFFIXES
+from src.logger import Logger, CellLogger, get_peak_rss
 from scripts.data_processing.script_concatenate_data_by_language import concatenate_data_by_language
-from src.helpers import read_json
+from src.sample_indices import read_sample_indices, write_sample_indices, get_train_key
+from src.sampling_cache import SamplingCache, get_cell_fingerprint
+from src.deduplication import Deduplicator, DEDUPLICATION_MODES
+
+_DEDUPLICATOR: Optional[Deduplicator] = None  # shared by all combinations of <category> & <language>
 
 
 def main(args):
+    # the training sample indices & the catalog may have changed since a previous call in the same process
+    _read_train_indices.cache_clear()
+    _read_catalog.cache_clear()
     env = Env()
     logger_folder = env.data_eval if args.evaluation else env.data_train
     logger = Logger(logger_folder)
 
-    file_path_sample_indices = join(logger_folder, "SAMPLING.json")
-    sample_indices = {}
+    # 1. read SAMPLING_WEIGHTS.csv (for each percent)
+    percents = sorted(set(args.percent))
+    assert len(percents) == 1 or not args.evaluation, \
+        f"ERROR! nested sampling of several percents ({percents}) is not supported for --evaluation 1"
+    assert not args.evaluation_percent or (len(percents) == 1 and not args.evaluation), \
+        f"ERROR! --evaluation_percent {args.evaluation_percent} requires a single percent and --evaluation 0"
+    assert args.budget is None or args.unit == "bytes", \
+        f"ERROR! --budget {args.budget} requires --unit bytes"
+    sampling_weights_sampling = {}
+    for percent in percents + ([args.evaluation_percent] if args.evaluation_percent else []):
+        categories, languages, sampling_weights, sampling_weights_sampling[percent] = \
+            env.read_sampling_weights(percent=percent, verbose=env.verbose)
+    logger.initialize(percent=", ".join(map(str, sampling_weights_sampling.keys())), sampling_weights=sampling_weights)
 
-    # 1. read SAMPLING_WEIGHTS.csv
-    categories, languages, sampling_weights, sampling_weights_sampling = env.read_sampling_weights(percent=args.percent,
-                                                                                                   verbose=env.verbose)
-    logger.initialize(percent=args.percent, sampling_weights=sampling_weights)
+    # 2. skip combinations of <category> & <language> that were sampled before with the same fingerprint
+    #    (only if the sampling is reproducible, i.e. args.seed is given)
+    seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2**32)
+    # with deduplication, the sampled data of a combination depends on the other combinations
+    use_cache = bool(args.cache) and args.seed is not None and args.dedup == "none"
+    deduplicator = Deduplicator(args.dedup_capacity, use_md5=args.dedup == "md5") if args.dedup != "none" else None
+    _set_deduplicator(deduplicator)
+    folders = _get_folders(env, args)
+    caches = {folder: SamplingCache(folder) for folder in folders}
+    previous_sample_indices = {
+        folder: _read_previous_sample_indices(folder) if use_cache else {} for folder in folders
+    }
+    results = {}
+    fingerprints = {}
+    cells = []
+    for category, language in product(categories, languages):
+        category_language = f"{category}_{language}.jsonl"
+        weights = [_sampling_weights[category][language] for _sampling_weights in sampling_weights_sampling.values()]
+        if use_cache and weights[0] > 0:
+            fingerprints[category_language] = _get_fingerprint(env, args, category, language, weights, seed)
+            outputs = _get_outputs(env, args, category, language)
+            if all(caches[folder].is_valid(key, fingerprints[category_language], file_path_sampled)
+                   and key in previous_sample_indices[folder]
+                   for folder, key, file_path_sampled in outputs):
+                results[category_language] = (
+                    category_language,
+                    {folder: {key: previous_sample_indices[folder][key]} for folder, key, _ in outputs},
+                    [(f"> category = {category}, language = {language}, weight = {weights[-1]} .. unchanged (cache)",
+                      None),
+                     (None, None)],
+                    None,
+                )
+        if category_language not in results:
+            results[category_language] = None
+            cells.append((env, args, category, language, weights, get_cell_seed(seed, category, language)))
 
-    # 2. if evaluation, read SAMPLING.json from training for disjunct sampling
-    if args.evaluation:
-        train_sampling_path = join(env.data_train, "SAMPLING.json")
-        train_indices = read_json(train_sampling_path)
+    # 3. sample each remaining combination of <category> & <language> (in parallel if args.workers > 1)
+    #    the metrics of each combination are written to SAMPLING_METRICS.ndjson as soon as it is finished
+    progress = _Progress(env, cells)
+    if args.workers > 1 and len(cells) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers,
+                                 initializer=_set_deduplicator,
+                                 initargs=(deduplicator,)) as executor:
+            for result in executor.map(_sample_cell, *zip(*cells)):
+                results[result[0]] = result
+                _log_metrics(logger, progress, result)
     else:
-        train_indices = {}
+        for cell in cells:
+            result = _sample_cell(*cell)
+            results[result[0]] = result
+            _log_metrics(logger, progress, result)
 
-    for category, language in product(categories, languages):
-        category_language = f"{category}_{language}.jsonl"
-        exclude = train_indices[category_language] if args.evaluation else ()
-        weight = sampling_weights_sampling[category][language]
-
-        if weight > 0:
-            ts = time.time()
-            logger.log_print(f"> category = {category}, language = {language}, weight = {weight}")
-
-            # 3. make sure that all source files in <data_original> exist
-            file_path_original = env.get_file_path(category,
-                                                   language,
-                                                   kind="data_original")
-            assert isfile(file_path_original), \
-                f"ERROR! file for category = {category}, language = {language} does not exist at {file_path_original}"
-            file_size_original = getsize(file_path_original)
-            logger.log_print(f".. size = {file_size_original/float(10**6):.1f} MB -> ", end="")
-
-            # 4. make sure that target folder <data_train> or <data_eval> exists
-            file_path_sampled = env.get_file_path(category,
-                                                  language,
-                                                  kind="data_eval" if args.evaluation else "data_train")
-            os.makedirs(dirname(file_path_sampled), exist_ok=True)
-
-            # 5. sample <percent>% of the original data and write
-            number_of_original_documents = sum(1 for _ in open(file_path_original))
-            number_of_sampled_documents = int(weight*number_of_original_documents)
-
-            with open(file_path_original) as infile:
-                sample, sample_indices[category_language] = \
-                    reservoir_sampling(infile, number_of_sampled_documents, exclude)
-            with open(file_path_sampled, 'w') as outfile_sample:
-                for line in sample:
-                    outfile_sample.write(line)
-
-            file_size_sampled = getsize(file_path_sampled)
-            logger.log_print(f"{file_size_sampled/float(10**6):.1f} MB (ratio = {file_size_sampled/file_size_original:.2f})", end="")
-
-            if env.verbose:
-                logger.log_print(f".. from {number_of_original_documents} original documents, "
-                                 f"wrote {number_of_sampled_documents} sampled documents to {file_path_sampled}")
-
-            te = time.time()
-            logger.log_print(f" [time = {te-ts:.1f}s]")
-            logger.log_print()
+    # 4. collect log output & sample indices (in the order of the combinations)
+    sample_indices = {folder: {} for folder in folders}
+    for category_language, cell_sample_indices, messages, _ in results.values():
+        logger.log_messages(messages)
+        if cell_sample_indices is not None:
+            for folder, folder_sample_indices in cell_sample_indices.items():
+                sample_indices[folder].update(folder_sample_indices)
 
-        else:
-            if env.verbose:
-                logger.log_print(f"> category = {category}, language = {language}, weight = {weight} .. skipped")
-                logger.log_print()
+    if deduplicator is not None:
+        logger.log_print(f"> deduplication: {deduplicator.number_of_documents} distinct documents written "
+                         f"(capacity = {deduplicator.capacity})")
+        if deduplicator.number_of_documents_without_text > 0:
+            logger.log_print(f"> WARNING! {deduplicator.number_of_documents_without_text} documents without text field "
+                             f"were kept without deduplication.")
+        if deduplicator.number_of_documents > deduplicator.capacity:
+            logger.log_print(f"> WARNING! --dedup_capacity {deduplicator.capacity} exceeded, "
+                             f"unique documents may have been dropped as false positives.")
+        deduplicator.close()
 
     # write sample indices
-    with open(file_path_sample_indices, 'w') as outfile_sample_indices:
-        json.dump(sample_indices, outfile_sample_indices)
+    for folder in folders:
+        file_path_sample_indices = write_sample_indices(folder, sample_indices[folder], args.sample_indices_format)
+        if env.verbose:
+            logger.log_print(f"> wrote sample indices to {file_path_sample_indices}")
+
+    # update fingerprints of the sampled files (SAMPLING_CACHE.json)
+    for _, _, category, language, *_ in cells:
+        category_language = f"{category}_{language}.jsonl"
+        for folder, key, file_path_sampled in _get_outputs(env, args, category, language):
+            if category_language in fingerprints:
+                caches[folder].update(key, fingerprints[category_language], file_path_sampled)
+            else:
+                caches[folder].remove(key)
+    for cache in caches.values():
+        cache.write()
 
-    # concatenate data by language (only if args.evaluation == 1)
-    if args.evaluation:
+    # concatenate data by language (only if args.evaluation == 1 or args.evaluation_percent > 0)
+    if args.evaluation or args.evaluation_percent:
         logger.log_print("\n=================")
         logger.log_print(f"> concatenate data by language in {env.data_eval}")
         concatenate_data_by_language(env.data_eval, inplace=True)
+    logger.close()
 
 
-if __name__ == "__main__":
+def _sample_cell(env: Env,
+                 args: argparse.Namespace,
+                 category: str,
+                 language: str,
+                 weights: Sequence[float],
+                 seed: int) -> Tuple[str,
+                                     Optional[Dict[str, Dict[str, Sequence[int]]]],
+                                     List[Tuple[Optional[str], Optional[str]]],
+                                     Optional[Dict[str, Any]]]:
+    """
+    sample the original data of a single combination of <category> & <language> (possibly in a worker process)
+    for each output (see _get_outputs) in a single scan of the original data:
+    - a single percent: one sample
+    - several percents: nested samples, i.e. the sample of a smaller percent is contained in the one of a larger percent
+    - args.evaluation_percent > 0: disjunct training & evaluation samples
+
+    Returns:
+        category_language: e.g. 'books_en.jsonl'
+        sample_indices: for each folder, e.g. {'<data_train>': {'books_en.jsonl': (2, 4)}}, None if weight == 0
+        messages: collected log output, see CellLogger
+        metrics: e.g. {'category': 'books', 'language': 'en', 'bytes_read': 2 * 10**9, 'mb_per_s': 350.1, ..},
+                 None if weight == 0
+    """
+    category_language = f"{category}_{language}.jsonl"
+    logger = CellLogger()
+    random.seed(seed)
+    weight = sum(weights) if args.evaluation_percent else weights[-1]
+
+    if weight == 0:
+        if env.verbose:
+            logger.log_print(f"> category = {category}, language = {language}, weight = {weight} .. skipped")
+            logger.log_print()
+        return category_language, None, logger.messages, None
+
+    # if evaluation, exclude the training documents (SAMPLING.idx or SAMPLING.json) for disjunct sampling
+    exclude = _get_train_indices(env.data_train, category, language) if args.evaluation else ()
+
+    ts = time.time()
+    logger.log_print(f"> category = {category}, language = {language}, weight = {weight}")
+
+    # a. make sure that all source files in <data_original> exist
+    file_path_original = env.get_file_path(category,
+                                           language,
+                                           kind="data_original")
+    assert isfile(file_path_original), \
+        f"ERROR! file for category = {category}, language = {language} does not exist at {file_path_original}"
+    file_size_original = getsize(file_path_original)
+    logger.log_print(f".. size = {file_size_original/float(10**6):.1f} MB -> ", end="")
+
+    # b. make sure that target folders <data_train> and/or <data_eval> exist
+    outputs = _get_outputs(env, args, category, language)
+    _prepare_outputs(outputs)
+
+    # c. sample <weight> (the largest percent, or the training & evaluation percent combined) of the original data
+    compressed = is_compressed(file_path_original)
+    line_index = get_line_index(file_path_original, create=False) if args.line_index and not compressed else None
+    number_of_bytes_reference = None
+    if args.unit == "bytes":
+        sample, sample_indices, number_of_original_documents, number_of_bytes_read, number_of_bytes_reference = \
+            _sample_bytes(file_path_original, line_index, weight, exclude, args.budget, logger)
+        number_of_sampled_documents = len(sample)
+    else:
+        if line_index is not None:
+            sample, sample_indices, number_of_original_documents, number_of_bytes_read = \
+                _sample_line_index(line_index, weight, exclude)
+        else:
+            sample, sample_indices, number_of_original_documents, number_of_bytes_read = \
+                _sample_documents(file_path_original, weight, exclude, args, logger)
+        number_of_sampled_documents = int(weight*number_of_original_documents)
+
+    # d. copy the byte ranges of the sampled documents (dropping duplicates if args.dedup is used)
+    if len(outputs) == 1:
+        ranks, rank_ranges = None, None
+    else:
+        ranks, rank_ranges = _get_rank_ranges(args, weights, sample, number_of_original_documents,
+                                              number_of_sampled_documents, number_of_bytes_reference)
+    cell_sample_indices, number_of_bytes_sampled, number_of_duplicates = \
+        _write_samples(file_path_original, outputs, sample, sample_indices, ranks, rank_ranges,
+                       disjunct=bool(args.evaluation_percent))
+    number_of_bytes_read += number_of_bytes_sampled
+    if number_of_duplicates:
+        number_of_sampled_documents -= number_of_duplicates
+        logger.log_print(f"({number_of_duplicates} duplicates dropped) ", end="")
+
+    for j, (percent, (_, _, file_path_sampled)) in enumerate(zip(_get_percents(args), outputs)):
+        file_size_sampled = getsize(file_path_sampled)
+        if len(outputs) > 1:
+            logger.log_print(f"{'' if j == 0 else ', '}{percent}%: ", end="")
+        logger.log_print(f"{file_size_sampled/float(10**6):.1f} MB", end="")
+        # the file sizes are only comparable if the original & sampled file have the same compression
+        if get_jsonl_suffix(file_path_sampled) == get_jsonl_suffix(file_path_original):
+            logger.log_print(f" (ratio = {file_size_sampled/file_size_original:.2f})", end="")
+
+    if env.verbose:
+        logger.log_print(f".. from {number_of_original_documents} original documents, "
+                         f"wrote {number_of_sampled_documents} sampled documents to "
+                         f"{[file_path_sampled for _, _, file_path_sampled in outputs]}")
+
+    te = time.time()
+    logger.log_print(f" [time = {te-ts:.1f}s]")
+    logger.log_print()
+
+    metrics = {
+        "category": category,
+        "language": language,
+        "weight": weight,
+        "file_size_original": file_size_original,
+        "bytes_read": number_of_bytes_read,
+        "bytes_sampled": number_of_bytes_sampled,
+        "documents_original": number_of_original_documents,
+        "documents_sampled": number_of_sampled_documents,
+        "documents_duplicate": number_of_duplicates,
+        "time": round(te - ts, 3),
+        "mb_per_s": round(number_of_bytes_read / float(10**6) / max(te - ts, 1e-6), 1),
+        "docs_per_s": round(number_of_original_documents / max(te - ts, 1e-6), 1),
+        "peak_rss_mb": get_peak_rss(),
+    }
+    return category_language, cell_sample_indices, logger.messages, metrics
+
+
+def _prepare_outputs(outputs: List[Tuple[str, str, str]]) -> None:
+    """
+    create the folders of the sampled files & remove sampled files of a previous run with a different compression
+
+    Args:
+        outputs: see _get_outputs
+    """
+    for _, _, file_path_sampled in outputs:
+        os.makedirs(dirname(file_path_sampled), exist_ok=True)
+        for suffix in JSONL_SUFFIXES:
+            file_path_stale = strip_jsonl_suffix(file_path_sampled) + suffix
+            if file_path_stale != file_path_sampled and isfile(file_path_stale):
+                os.remove(file_path_stale)
+
+
+def _sample_bytes(file_path_original: str,
+                  line_index: Optional[LineIndex],
+                  weight: float,
+                  exclude: Sequence[int],
+                  budget: Optional[int],
+                  logger: CellLogger) -> Tuple[List[Tuple[int, int]], Sequence[int], int, int, int]:
+    """
+    --unit bytes: sample documents in random order until <weight> of the original bytes (or of budget) are reached.
+    the budget is determined after reading, as the decompressed size of compressed files is not known before.
+    the candidate threshold is adapted while reading (see budget_candidates). if the candidates fall short
+    of the budget nevertheless, the threshold for another pass is computed from the collected bytes
+
+    Returns:
+        sample: byte ranges of the sampled documents in random order, e.g. [(82, 42), (0, 42)]
+        sample_indices: in the same order, e.g. (2, 0)
+        number_of_original_documents: e.g. 5
+        number_of_bytes_read: e.g. 210
+        number_of_bytes_reference: the weights refer to this nr. of bytes, e.g. 210 (or budget)
+    """
+    threshold = None
+    number_of_bytes_read = 0
+    while True:
+        if line_index is not None:
+            candidates, threshold_min, number_of_original_documents = budget_candidates(
+                map(line_index.get_range, range(line_index.number_of_documents)), weight, budget, exclude, threshold)
+            number_of_bytes_original = line_index.file_size
+        else:
+            with open_jsonl(file_path_original, 'rb') as infile:
+                candidates, threshold_min, number_of_original_documents = \
+                    budget_candidates(byte_ranges(infile), weight, budget, exclude, threshold)
+                number_of_bytes_original = infile.tell()
+            number_of_bytes_read += number_of_bytes_original
+        number_of_bytes_reference = number_of_bytes_original if budget is None else budget
+        number_of_bytes_budget = int(weight*number_of_bytes_reference)
+        sample, sample_indices = select_budget(candidates, number_of_bytes_budget, threshold_min)
+        if sample is not None:
+            return sample, sample_indices, number_of_original_documents, number_of_bytes_read, \
+                number_of_bytes_reference
+        threshold = budget_threshold(candidates, threshold_min, number_of_bytes_budget)
+        logger.log_print(f"(budget not reached, retry with threshold = {threshold:.2f}) ", end="")
+
+
+def _sample_line_index(line_index: LineIndex,
+                       weight: float,
+                       exclude: Sequence[int]) -> Tuple[Iterable[Tuple[int, int]], Sequence[int], int, int]:
+    """
+    sample line indices directly & read only the sampled documents (using the line index)
+
+    Returns:
+        sample: byte ranges of the sampled documents, e.g. [(0, 42), (82, 42)]
+        sample_indices: e.g. (0, 2)
+        number_of_original_documents: e.g. 5
+        number_of_bytes_read: 0, the original file is not read
+    """
+    number_of_original_documents = line_index.number_of_documents
+    number_of_sampled_documents = int(weight*number_of_original_documents)
+    sample_indices = index_sampling(number_of_original_documents, number_of_sampled_documents, exclude)
+    return map(line_index.get_range, sample_indices), sample_indices, number_of_original_documents, 0
+
+
+def _sample_documents(file_path_original: str,
+                      weight: float,
+                      exclude: Sequence[int],
+                      args: argparse.Namespace,
+                      logger: CellLogger) -> Tuple[List[Tuple[int, int]], Sequence[int], int, int]:
+    """
+    read all documents & sample their byte ranges (offset, length)
+    - args.single_pass & args.shards > 1: newline-aligned shards of the file are sampled in parallel & merged
+    - args.single_pass: the documents are counted & sampled in a single pass (see single_pass_sampling)
+    - otherwise, the nr. of documents is taken from <data_original>/CATALOG.json (or counted in a separate pass)
+    the (very unlikely) failure of the single pass is followed by a second pass with reservoir sampling
+
+    Returns:
+        sample: byte ranges of the sampled documents, e.g. [(0, 42), (82, 42)]
+        sample_indices: e.g. (0, 2)
+        number_of_original_documents: e.g. 5
+        number_of_bytes_read: e.g. 210
+    """
+    sample = None
+    number_of_bytes_read = 0
+    if args.single_pass and args.shards > 1 and not is_compressed(file_path_original):
+        # split the file into newline-aligned shards that are sampled in parallel & merged
+        with ProcessPoolExecutor(max_workers=args.shards) as executor:
+            sample, sample_indices, number_of_original_documents = \
+                sharded_sampling(file_path_original, weight, exclude, args.shards, executor)
+        number_of_bytes_read += getsize(file_path_original)
+        if sample is None:
+            logger.log_print("(single pass failed, fall back to second pass) ", end="")
+    elif args.single_pass:
+        with open_jsonl(file_path_original, 'rb') as infile:
+            sample, sample_indices, number_of_original_documents = \
+                single_pass_sampling(byte_ranges(infile), weight, exclude)
+            number_of_bytes_read += infile.tell()
+        if sample is None:
+            logger.log_print("(single pass failed, fall back to second pass) ", end="")
+    else:
+        # the nr. of documents is taken from <data_original>/CATALOG.json if it is up to date
+        entry = _read_catalog(dirname(file_path_original)).get_entry(basename(file_path_original))
+        if entry is not None:
+            number_of_original_documents = entry["documents"]
+        else:
+            with open_jsonl(file_path_original, 'rb') as infile:
+                number_of_original_documents = sum(1 for _ in infile)
+                number_of_bytes_read += infile.tell()
+
+    if sample is None:
+        with open_jsonl(file_path_original, 'rb') as infile:
+            sample, sample_indices = \
+                reservoir_sampling_skip(byte_ranges(infile), int(weight*number_of_original_documents), exclude)
+            number_of_bytes_read += infile.tell()
+    return sample, sample_indices, number_of_original_documents, number_of_bytes_read
+
+
+def _get_rank_ranges(args: argparse.Namespace,
+                     weights: Sequence[float],
+                     sample: Sequence[Tuple[int, int]],
+                     number_of_original_documents: int,
+                     number_of_sampled_documents: int,
+                     number_of_bytes_reference: Optional[int]) -> Tuple[Sequence[int], List[Tuple[int, int]]]:
+    """
+    split a sample into the samples of several outputs, see _get_outputs.
+    the documents with rank_start <= rank < rank_end are the sample for the respective output
+
+    Args:
+        args: argparse.Namespace
+        weights: for each output, e.g. [0.1, 0.2, 0.5]
+        sample: byte ranges of the sampled documents (in random order if args.unit == 'bytes'), e.g. [(82, 42), ..]
+        number_of_original_documents: e.g. 100
+        number_of_sampled_documents: e.g. 50
+        number_of_bytes_reference: see _sample_bytes, None if args.unit == 'documents'
+
+    Returns:
+        ranks: for each sampled document, e.g. [3, 0, 4, 1, 2]
+        rank_ranges: (rank_start, rank_end) for each output,
+                     e.g. nested [(0, 1), (0, 2), (0, 5)] or disjunct (--evaluation_percent) [(0, 4), (4, 5)]
+    """
+    numbers_of_sampled_documents = [int(_weight*number_of_original_documents) for _weight in weights]
+    if args.unit == "bytes":
+        # the sample is in random order already, the ranks are determined by the cumulative bytes
+        ranks: Sequence[int] = range(number_of_sampled_documents)
+        numbers_of_bytes_cumulative = list(accumulate(length for _, length in sample))
+        budgets = [int(_weight*number_of_bytes_reference) for _weight in weights]
+        budgets_cumulative = list(accumulate(budgets)) if args.evaluation_percent else budgets
+        rank_ends = [
+            min(bisect_left(numbers_of_bytes_cumulative, budget) + 1, number_of_sampled_documents)
+            if budget > 0 else 0
+            for budget in budgets_cumulative
+        ]
+    else:
+        ranks = nested_ranks(number_of_sampled_documents)
+        rank_ends = list(accumulate(numbers_of_sampled_documents)) if args.evaluation_percent \
+            else numbers_of_sampled_documents
+    if args.evaluation_percent:
+        # disjunct: training = [0, n_train), evaluation = [n_train, n_train + n_eval)
+        return ranks, list(zip([0] + rank_ends[:-1], rank_ends))
+    # nested: [0, n_percent) for each percent
+    return ranks, [(0, rank_end) for rank_end in rank_ends]
+
+
+def _write_samples(file_path_original: str,
+                   outputs: List[Tuple[str, str, str]],
+                   sample: Iterable[Tuple[int, int]],
+                   sample_indices: Sequence[int],
+                   ranks: Optional[Sequence[int]],
+                   rank_ranges: Optional[List[Tuple[int, int]]],
+                   disjunct: bool) -> Tuple[Dict[str, Dict[str, Sequence[int]]], int, int]:
+    """
+    copy the byte ranges of the sampled documents to the sampled file of each output (see _get_outputs),
+    dropping documents that were written before if the deduplicator is set (see _set_deduplicator)
+
+    Args:
+        file_path_original: e.g. '<data_original>/books_en.jsonl'
+        outputs: see _get_outputs
+        sample: byte ranges of the sampled documents, e.g. [(0, 42), (82, 42)]
+        sample_indices: in the same order, e.g. (0, 2)
+        ranks: see _get_rank_ranges, None if there is a single output
+        rank_ranges: see _get_rank_ranges, None if there is a single output
+        disjunct: True if the samples of the outputs are disjunct (--evaluation_percent), False if they are nested
+
+    Returns:
+        sample_indices: for each folder, e.g. {'<data_train>': {'books_en.jsonl': (0, 2)}}, without duplicates
+        number_of_bytes_sampled: nr. of bytes copied from the original file, e.g. 84
+        number_of_duplicates: nr. of dropped documents, e.g. 0
+    """
+    is_duplicate = None
+    duplicate_offsets = set()
+    if _DEDUPLICATOR is not None:
+        sample = list(sample)
+
+        def is_duplicate(_offset: int, _document: bytes) -> bool:
+            if _DEDUPLICATOR.is_duplicate(_document):
+                duplicate_offsets.add(_offset)
+                return True
+            return False
+
+    if ranks is None or rank_ranges is None:
+        folder, key, file_path_sampled = outputs[0]
+        with open_jsonl(file_path_sampled, 'wb') as outfile_sample:
+            number_of_bytes_sampled = copy_byte_ranges(file_path_original, sample, outfile_sample,
+                                                       is_duplicate=is_duplicate)
+        cell_sample_indices = {folder: {key: sample_indices}}
+    else:
+        outfiles_sample = [open_jsonl(file_path_sampled, 'wb') for _, _, file_path_sampled in outputs]
+        try:
+            numbers_of_bytes_sampled = \
+                copy_ranked_byte_ranges(file_path_original, sample, ranks, outfiles_sample, rank_ranges,
+                                        is_duplicate=is_duplicate)
+        finally:
+            for outfile_sample in outfiles_sample:
+                outfile_sample.close()
+        cell_sample_indices = {folder: {} for folder, _, _ in outputs}
+        for (folder, key, _), (rank_start, rank_end) in zip(outputs, rank_ranges):
+            cell_sample_indices[folder][key] = tuple(
+                index for index, rank in zip(sample_indices, ranks) if rank_start <= rank < rank_end
+            )
+        # nested samples are read once for the largest percent, disjunct samples once each
+        number_of_bytes_sampled = sum(numbers_of_bytes_sampled) if disjunct else max(numbers_of_bytes_sampled)
+
+    if not duplicate_offsets:
+        return cell_sample_indices, number_of_bytes_sampled, 0
+    duplicate_indices = {index for index, (offset, _) in zip(sample_indices, sample) if offset in duplicate_offsets}
+    for folder_sample_indices in cell_sample_indices.values():
+        for key, indices in folder_sample_indices.items():
+            folder_sample_indices[key] = tuple(index for index in indices if index not in duplicate_indices)
+    return cell_sample_indices, number_of_bytes_sampled, len(duplicate_indices)
+
+
+class _Progress:
+    """Class used to estimate the remaining time (ETA) from the sizes of the original files of the finished combinations"""
+
+    def __init__(self, env: Env, cells: List[tuple]):
+        """
+        Args:
+            env: Env
+            cells: arguments of _sample_cell for each combination of <category> & <language> that is sampled
+        """
+        self.ts = time.time()
+        self.number_of_bytes_total = 0
+        for _, _, category, language, *_ in cells:
+            file_path_original = env.get_file_path(category, language, kind="data_original")
+            self.number_of_bytes_total += getsize(file_path_original) if isfile(file_path_original) else 0
+        self.number_of_bytes_done = 0
+        self.number_of_cells_total = len(cells)
+        self.number_of_cells_done = 0
+
+    def update(self, number_of_bytes: int) -> float:
+        """
+        Args:
+            number_of_bytes: size of the original file of a finished combination, e.g. 2 * 10**9
+
+        Returns:
+            eta: estimated remaining time in seconds, e.g. 12.5
+        """
+        self.number_of_bytes_done += number_of_bytes
+        self.number_of_cells_done += 1
+        elapsed = time.time() - self.ts
+        if self.number_of_bytes_done > 0:
+            fraction_done = self.number_of_bytes_done / self.number_of_bytes_total
+        else:
+            fraction_done = self.number_of_cells_done / self.number_of_cells_total
+        return elapsed * (1 - fraction_done) / fraction_done if fraction_done > 0 else 0.0
+
+
+def _log_metrics(logger: Logger, progress: _Progress, result: tuple) -> None:
+    """
+    write the metrics of a finished combination of <category> & <language> (see _sample_cell), incl. ETA
+
+    Args:
+        logger: Logger
+        progress: _Progress
+        result: return value of _sample_cell
+    """
+    metrics = result[3]
+    eta = progress.update(metrics["file_size_original"] if metrics is not None else 0)
+    if metrics is not None:
+        logger.log_metrics({**metrics, "eta": round(eta, 1)})
+
+
+def _get_percents(args: argparse.Namespace) -> List[int]:
+    """
+    Returns:
+        percents: for each output (see _get_outputs), e.g. [10], [10, 20, 50] or [10, 1] (--evaluation_percent 1)
+    """
+    return sorted(set(args.percent)) + ([args.evaluation_percent] if args.evaluation_percent else [])
+
+
+def _get_folders(env: Env, args: argparse.Namespace) -> List[str]:
+    """
+    Returns:
+        folders: e.g. ['<data_train>'], ['<data_eval>'] or ['<data_train>', '<data_eval>'] (--evaluation_percent > 0)
+    """
+    if args.evaluation_percent:
+        return [env.data_train, env.data_eval]
+    return [env.data_eval if args.evaluation else env.data_train]
+
+
+def _get_outputs(env: Env,
+                 args: argparse.Namespace,
+                 category: str,
+                 language: str) -> List[Tuple[str, str, str]]:
+    """
+    Returns:
+        outputs: (folder, key, file_path_sampled) for each percent (see _get_percents), e.g.
+                 - one percent: [('<data_train>', 'books_en.jsonl', '<data_train>/books_en.jsonl')]
+                 - several percents: [('<data_train>', 'books_en_10p.jsonl', '<data_train>/books_en_10p.jsonl'), ..]
+                 - evaluation_percent: [('<data_train>', 'books_en.jsonl', '<data_train>/books_en.jsonl'),
+                                        ('<data_eval>', 'books_en.jsonl', '<data_eval>/books_en.jsonl')]
+                 the key is always '.jsonl', the file path ends with '.jsonl.gz' or '.jsonl.zst' if args.compression is used
+    """
+    suffix = COMPRESSIONS[args.compression]
+    if args.evaluation_percent:
+        return [
+            (folder, f"{category}_{language}.jsonl", env.get_file_path(category, language, kind=kind, suffix=suffix))
+            for folder, kind in zip(_get_folders(env, args), ["data_train", "data_eval"])
+        ]
+
+    folder = _get_folders(env, args)[0]
+    kind = "data_eval" if args.evaluation else "data_train"
+    percents = sorted(set(args.percent))
+    if len(percents) == 1:
+        return [(folder, f"{category}_{language}.jsonl", env.get_file_path(category, language, kind=kind, suffix=suffix))]
+    return [
+        (folder,
+         f"{category}_{language}_{percent}p.jsonl",
+         env.get_file_path(category, language, kind=kind, suffix=f"_{percent}p{suffix}"))
+        for percent in percents
+    ]
+
+
+def _get_fingerprint(env: Env,
+                     args: argparse.Namespace,
+                     category: str,
+                     language: str,
+                     weights: Sequence[float],
+                     seed: int) -> str:
+    """
+    Returns:
+        fingerprint of the combination of <category> & <language> w.r.t. the original file & all sampling arguments
+    """
+    file_path_original = env.get_file_path(category, language, kind="data_original")
+    assert isfile(file_path_original), \
+        f"ERROR! file for category = {category}, language = {language} does not exist at {file_path_original}"
+    exclude = _get_train_indices(env.data_train, category, language) if args.evaluation else ()
+    compressed = is_compressed(file_path_original)
+    line_index = get_line_index(file_path_original, create=False) if args.line_index and not compressed else None
+    return get_cell_fingerprint(file_path_original,
+                                weights[-1],
+                                max(args.percent),
+                                seed,
+                                exclude,
+                                percents=",".join(map(str, _get_percents(args))),
+                                weights=",".join(map(str, weights)),
+                                evaluation=bool(args.evaluation),
+                                line_index=line_index is not None,
+                                single_pass=bool(args.single_pass),
+                                shards=args.shards if args.single_pass and line_index is None and not compressed else 1,
+                                unit=args.unit,
+                                budget=args.budget or 0,
+                                compression=args.compression)
+
+
+def _read_previous_sample_indices(directory: str) -> Dict[str, Sequence[int]]:
+    """
+    read the sample indices of the previous run (copied, as the file is overwritten later on)
+
+    Returns:
+        sample_indices: e.g. {'books_en.jsonl': array('Q', [2, 4])}, empty if there are none
+    """
+    try:
+        return {key: array("Q", indices) for key, indices in read_sample_indices(directory).items()}
+    except AssertionError:
+        return {}
+
+
+def _set_deduplicator(deduplicator: Optional[Deduplicator]) -> None:
+    """set the deduplicator of the current (worker) process"""
+    global _DEDUPLICATOR
+    _DEDUPLICATOR = deduplicator
+
+
+@lru_cache(maxsize=1)
+def _read_train_indices(data_train: str) -> Dict[str, Sequence[int]]:
+    """read the training sample indices once per process"""
+    return read_sample_indices(data_train)
+
+
+def _get_train_indices(data_train: str, category: str, language: str) -> Sequence[int]:
+    """
+    indices of the training documents of <category> & <language>, which are excluded for disjunct evaluation sampling.
+    after nested sampling of several percents (keys '<category>_<language>_<percent>p.jsonl'),
+    the indices of the largest percent are used, as its sample contains the samples of all smaller percents.
+
+    Returns:
+        train_indices: e.g. array('Q', [2, 4])
+    """
+    train_indices = _read_train_indices(data_train)
+    key = get_train_key(train_indices.keys(), category, language)
+    assert key is not None, \
+        f"ERROR! no training sample indices for {category}_{language}.jsonl found in {data_train}, " \
+        f"sample the training data (with the same SAMPLING_WEIGHTS.csv) before the evaluation data"
+    return train_indices[key]
+
+
+def _parse_size(size: str) -> int:
+    """
+    Args:
+        size: e.g. '2G', '500M', '64k' or '1000' (bytes)
+
+    Returns:
+        number_of_bytes: e.g. 2 * 1024**3
+    """
+    units = {"k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+    try:
+        if size[-1:].lower() in units:
+            return int(float(size[:-1]) * units[size[-1].lower()])
+        return int(size)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ERROR! size = {size} is not valid, e.g. 2G, 500M, 64k or 1000")
+
+
+@lru_cache(maxsize=1)
+def _read_catalog(data_original: str) -> Catalog:
+    """read the catalog once per process (it is not refreshed, i.e. only up-to-date entries are used)"""
+    return Catalog(data_original)
+
+
+def _get_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
-    parser.add_argument("--percent", type=int, default=10)
+    parser.add_argument("--percent", type=int, nargs="+", default=[10])
     parser.add_argument("--evaluation", type=bool, default=0)
-    _args = parser.parse_args()
+    parser.add_argument("--evaluation_percent", type=int, default=0)
+    parser.add_argument("--single_pass", type=int, default=1)
+    parser.add_argument("--sample_indices_format", type=str, default="binary", choices=["binary", "json"])
+    parser.add_argument("--line_index", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--cache", type=int, default=1)
+    parser.add_argument("--unit", type=str, default="documents", choices=["documents", "bytes"])
+    parser.add_argument("--budget", type=_parse_size, default=None,
+                        help="e.g. 2G, with --unit bytes: the weights refer to <budget> bytes per combination "
+                             "instead of the size of its original file")
+    parser.add_argument("--compression", type=str, default="none", choices=list(COMPRESSIONS))
+    parser.add_argument("--dedup", type=str, default="none", choices=DEDUPLICATION_MODES)
+    parser.add_argument("--dedup_capacity", type=int, default=10**7)
+    return parser
+
+
+if __name__ == "__main__":
+    _args = _get_parser().parse_args()
 
     main(_args)
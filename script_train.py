@@ -13,6 +13,7 @@ EXECUTION: python script_train.py
            [--add_code_tokens 1]                  # 0, 1 (added at top of vocab)
            [--add_newline_token 0]                # 0, 1 (added at top of vocab)
            [--minimum_frequency 0]                # int >= 0
+           [--alpha -1]                           # 0 <= alpha <= 1, -1 = no upsampling
            [--initial_alphabet 0]                 # 0, 1 (only HF)
            [--byte_fallback 1]                    # 0, 1 (only SP)
            [--character_coverage 0.9999]          # float, useful if byte_fallback = 1 (only SP)
@@ -51,9 +52,7 @@ def main(args):
     output.export_parameters(parameters)  # output: parameters.txt
 
     # 0. Load Datasets
-    # if args.alpha != 1.0:
-    #     upsampled_data_file = upsampling(parameters.dataset_files, args.alpha)
-    #     data_files += upsampled_data_file
+    #    (if alpha is specified, the languages are upsampled virtually in the training iterator, see src/upsampling.py)
     datasets_combined = load_dataset('json', data_files={'train': parameters.dataset_files})
 
     # 1. Train Tokenizer
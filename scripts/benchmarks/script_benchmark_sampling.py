@@ -0,0 +1,125 @@
+"""
+EXECUTION: python script_benchmark_sampling.py
+           [--number_of_documents 1000000]
+           [--document_length 0]   # nr. of additional characters per document
+           [--percent 10]
+           [--repetitions 3]
+           [--shards 4]
+
+PURPOSE: the script
+         - writes a temporary file with <number_of_documents> fake documents
+         - samples <percent>% of the documents with each of the sampling functions in src/sampling.py
+           (sharded_sampling uses <shards> processes)
+         - prints the best time (out of <repetitions>) and the throughput for each sampling function
+         - compares sampling end-to-end (read, sample & write) in text mode (decode & encode each document)
+           with the binary mode used by script_sampling.py (byte ranges, raw bytes are copied)
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict
+
+from os.path import abspath, dirname, join
+import sys
+BASE_DIR = abspath(dirname(dirname(dirname(abspath(__file__)))))
+print(f">>> BASE_DIR: {BASE_DIR}")
+sys.path.append(BASE_DIR)
+
+from src.sampling import (
+    reservoir_sampling,
+    reservoir_sampling_original,
+    reservoir_sampling_skip,
+    single_pass_sampling,
+    sharded_sampling,
+    byte_ranges,
+    copy_byte_ranges,
+)
+from src.compression import open_jsonl
+
+
+def main(args):
+    weight = args.percent / 100
+    number_of_sampled_documents = int(weight * args.number_of_documents)
+
+    sampling_functions: Dict[str, Callable] = {
+        "reservoir_sampling_original": lambda infile: reservoir_sampling_original(infile, number_of_sampled_documents),
+        "reservoir_sampling": lambda infile: reservoir_sampling(infile, number_of_sampled_documents),
+        "reservoir_sampling_skip": lambda infile: reservoir_sampling_skip(infile, number_of_sampled_documents),
+        "single_pass_sampling": lambda infile: single_pass_sampling(infile, weight),
+    }
+
+    with tempfile.TemporaryDirectory() as temp_directory, ProcessPoolExecutor(max_workers=args.shards) as executor:
+        file_path = join(temp_directory, "benchmark_en.jsonl")
+        sampling_functions["single_pass_sampling (byte ranges)"] = \
+            lambda infile: single_pass_sampling(byte_ranges(infile.buffer), weight)
+        sampling_functions[f"sharded_sampling ({args.shards} shards)"] = \
+            lambda infile: sharded_sampling(file_path, weight, number_of_shards=args.shards, executor=executor)
+        with open(file_path, "w", encoding="utf-8") as file:
+            for n in range(args.number_of_documents):
+                file.write(json.dumps({"text": f"this is benchmark document number {n} " + "ö" * args.document_length},
+                                      ensure_ascii=False)
+                           + "\n")
+        file_size = os.path.getsize(file_path)
+        print(f"\n> wrote {args.number_of_documents} documents ({file_size/float(10**6):.1f} MB) to {file_path}")
+        print(f"> sample {number_of_sampled_documents} documents ({args.percent}%), best of {args.repetitions}\n")
+
+        for name, sampling_function in sampling_functions.items():
+            times = []
+            for repetition in range(args.repetitions):
+                random.seed(repetition)
+                ts = time.time()
+                with open(file_path, "r", encoding="utf-8") as infile:
+                    _ = sampling_function(infile)
+                times.append(time.time() - ts)
+            best = min(times)
+            print(f"{name:>36}: {best:6.2f}s "
+                  f"({args.number_of_documents/best/10**6:.2f}M docs/s, {file_size/best/10**6:.0f} MB/s)")
+
+        print(f"\n> end-to-end (read, sample & write), best of {args.repetitions}\n")
+        output_file_path = join(temp_directory, "benchmark_en_sampled.jsonl")
+        end_to_end_functions: Dict[str, Callable] = {
+            "text mode (decode & encode)": _sample_text,
+            "binary mode (byte ranges)": _sample_binary,
+        }
+        for name, end_to_end_function in end_to_end_functions.items():
+            times = []
+            for repetition in range(args.repetitions):
+                random.seed(repetition)
+                ts = time.time()
+                end_to_end_function(file_path, output_file_path, weight)
+                times.append(time.time() - ts)
+            best = min(times)
+            print(f"{name:>36}: {best:6.2f}s "
+                  f"({args.number_of_documents/best/10**6:.2f}M docs/s, {file_size/best/10**6:.0f} MB/s)")
+
+
+def _sample_text(file_path: str, output_file_path: str, weight: float) -> None:
+    """sample the documents as str, i.e. each line is decoded from & encoded to utf-8"""
+    with open(file_path, "r", encoding="utf-8") as infile:
+        sample, _, _ = single_pass_sampling(infile, weight)
+    with open(output_file_path, "w", encoding="utf-8") as outfile:
+        outfile.writelines(sample)
+
+
+def _sample_binary(file_path: str, output_file_path: str, weight: float) -> None:
+    """sample the byte ranges of the documents & copy the raw bytes (as in script_sampling.py)"""
+    with open_jsonl(file_path, "rb") as infile:
+        sample, _, _ = single_pass_sampling(byte_ranges(infile), weight)
+    with open_jsonl(output_file_path, "wb") as outfile:
+        copy_byte_ranges(file_path, sample, outfile)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number_of_documents", type=int, default=1000000)
+    parser.add_argument("--document_length", type=int, default=0)
+    parser.add_argument("--percent", type=int, default=10)
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--shards", type=int, default=4)
+    _args = parser.parse_args()
+
+    main(_args)
@@ -0,0 +1,113 @@
+"""
+EXECUTION: python script_benchmark_text_reader.py
+           [--number_of_documents 100000]
+           [--document_length 2000]   # nr. of characters of the text per document
+           [--repetitions 3]
+
+PURPOSE: the script
+         - writes temporary files with <number_of_documents> fake documents with realistic metadata
+           (title, url, md5, lang, filters, lengths, ..), with the text field first & last
+         - reads the texts of each file with json.loads(line)["text"] and with src/text_reader.py
+         - prints the best time (out of <repetitions>), the throughput & the speedup for each reader
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from os.path import abspath, dirname, join
+import sys
+BASE_DIR = abspath(dirname(dirname(dirname(abspath(__file__)))))
+print(f">>> BASE_DIR: {BASE_DIR}")
+sys.path.append(BASE_DIR)
+
+from src.text_reader import get_text, read_texts
+
+WORDS = ["the", "och", "på", "þetta", "være", "\"quoted\"", "line\nbreak", "tab\t", "back\\slash", "naïve", "😀"]
+
+
+def main(args):
+    readers: Dict[str, Callable] = {
+        'json.loads(line)["text"]': _read_json,
+        "get_text(line)": _read_get_text,
+        "read_texts(file_path)": _read_texts,
+    }
+
+    with tempfile.TemporaryDirectory() as temp_directory:
+        for text_position in ["first", "last"]:
+            file_path = join(temp_directory, f"benchmark_{text_position}_en.jsonl")
+            random.seed(42)
+            with open(file_path, "w", encoding="utf-8") as file:
+                for n in range(args.number_of_documents):
+                    file.write(_get_document(n, args.document_length, text_position) + "\n")
+            file_size = os.path.getsize(file_path)
+            print(f"\n> wrote {args.number_of_documents} documents ({file_size/float(10**6):.1f} MB) "
+                  f"with the text field {text_position} to {file_path}")
+            print(f"> read the texts, best of {args.repetitions}\n")
+
+            baseline = None
+            for name, reader in readers.items():
+                times = []
+                for _ in range(args.repetitions):
+                    ts = time.time()
+                    texts = reader(file_path)
+                    times.append(time.time() - ts)
+                best = min(times)
+                assert len(texts) == args.number_of_documents, \
+                    f"ERROR! {name} read {len(texts)} != {args.number_of_documents} documents"
+                baseline = baseline or best
+                print(f"{name:>28}: {best:6.2f}s "
+                      f"({args.number_of_documents/best/10**3:.1f}k docs/s, {file_size/best/10**6:.0f} MB/s, "
+                      f"speedup {baseline/best:.2f}x)")
+
+
+def _get_document(n: int, document_length: int, text_position: str) -> str:
+    """fake document with metadata similar to the (filtered) original data"""
+    words: List[str] = []
+    length = 0
+    while length < document_length:
+        words.append(random.choice(WORDS))
+        length += len(words[-1]) + 1
+    text = " ".join(words)
+    metadata = {
+        "title": f"Document {n}: a \"text\" about {random.choice(WORDS)}",
+        "url": f"https://www.example.com/{random.randint(0, 10**9)}/document-{n}.html",
+        "md5": hashlib.md5(text.encode("utf-8")).hexdigest(),
+        "lang": "en",
+        "keep": 1,
+        "filters": [{"name": f"filter_{i}", "score": random.random(), "keep": 1} for i in range(5)],
+        "len_char": len(text),
+        "len_utf8bytes": len(text.encode("utf-8")),
+        "len_words": len(text.split()),
+        "meta": {"source": "web", "timestamp": "2023-01-01T00:00:00Z"},
+    }
+    document = {"text": text, **metadata} if text_position == "first" else {**metadata, "text": text}
+    return json.dumps(document, ensure_ascii=n % 2 == 0)
+
+
+def _read_json(file_path: str) -> List[str]:
+    with open(file_path, "rb") as infile:
+        return [json.loads(line)["text"] for line in infile]
+
+
+def _read_get_text(file_path: str) -> List[str]:
+    with open(file_path, "rb") as infile:
+        return [get_text(line) for line in infile]
+
+
+def _read_texts(file_path: str) -> List[str]:
+    return [text for batch in read_texts(file_path) for text in batch]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number_of_documents", type=int, default=100000)
+    parser.add_argument("--document_length", type=int, default=2000)
+    parser.add_argument("--repetitions", type=int, default=3)
+    _args = parser.parse_args()
+
+    main(_args)
@@ -0,0 +1,126 @@
+"""
+EXECUTION: python script_apply_near_duplicate_filter.py
+           --directory <directory>
+           [--workers 0]    # nr. of processes, 0 = all cores
+           [--ngram 5]      # nr. of words per shingle
+           [--bins 128]     # length of the MinHash signatures (power of 2)
+           [--bands 16]     # nr. of LSH bands
+
+PURPOSE: the script
+         - takes all the dataset files in <directory>
+         - computes a MinHash signature of the word <ngram>s of each document (in parallel, across files & byte ranges)
+         - buckets the signatures with LSH (<bands> bands of <bins>/<bands> rows)
+         - filters documents that share a bucket with a previous document (in the order of the sorted file names)
+           and writes the rest to <directory>_FILTERED
+
+         documents with a jaccard similarity of about (1/<bands>)^(<bands>/<bins>) or more are considered near-duplicates,
+         e.g. 0.71 for the default values. only the LSH band keys are kept in memory, in sorted arrays
+         (8 bytes per band & document) & a bounded buffer per band (see src/near_duplicates.py).
+         at most 2 * <workers> byte ranges are computed ahead of the bucketing.
+"""
+import os
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from os.path import join, isdir, isfile
+import argparse
+import time
+
+from os.path import abspath, dirname
+import sys
+BASE_DIR = abspath(dirname(dirname(dirname(abspath(__file__)))))
+print(f">>> BASE_DIR: {BASE_DIR}")
+sys.path.append(BASE_DIR)
+
+from src.compression import is_jsonl, is_compressed, get_jsonl_suffix, strip_jsonl_suffix, open_jsonl
+from src.near_duplicates import get_band_keys_of_file, NearDuplicateIndex
+from src.sampling import shard_file
+
+
+def main(args):
+
+    input_directory = join(BASE_DIR, args.directory)
+    output_directory = join(BASE_DIR, f"{input_directory}_FILTERED")
+
+    assert isdir(input_directory), f"ERROR! {input_directory} not found."
+    assert args.bins % args.bands == 0, f"ERROR! --bins {args.bins} needs to be divisible by --bands {args.bands}"
+
+    input_files = sorted(
+        join(input_directory, elem)
+        for elem in os.listdir(input_directory)
+        if isfile(join(input_directory, elem)) and is_jsonl(elem) and "_FILTERED" not in elem
+    )
+
+    print()
+    print(f"> found {len(input_files)} files in {input_directory}")
+
+    workers = args.workers or os.cpu_count() or 1
+    index = NearDuplicateIndex(args.bands)
+    ts = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # compute the band keys of all files & byte ranges in parallel, with a bounded nr. of pending futures
+        tasks = (
+            (i, start, end)
+            for i, input_file in enumerate(input_files)
+            for start, end in ([(0, None)] if is_compressed(input_file) else shard_file(input_file, workers))
+        )
+        futures = deque()
+
+        def submit_next() -> None:
+            task = next(tasks, None)
+            if task is not None:
+                i, start, end = task
+                futures.append((i, executor.submit(get_band_keys_of_file, input_files[i], start, end,
+                                                   args.ngram, args.bins, args.bands)))
+
+        for _ in range(2 * workers):
+            submit_next()
+
+        # bucket the documents in order
+        for i, input_file in enumerate(input_files):
+            print(f"\n=== file #{i+1}: {input_file}")
+            duplicates = array("Q")  # sorted line indices
+            line_index = 0
+            while futures and futures[0][0] == i:
+                band_keys = futures.popleft()[1].result()
+                submit_next()
+                for j in range(0, len(band_keys), args.bands):
+                    if index.is_duplicate(band_keys[j:j + args.bands]):
+                        duplicates.append(line_index)
+                    line_index += 1
+            print(f"> applied near-duplicate filter")
+            print(f"  kept    documents: {line_index - len(duplicates)}")
+            print(f"  removed documents: {len(duplicates)}")
+
+            # write new data if needed (the kept documents are copied as they are)
+            if len(duplicates) > 0:
+                os.makedirs(output_directory, exist_ok=True)
+                output_file = join(output_directory,
+                                   strip_jsonl_suffix(input_file.split("/")[-1]) + "_FILTERED" +
+                                   get_jsonl_suffix(input_file))
+                with open_jsonl(input_file, "rb") as _infile, open_jsonl(output_file, "wb") as _outfile:
+                    duplicates_iter = iter(duplicates)
+                    next_duplicate = next(duplicates_iter, None)
+                    for j, line in enumerate(_infile):
+                        if j == next_duplicate:
+                            next_duplicate = next(duplicates_iter, None)
+                        else:
+                            _outfile.write(line)
+                print(f"> wrote {line_index - len(duplicates)} documents to {output_file}")
+            else:
+                print(f"> no need to write a new file")
+
+    te = time.time()
+    print(f"\n> done [time = {te-ts:.1f}s]")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--directory", type=str, required=True)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--ngram", type=int, default=5)
+    parser.add_argument("--bins", type=int, default=128)
+    parser.add_argument("--bands", type=int, default=16)
+    _args = parser.parse_args()
+
+    main(_args)
@@ -2,16 +2,25 @@
 EXECUTION: python script_apply_word_length_filter.py
            --directory <directory>
            [--threshold 20000]
+           [--workers 0]      # nr. of processes, 0 = all cores
 
 PURPOSE: the script
          - takes all the dataset files in <directory>
          - for each dataset file, checks whether a document has a non-whitespace sequence of length > <threshold>
          - if so, it filters those documents and writes the rest to <directory>_FILTERED
+
+         the files are streamed in newline-aligned byte ranges that are filtered in parallel (across files and
+         within a file), such that the memory usage does not depend on the file size.
+         a document is only decoded if its raw line contains a sequence of > <threshold> bytes without a space,
+         the kept documents are written as they are (raw bytes).
 """
 import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from os.path import join, isdir, isfile
-import json
 import argparse
+from typing import Optional, Tuple
 
 from os.path import abspath, dirname
 import sys
@@ -19,6 +28,11 @@ BASE_DIR = abspath(dirname(dirname(dirname(abspath(__file__)))))
 print(f">>> BASE_DIR: {BASE_DIR}")
 sys.path.append(BASE_DIR)
 
+from src.compression import is_jsonl, is_compressed, get_jsonl_suffix, strip_jsonl_suffix, open_jsonl
+from src.concatenation import copy_file
+from src.sampling import shard_file
+from src.text_reader import get_text
+
 
 def main(args):
 
@@ -30,50 +44,106 @@ def main(args):
     input_files = [
         join(input_directory, elem)
         for elem in os.listdir(input_directory)
-        if isfile(join(input_directory, elem)) and "_FILTERED.jsonl" not in elem
+        if isfile(join(input_directory, elem)) and is_jsonl(elem) and "_FILTERED" not in elem
     ]
 
     print()
     print(f"> found {len(input_files)} files in {input_directory}")
 
-    for i, input_file in enumerate(input_files):
-        print(f"\n=== file #{i+1}: {input_file}")
-        output_file = join(output_directory, input_file.split("/")[-1].replace(".jsonl", "_FILTERED.jsonl"))
-
-        # read old data
-        with open(input_file, "r", encoding="utf-8") as _file:
-            data = [json.loads(line) for line in _file]
-        print(f"> loaded {len(data)} documents from {input_file}")
-
-        # new data: apply word length filter
-        new_data = list()
-        counter = {'kept': 0, 'removed': 0}
-        for document in data:
-            longest_word = max([len(elem) for elem in document["text"].split(" ")])
-            if longest_word <= args.threshold:
-                new_data.append(document)
-                counter['kept'] += 1
+    workers = args.workers or os.cpu_count() or 1
+    os.makedirs(output_directory, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=output_directory) as temp_directory, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        # filter all files & byte ranges in parallel, each byte range is written to a separate part file
+        futures = []
+        for i, input_file in enumerate(input_files):
+            ranges = [(0, None)] if is_compressed(input_file) else shard_file(input_file, workers)
+            futures.append([
+                executor.submit(_filter_range,
+                                input_file,
+                                start,
+                                end,
+                                args.threshold,
+                                join(temp_directory, f"{i}_{j}{get_jsonl_suffix(input_file)}"))
+                for j, (start, end) in enumerate(ranges)
+            ])
+
+        for i, (input_file, file_futures) in enumerate(zip(input_files, futures)):
+            print(f"\n=== file #{i+1}: {input_file}")
+            output_file = join(output_directory,
+                               strip_jsonl_suffix(input_file.split("/")[-1]) + "_FILTERED" +
+                               get_jsonl_suffix(input_file))
+            counter = {'kept': 0, 'removed': 0}
+            part_files = []
+            for future in file_futures:
+                part_file, kept, removed = future.result()
+                part_files.append(part_file)
+                counter['kept'] += kept
+                counter['removed'] += removed
+            print(f"> applied filter with threshold = {args.threshold}")
+            print(f"  kept    documents: {counter['kept']}")
+            print(f"  removed documents: {counter['removed']}")
+
+            # write new data if needed (gzip members & zstd frames can be concatenated as well)
+            if counter['removed'] > 0:
+                with open(output_file, "wb") as _file:
+                    for part_file in part_files:
+                        copy_file(part_file, _file)
+                print(f"> wrote {counter['kept']} documents to {output_file}")
+            else:
+                print(f"> no need to write a new file")
+            for part_file in part_files:
+                os.remove(part_file)
+
+    if not os.listdir(output_directory):
+        os.rmdir(output_directory)
+
+
+def _filter_range(input_file: str,
+                  start: int,
+                  end: Optional[int],
+                  threshold: int,
+                  part_file: str) -> Tuple[str, int, int]:
+    """
+    filter the documents in the byte range [start, end) of input_file & write the kept ones to part_file
+
+    Args:
+        input_file: e.g. '<directory>/books_en.jsonl'
+        start: e.g. 0
+        end: e.g. 126, None = end of file
+        threshold: e.g. 20000
+        part_file: e.g. '<directory>_FILTERED/<temp_directory>/0_0.jsonl'
+
+    Returns:
+        part_file: e.g. '<directory>_FILTERED/<temp_directory>/0_0.jsonl'
+        kept: nr. of kept documents, e.g. 2
+        removed: nr. of removed documents, e.g. 1
+    """
+    # a sequence of characters without space is encoded as a (at least as long) sequence of bytes without space
+    pattern_bytes = re.compile(rb"[^ ]{%d}" % (threshold + 1))
+    pattern = re.compile(r"[^ ]{%d}" % (threshold + 1))
+    kept, removed = 0, 0
+    with open_jsonl(input_file, "rb") as _infile, open_jsonl(part_file, "wb") as _outfile:
+        if start > 0:
+            _infile.seek(start)
+        position = start
+        for line in _infile:
+            if end is not None and position >= end:
+                break
+            position += len(line)
+            if pattern_bytes.search(line) is not None and pattern.search(get_text(line)) is not None:
+                removed += 1
             else:
-                counter['removed'] += 1
-        print(f"> applied filter with threshold = {args.threshold}")
-        print(f"  kept    documents: {counter['kept']}")
-        print(f"  removed documents: {counter['removed']}")
-
-        # write new data if needed
-        if counter['removed'] > 0:
-            os.makedirs(output_directory, exist_ok=True)
-            with open(output_file, "w", encoding="utf-8") as _file:
-                for line in new_data:
-                    _file.write(json.dumps(line, ensure_ascii=False) + "\n")
-            print(f"> wrote {len(new_data)} documents to {output_file}")
-        else:
-            print(f"> no need to write a new file")
+                _outfile.write(line)
+                kept += 1
+    return part_file, kept, removed
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--directory", type=str, required=True)
     parser.add_argument("--threshold", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=0)
     _args = parser.parse_args()
 
     main(_args)
@@ -0,0 +1,50 @@
+"""
+EXECUTION: python script_catalog.py
+           --directory <directory>   # e.g. data_original
+           [--workers 0]             # nr. of processes, 0 = all cores
+
+PURPOSE: the script
+         - creates or refreshes the catalog <directory>/CATALOG.json, i.e. scans all dataset files in <directory>
+           that are new or have changed (w.r.t. size & mtime) since the last refresh
+         - writes the line index <file>.lineidx of each scanned (uncompressed) file
+         - prints the documents, bytes & characters of each file
+
+         the catalog is used by script_sampling.py (<data_original>) and script_train.py (<data_train>) if it is up to date.
+         it is only created or refreshed by this script, i.e. sampling & training never scan the data implicitly.
+         if a catalog exists, the dataset files & languages are taken from it, i.e. refresh it after adding or removing files
+"""
+import argparse
+import time
+from os.path import join, isdir
+
+from os.path import abspath, dirname
+import sys
+BASE_DIR = abspath(dirname(dirname(dirname(abspath(__file__)))))
+print(f">>> BASE_DIR: {BASE_DIR}")
+sys.path.append(BASE_DIR)
+
+from src.catalog import Catalog
+
+
+def main(args):
+    directory = join(BASE_DIR, args.directory)
+    assert isdir(directory), f"ERROR! {directory} not found."
+
+    ts = time.time()
+    catalog = Catalog(directory).refresh(workers=args.workers)
+    te = time.time()
+
+    print()
+    print(f"> catalog {catalog.file_path} [time = {te-ts:.1f}s]")
+    for file_name, entry in sorted(catalog.entries.items()):
+        print(f"  {file_name:<40} documents = {entry['documents']:>10}, "
+              f"bytes = {entry['bytes']:>13}, chars = {entry['chars']:>13}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--directory", type=str, required=True)
+    parser.add_argument("--workers", type=int, default=0)
+    _args = parser.parse_args()
+
+    main(_args)
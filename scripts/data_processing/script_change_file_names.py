@@ -5,10 +5,14 @@ EXECUTION: python script_change_file_names.py
            [--add_percent 50]
 
 PURPOSE: the script
-         - removes or adds the suffix '_{percent}p' for all the dataset files in <directory>
+         - removes or adds the suffix '_{percent}p' for all the (possibly compressed) dataset files in <directory>
+
+         other files (e.g. SAMPLING.log) and, if --remove_percent is used, the dataset files of other percents
+         (e.g. written by script_sampling.py --percent 10 20 50) are ignored
 """
 import argparse
 import os
+import re
 from os.path import isfile, isdir, join
 
 from os.path import abspath, dirname
@@ -17,6 +21,8 @@ BASE_DIR = abspath(dirname(dirname(dirname(abspath(__file__)))))
 print(f">>> BASE_DIR: {BASE_DIR}")
 sys.path.append(BASE_DIR)
 
+from src.compression import is_jsonl, get_jsonl_suffix, strip_jsonl_suffix
+
 
 def main(args):
     directory = join(BASE_DIR, args.directory)
@@ -24,16 +30,19 @@ def main(args):
     assert (args.remove_percent and not args.add_percent) or (not args.remove_percent and args.add_percent), \
         f"ERROR! need to EITHER use --remove_percent ({args.remove_percent}) " \
         f"OR specify --add_percent <int> ({args.add_percent})"
-    files = [join(directory, elem) for elem in os.listdir(directory) if isfile(join(directory, elem))]
+    files = [join(directory, elem) for elem in sorted(os.listdir(directory))
+             if isfile(join(directory, elem)) and is_jsonl(elem)]
     for file in files:
+        suffix = get_jsonl_suffix(file)
+        file_stem = strip_jsonl_suffix(file)
+        if args.remove_percent and re.search(r"_\d+p$", file_stem) and not file_stem.endswith(f"_{args.remove_percent}p"):
+            continue
         if args.remove_percent:
-            assert file.endswith(f"_{args.remove_percent}p.jsonl"), \
-                f"ERROR! file = {file} does not end with _{args.remove_percent}p.jsonl"
-            new_file = file.replace(f"_{args.remove_percent}p.jsonl", ".jsonl")
+            assert file_stem.endswith(f"_{args.remove_percent}p"), \
+                f"ERROR! file = {file} does not end with _{args.remove_percent}p{suffix}"
+            new_file = file_stem[:-len(f"_{args.remove_percent}p")] + suffix
         elif args.add_percent:
-            assert file.endswith(f".jsonl"), \
-                f"ERROR! file = {file} does not end with .jsonl"
-            new_file = file.replace(".jsonl", f"_{args.add_percent}p.jsonl")
+            new_file = f"{file_stem}_{args.add_percent}p{suffix}"
         else:
             raise Exception("error.")
         os.rename(file, new_file)
@@ -1,16 +1,28 @@
 """
 EXECUTION: python script_concatenate_data_by_language.py
            --directory <directory>
+           [--workers 0]     # nr. of languages that are concatenated in parallel, 0 = one per language
+           [--manifest 0]    # 1 = write a virtual concatenation (all_<language>.manifest.json) instead of copying
 
 PURPOSE: the script
          - takes all the dataset files in <directory>
          - merges them by language
          - writes the results to <directory>_CONCATENATED_BY_LANGUAGE
+
+         compressed dataset files (.jsonl.gz, .jsonl.zst) are supported. if all files of a language
+         have the same suffix, they are concatenated as they are (gzip members & zstd frames can be concatenated),
+         otherwise they are decompressed and written to all_<language>.jsonl
+
+         the files are copied in binary mode without going through user space if possible (os.copy_file_range / os.sendfile).
+         with --manifest 1, no data is copied. instead, all_<language>.manifest.json lists the (file, offset, length) ranges
+         that make up the concatenation, which can be read e.g. by evaluate()
 """
 import os
+from concurrent.futures import ThreadPoolExecutor
 from os.path import join, isdir, isfile
 import argparse
 import shutil
+from typing import List
 
 from os.path import abspath, dirname
 import sys
@@ -18,8 +30,11 @@ BASE_DIR = abspath(dirname(dirname(dirname(abspath(__file__)))))
 print(f">>> BASE_DIR: {BASE_DIR}")
 sys.path.append(BASE_DIR)
 
+from src.compression import is_jsonl, get_jsonl_suffix, strip_jsonl_suffix, open_jsonl, JSONL_SUFFIXES, BUFFER_SIZE
+from src.concatenation import copy_file, write_manifest, MANIFEST_SUFFIX
+
 
-def concatenate_data_by_language(directory, inplace=True):
+def concatenate_data_by_language(directory, inplace=True, workers=0, manifest=False):
 
     input_directory = join(BASE_DIR, directory)
     output_directory = input_directory if inplace else join(BASE_DIR, f"{input_directory}_CONCATENATED_BY_LANGUAGE")
@@ -30,21 +45,21 @@ def concatenate_data_by_language(directory, inplace=True):
         join(input_directory, elem)
         for elem in os.listdir(input_directory)
         if isfile(join(input_directory, elem))
-        and "_CONCATENATED_BY_LANGUAGE.jsonl" not in elem
+        and "_CONCATENATED_BY_LANGUAGE" not in elem
         and "all_" not in elem
-        and elem.endswith(".jsonl")
+        and is_jsonl(elem)
     ]
 
     print()
     print(f"> found {len(input_files_all)} files")
 
     languages = list(set([
-        input_file.split("_")[-1].split(".")[0]
+        strip_jsonl_suffix(input_file).split("_")[-1]
         for input_file in input_files_all
     ]))
 
     input_files_by_language = {
-        lang: [input_file for input_file in input_files_all if f"_{lang}" in input_file.split("/")[-1]]
+        lang: [input_file for input_file in input_files_all if strip_jsonl_suffix(input_file).endswith(f"_{lang}")]
         for lang in languages
     }
     for lang, input_files in input_files_by_language.items():
@@ -54,20 +69,57 @@ def concatenate_data_by_language(directory, inplace=True):
     if inplace is False:
         os.makedirs(output_directory, exist_ok=False)
     print()
-    for lang, input_files in input_files_by_language.items():
-        output_file = join(output_directory, f"all_{lang}.jsonl")
-
-        with open(output_file, 'w') as wfd:
-            for f in input_files:
-                with open(f, 'r') as fd:
-                    shutil.copyfileobj(fd, wfd)
-
-        print(f"> wrote {len(input_files)} files to {output_file}")
+    # one worker per language, the copying itself mostly happens in the kernel
+    max_workers = min(workers or len(input_files_by_language), len(input_files_by_language)) or 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        output_files = executor.map(
+            lambda item: _concatenate_language(output_directory, item[0], sorted(item[1]), manifest),
+            input_files_by_language.items(),
+        )
+        for (lang, input_files), output_file in zip(input_files_by_language.items(), output_files):
+            print(f"> wrote {len(input_files)} files to {output_file}")
+
+
+def _concatenate_language(output_directory: str, lang: str, input_files: List[str], manifest: bool) -> str:
+    """
+    Args:
+        output_directory: e.g. '<data_eval>'
+        lang: e.g. 'en'
+        input_files: e.g. ['<data_eval>/articles_en.jsonl', '<data_eval>/books_en.jsonl']
+        manifest: if True, a virtual concatenation is written
+
+    Returns:
+        output_file: e.g. '<data_eval>/all_en.jsonl' or '<data_eval>/all_en.manifest.json'
+    """
+    suffixes = set(get_jsonl_suffix(input_file) for input_file in input_files)
+    if manifest:
+        suffix = MANIFEST_SUFFIX
+    else:
+        suffix = suffixes.pop() if len(suffixes) == 1 else ".jsonl"
+    output_file = join(output_directory, f"all_{lang}{suffix}")
+    for _suffix in list(JSONL_SUFFIXES) + [MANIFEST_SUFFIX]:
+        if _suffix != suffix and isfile(join(output_directory, f"all_{lang}{_suffix}")):
+            os.remove(join(output_directory, f"all_{lang}{_suffix}"))
+
+    if manifest:
+        return write_manifest(output_file, input_files)
+
+    with open(output_file, 'wb') as wfd:
+        for f in input_files:
+            if get_jsonl_suffix(f) == suffix:
+                copy_file(f, wfd)
+            else:
+                with open_jsonl(f, 'rb') as fd:
+                    shutil.copyfileobj(fd, wfd, BUFFER_SIZE)
+    return output_file
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--directory", type=str, required=True)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--manifest", type=int, default=0)
     _args = parser.parse_args()
 
-    concatenate_data_by_language(directory=_args.directory, inplace=False)
+    concatenate_data_by_language(directory=_args.directory, inplace=False, workers=_args.workers,
+                                 manifest=bool(_args.manifest))
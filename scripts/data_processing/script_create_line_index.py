@@ -0,0 +1,50 @@
+"""
+EXECUTION: python script_create_line_index.py
+
+PURPOSE: for each combination of <category> & <language> (as specified in SAMPLING_WEIGHTS.csv), the script
+         - creates (or refreshes) the line index of <data_original>/<category>_<language>.jsonl
+         - writes it to the sidecar file <data_original>/<category>_<language>.jsonl.lineidx
+
+         the line index contains the byte offsets of all documents,
+         which allows script_sampling.py to read only the sampled documents.
+         if an original file was only appended to, only the appended part is scanned.
+         compressed original files (.jsonl.gz, .jsonl.zst) are skipped, as they cannot be read at an offset.
+"""
+import time
+from os.path import isfile
+
+from os.path import abspath, dirname
+import sys
+BASE_DIR = abspath(dirname(dirname(dirname(abspath(__file__)))))
+print(f">>> BASE_DIR: {BASE_DIR}")
+sys.path.append(BASE_DIR)
+
+from src.env import Env
+from src.line_index import get_line_index
+from src.compression import is_compressed
+
+
+def main():
+    env = Env()
+    categories, languages, sampling_weights, _ = env.read_sampling_weights(verbose=env.verbose)
+
+    for category in categories:
+        for language in languages:
+            if sampling_weights[category][language] > 0:
+                file_path_original = env.get_file_path(category, language, kind="data_original")
+                assert isfile(file_path_original), \
+                    f"ERROR! file for category = {category}, language = {language} does not exist at {file_path_original}"
+
+                if is_compressed(file_path_original):
+                    print(f"> {file_path_original}: compressed, skipped")
+                    continue
+
+                ts = time.time()
+                line_index = get_line_index(file_path_original)
+                te = time.time()
+                print(f"> {file_path_original}: {line_index.number_of_documents} documents, "
+                      f"{line_index.file_size/float(10**6):.1f} MB [time = {te-ts:.1f}s]")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,12 @@ EXECUTION: python script_split_data.py
            --max_sentence_length 10000
 
 PURPOSE: the script
-         - loads the data in <data_train>/<dataset_file>
-         - splits the documents such that they contain <max_sentence_length> characters
-         - writes the split data to new file *_max<max_sentence_length>.json
+         - streams the data in <data_train>/<dataset_file>
+         - splits the documents into chunks of at most <max_sentence_length> characters,
+           at sentence boundaries or whitespace if possible (see src.splitting.split_text)
+         - writes the split data to new file *_max<max_sentence_length>.jsonl
+
+         note that the split is also applied on the fly when training a tokenizer with SentencePiece
 """
 from os.path import join
 import json
@@ -19,6 +22,9 @@ print(f">>> BASE_DIR: {BASE_DIR}")
 sys.path.append(BASE_DIR)
 
 from src.env import Env
+from src.compression import open_jsonl, get_jsonl_suffix, strip_jsonl_suffix
+from src.splitting import split_text
+from src.text_reader import get_texts
 
 
 def main(_args):
@@ -26,28 +32,31 @@ def main(_args):
 
     max_sentence_length = _args.max_sentence_length
     original_path = join(env.data_train, _args.dataset_file)
-    new_path = original_path.replace(".jsonl", f"_max{max_sentence_length}.jsonl")
-
-    print("\n=== ORIGINAL DATA ===")
-    with open(original_path, "r", encoding="utf-8") as file:
-        _data = [json.loads(line)["text"] for line in file]
+    new_path = strip_jsonl_suffix(original_path) + f"_max{max_sentence_length}" + get_jsonl_suffix(original_path)
 
-    _lenghts = [len(elem) for elem in _data]
-    print(f"{len(_lenghts)} docs, min/max/total characters = {min(_lenghts)}/{max(_lenghts)}/{sum(_lenghts)}")
+    statistics = {
+        "original": {"docs": 0, "min": None, "max": 0, "total": 0},
+        "new": {"docs": 0, "min": None, "max": 0, "total": 0},
+    }
+    with open_jsonl(original_path, "rb") as infile, open_jsonl(new_path, "w") as outfile:
+        for text in get_texts(infile):
+            _update(statistics["original"], len(text))
+            for chunk in split_text(text, max_sentence_length):
+                _update(statistics["new"], len(chunk))
+                outfile.write(json.dumps({"text": chunk}) + "\n")
 
-    print("\n=== NEW DATA ===")
-    _data_new = list()
-    for elem in _data:
-        for i in range(int(len(elem)/max_sentence_length) + 1):
-            chunk = elem[i*max_sentence_length: (i+1)*max_sentence_length]
-            _data_new.append(chunk)
+    for name, _statistics in [("ORIGINAL DATA", statistics["original"]), ("NEW DATA", statistics["new"])]:
+        print(f"\n=== {name} ===")
+        print(f"{_statistics['docs']} docs, min/max/total characters = "
+              f"{_statistics['min']}/{_statistics['max']}/{_statistics['total']}")
+    print(f"\n> wrote split data to {new_path}")
 
-    _lenghts = [len(elem) for elem in _data_new]
-    print(f"{len(_lenghts)} docs, min/max/total characters = {min(_lenghts)}/{max(_lenghts)}/{sum(_lenghts)}")
 
-    with open(new_path, "w", encoding="utf-8") as file:
-        for elem in _data_new:
-            file.write(json.dumps({"text": elem}) + "\n")
+def _update(_statistics, length):
+    _statistics["docs"] += 1
+    _statistics["min"] = length if _statistics["min"] is None else min(_statistics["min"], length)
+    _statistics["max"] = max(_statistics["max"], length)
+    _statistics["total"] += length
 
 
 if __name__ == "__main__":
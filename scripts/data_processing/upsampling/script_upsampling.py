@@ -4,21 +4,54 @@ EXECUTION: python script_upsampling.py
            --alpha 0.8
            [--stats_file file-stats.json]
            [--total_file file-total.json]
+           [--unit char]      # char, utf8bytes or words
+           [--seed 42]
+           [--languages None] # e.g. is da no sv en (other languages are grouped as "other"), None = all languages
+           [--workers 0]      # nr. of processes, 0 = all cores
 
+- analyze the data files in parallel (across files & byte ranges) and cache the statistics of each file in <stats_file>,
+  such that only new or changed files (w.r.t. size, mtime & hash) are analyzed again
 - upsample data in _data_files using alpha parameter
 - write upsampling factors to "file-upsampled.json"
+- write the upsampled data of each language to "file-total_upsampled_a<alpha>_<lang>.jsonl".
+  each data file is read once, in parallel across files & byte ranges (compressed files are read by one worker),
+  and split into per-language part files, which are concatenated per language in the order of the data.
+  each kept document is written int(f) times and once more with probability f - int(f), where f is the
+  upsampling factor of its language (w.r.t. <unit>). the bernoulli trial of a document is seeded with its
+  position in its file, i.e. the output does not depend on the nr. of workers.
+  the documents are streamed, i.e. the memory usage does not depend on the size of the data.
 """
 import argparse
-from typing import List, Dict
-from os.path import isfile
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, List, Dict, Optional, Tuple
 import json
 
+from os.path import abspath, dirname, join
+import sys
+BASE_DIR = abspath(dirname(dirname(dirname(dirname(abspath(__file__))))))
+print(f">>> BASE_DIR: {BASE_DIR}")
+sys.path.append(BASE_DIR)
 
-def analyze_data(_data_files: List[str]) -> Dict[str, Dict[str, int]]:
+from src.compression import is_compressed, open_jsonl
+from src.concatenation import copy_file
+from src.corpus_stats import get_corpus_stats, group_languages
+from src.sampling import shard_file
+
+
+def analyze_data(_data_files: List[str],
+                 _stats_file: Optional[str] = None,
+                 _languages: Optional[List[str]] = None,
+                 _workers: int = 0) -> Dict[str, Dict[str, int]]:
     """
 
     Args:
         _data_files: e.g. ["file-is.json", "file-sv.json", ..]
+        _stats_file: e.g. "file-stats.json", cache for the statistics of each file
+        _languages: e.g. ["is", "da", "no", "sv", "en"], None = all languages
+        _workers: e.g. 0 = all cores
 
     Returns:
         _stats: e.g. {
@@ -34,31 +67,8 @@ def analyze_data(_data_files: List[str]) -> Dict[str, Dict[str, int]]:
             'words': {..},
         }
     """
-    lang = ["is", "da", "no", "sv", "en"]
-    _stats = {
-        "char": {lg: 0 for lg in lang},
-        "utf8bytes": {lg: 0 for lg in lang},
-        "words": {lg: 0 for lg in lang},
-    }
-
-    for k in _stats.keys():
-        _stats[k]["other"] = 0
-
-    for _data_file in _data_files:
-        with open(_data_file, 'r') as json_file:
-            json_list = list(json_file)
-
-        for json_str in json_list:
-            result = json.loads(json_str)
-            if result["keep"] == 1:
-                _lang = result["lang"]
-                if _lang not in lang:
-                    _lang = "other"
-                _stats["char"][_lang] += result["len_char"]
-                _stats["utf8bytes"][_lang] += result["len_utf8bytes"]
-                _stats["words"][_lang] += result["len_words"]
-
-    return _stats
+    _stats = get_corpus_stats(_data_files, _stats_file, _workers)
+    return group_languages(_stats, _languages)
 
 
 def compute_upsampling_need(_stats: Dict[str, Dict[str, int]], alpha: float) -> Dict[str, Dict[str, int]]:
@@ -97,8 +107,9 @@ def compute_upsampling_need(_stats: Dict[str, Dict[str, int]], alpha: float) ->
 
     def compute_upscaled_f(_p_dict: Dict[str, float], _alpha: float) -> Dict[str, float]:
 
-        # sort such that highest value is at last position
-        _p_dict = {k: v for k, v in sorted(_p_dict.items(), key=lambda x: x[1])}
+        # sort such that highest value is at last position (languages without data are not upsampled)
+        _p_dict_all = _p_dict
+        _p_dict = {k: v for k, v in sorted(_p_dict.items(), key=lambda x: x[1]) if v > 0}
 
         _keys = list(_p_dict.keys())
         _p = list(_p_dict.values())
@@ -113,7 +124,9 @@ def compute_upsampling_need(_stats: Dict[str, Dict[str, int]], alpha: float) ->
         # like in notebook - end
 
         upscaled_f_dict = {k: v for k, v in zip(_keys, upscaled_f)}
-        upscaled_f_dict["other"] = 1.0
+        for k in _p_dict_all.keys():
+            if k == "other" or k not in upscaled_f_dict:
+                upscaled_f_dict[k] = 1.0
 
         return upscaled_f_dict
 
@@ -134,48 +147,119 @@ def compute_upsampling_need(_stats: Dict[str, Dict[str, int]], alpha: float) ->
     return _upsampling_need
 
 
-def upsample_data(_lang: str,
-                  _alpha: float,
-                  _data_files: List[str],
-                  _upsampling_need: int,
-                  _stats: int,
-                  _total_file: str):
+def get_total_file_lang(_total_file: str, _alpha: float, _lang: str) -> str:
     """
-    writes upsampled data for lang to _total_file with special lang suffix
 
     Args:
-        _lang: e.g. "is"
+        _total_file: e.g. "file-total.json" or "file-total.jsonl"
         _alpha: e.g. 0.8
-        _data_files: e.g. ["file-is.json", "file-sv.json", ..]
-        _upsampling_need: e.g. 111627017
-        _stats: e.g. 53560978
-        _total_file: e.g.
-    """
-    _total_file_lang = _total_file.replace(".jsonl", f"_upsampled_a{_alpha}_{_lang}.jsonl")
-
-    _data_lang = list()
-    for _data_file in _data_files:
-        with open(_data_file, 'r') as json_file:
-            json_list = list(json_file)
-
-        for json_str in json_list:
-            result = json.loads(json_str)
-            if result["keep"] == 1:
-                print(result)
-                _lang_found = result["lang"]
-                if _lang_found == _lang:
-                    _data_lang.append(result)
-                break
+        _lang: e.g. "is"
 
-    _upsampled_data = _data_lang[0]  # TODO
-    with open(_total_file_lang, "w", encoding="utf-8") as f:
-        for _line in _upsampled_data:
-            f.write(json.dumps(_line))
+    Returns:
+        _total_file_lang: e.g. "file-total_upsampled_a0.8_is.jsonl"
+    """
+    return f"{os.path.splitext(_total_file)[0]}_upsampled_a{_alpha}_{_lang}.jsonl"
+
+
+def upsample_data(_data_file: str,
+                  _file_index: int,
+                  _factors: Dict[str, float],
+                  _part_directory: str,
+                  _unit: str = "char",
+                  _seed: int = 42,
+                  _languages: Optional[List[str]] = None,
+                  _start: int = 0,
+                  _end: Optional[int] = None) -> Tuple[Dict[str, str], Dict[str, Dict[str, int]]]:
+    """
+    reads the byte range [_start, _end) of _data_file once & writes its upsampled data to one part file per language
 
-    print(f"> wrote upsampled data file {_total_file_lang}")
+    Args:
+        _data_file: e.g. "file-is.json"
+        _file_index: e.g. 0, index of _data_file in the data files (used for the random seed)
+        _factors: e.g. {"is": 3.08, "sv": 1.0}, upsampling factor of each language (w.r.t. _unit)
+        _part_directory: e.g. "<temp_directory>"
+        _unit: e.g. "char"
+        _seed: e.g. 42
+        _languages: e.g. ["is", "da", "no", "sv", "en"], None = all languages
+        _start: e.g. 0, only 0 for compressed files
+        _end: e.g. 126, None = end of file
 
+    Returns:
+        _part_files: e.g. {"is": "<temp_directory>/0_0_is.jsonl", ..}
+        _counters: e.g. {"is": {'documents': 1200, 'documents_upsampled': 3700, 'upsampled': 165190024}, ..}
+    """
+    _unit_field = f"len_{_unit}"
+    _part_files: Dict[str, str] = {}
+    _counters: Dict[str, Dict[str, int]] = {}
+    _outfiles: Dict[str, BinaryIO] = {}
+    try:
+        with open_jsonl(_data_file, "rb") as json_file:
+            if _start > 0:
+                json_file.seek(_start)
+            _position = _start
+            for json_bytes in json_file:
+                if _end is not None and _position >= _end:
+                    break
+                _document_position = _position
+                _position += len(json_bytes)
+                result = json.loads(json_bytes)
+                if result.get("keep", 1) != 1:
+                    continue
+                _lang = result["lang"] if _languages is None or result["lang"] in _languages else "other"
+                if _lang not in _factors:
+                    continue
+                if _lang not in _outfiles:
+                    _part_files[_lang] = join(_part_directory, f"{_file_index}_{_start}_{_lang}.jsonl")
+                    _outfiles[_lang] = open(_part_files[_lang], "wb")
+                    _counters[_lang] = {"documents": 0, "documents_upsampled": 0, "upsampled": 0}
+
+                # upsampling factor f = int(f) + fraction, the fraction is realized with a bernoulli trial per document
+                _factor = _factors[_lang]
+                _number = int(_factor) + (_get_uniform(_seed, _file_index, _document_position) < _factor - int(_factor))
+                if not json_bytes.endswith(b"\n"):
+                    json_bytes += b"\n"
+                _outfiles[_lang].write(json_bytes * _number)
+                _counters[_lang]["documents"] += 1
+                _counters[_lang]["documents_upsampled"] += _number
+                _counters[_lang]["upsampled"] += _number * (result[_unit_field] if _unit_field in result else
+                                                            _get_length(result["text"], _unit))
+    finally:
+        for _outfile in _outfiles.values():
+            _outfile.close()
+
+    return _part_files, _counters
+
+
+def _get_uniform(seed: int, file_index: int, position: int) -> float:
+    """
+    Args:
+        seed: e.g. 42
+        file_index: e.g. 0
+        position: e.g. 126, byte position of the document in the (decompressed) file
 
-def upsampling(_data_files: List[str], _stats_file: str, _total_file: str, alpha: float):
+    Returns:
+        uniform: random number in [0, 1) that only depends on the arguments, e.g. 0.37
+    """
+    digest = hashlib.blake2b(f"{seed}_{file_index}_{position}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") / 2 ** 64
+
+
+def _get_length(text: str, unit: str) -> int:
+    if unit == "char":
+        return len(text)
+    elif unit == "utf8bytes":
+        return len(text.encode("utf-8"))
+    return len(text.split())
+
+
+def upsampling(_data_files: List[str],
+               _stats_file: str,
+               _total_file: str,
+               alpha: float,
+               unit: str = "char",
+               seed: int = 42,
+               languages: Optional[List[str]] = None,
+               workers: int = 0):
     """
     Upsamples data in _data_files using alpha parameter
 
@@ -184,27 +268,18 @@ def upsampling(_data_files: List[str], _stats_file: str, _total_file: str, alpha
         _stats_file: e.g. "file-stats.json"
         _total_file: e.g. "file-total.json"
         alpha: e.g. 0.8
+        unit: e.g. "char"
+        seed: e.g. 42
+        languages: e.g. ["is", "da", "no", "sv", "en"], None = all languages
+        workers: e.g. 0 = all cores
 
     Returns:
         _upsampled_data_file: e.g. "file-upsampled.json"
     """
-    # 1. analyze _data_files
+    # 1. analyze _data_files (only new or changed files, the others are read from the stats file)
     print()
-    if not isfile(_stats_file):
-        print(f"> stats file {_stats_file} does not exist")
-        # compute stats
-        print(_data_files)
-        stats = analyze_data(_data_files)
-
-        # save stats
-        with open(_stats_file, "w", encoding="utf-8") as f:
-            f.write(json.dumps(stats))
-        print(f"> wrote stats file {_stats_file}")
-    else:
-        # load stats
-        with open(_stats_file, "r", encoding="utf-8") as f:
-            stats = json.load(f)
-        print(f"> read stats file {_stats_file}")
+    stats = analyze_data(_data_files, _stats_file, languages, workers)
+    print(f"> stats file {_stats_file} is up to date")
 
     for k, v in stats.items():
         print(k, v)
@@ -216,9 +291,48 @@ def upsampling(_data_files: List[str], _stats_file: str, _total_file: str, alpha
     for k, v in upsampling_need.items():
         print(k, v)
 
+    # 2. upsample data: each data file is read once (in parallel across files & byte ranges) and split into
+    #    one part file per language, the part files are then concatenated per language in the order of the data
+    print()
+    print(f"> upsample data (alpha={alpha}, unit={unit}):")
+    data_languages = [_lang for _lang, _stats in stats[unit].items() if _stats > 0]
+    _factors = {_lang: 1.0 + upsampling_need[unit][_lang] / stats[unit][_lang] for _lang in data_languages}
+    _workers = workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory(dir=dirname(abspath(_total_file))) as temp_directory, \
+            ProcessPoolExecutor(max_workers=_workers) as executor:
+        futures = [
+            executor.submit(upsample_data,
+                            _data_file,
+                            i,
+                            _factors,
+                            temp_directory,
+                            unit,
+                            seed,
+                            languages,
+                            _start,
+                            _end)
+            for i, _data_file in enumerate(_data_files)
+            for _start, _end in ([(0, None)] if is_compressed(_data_file) else shard_file(_data_file, _workers))
+        ]
+        results = [future.result() for future in futures]
+
+        for _lang in data_languages:
+            _total_file_lang = get_total_file_lang(_total_file, alpha, _lang)
+            _counter = {"documents": 0, "documents_upsampled": 0, "upsampled": 0}
+            with open(_total_file_lang, "wb") as f:
+                for _part_files, _counters in results:
+                    if _lang in _part_files:
+                        copy_file(_part_files[_lang], f)
+                        for k in _counter.keys():
+                            _counter[k] += _counters[_lang][k]
+            print(f"> wrote upsampled data file {_total_file_lang}: "
+                  f"{_counter['documents']} -> {_counter['documents_upsampled']} documents, "
+                  f"{unit} = {_counter['upsampled']} (target = {int(_factors[_lang] * stats[unit][_lang])})")
+
 
 def main(args):
-    upsampling(args.dataset_files, args.stats, args.total, args.alpha)
+    upsampling(args.dataset_files, args.stats, args.total, args.alpha, args.unit, args.seed, args.languages,
+               args.workers)
 
 
 if __name__ == "__main__":
@@ -227,6 +341,10 @@ if __name__ == "__main__":
     parser.add_argument("--alpha", type=float, default=1.0)
     parser.add_argument("--stats", type=str, default="stats.json")
     parser.add_argument("--total", type=str, default="total.json")
+    parser.add_argument("--unit", type=str, default="char", choices=["char", "utf8bytes", "words"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--languages", nargs='+', type=str, default=None)
+    parser.add_argument("--workers", type=int, default=0)
     _args = parser.parse_args()
 
     main(_args)
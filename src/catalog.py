@@ -0,0 +1,238 @@
+"""Module that contains the Catalog class that keeps the facts (size, documents, characters, ..) of the dataset files"""
+import hashlib
+import json
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from os.path import basename, isfile, join
+from typing import Any, Dict, List, Optional
+
+from src.compression import is_compressed, is_jsonl, open_jsonl, strip_jsonl_suffix
+from src.line_index import LineIndex, get_file_hashes
+from src.text_reader import get_text
+
+CATALOG_FILE = "CATALOG.json"
+CATALOG_VERSION = 1
+
+
+def get_category_language(file_name: str) -> Dict[str, str]:
+    """
+    Args:
+        file_name: e.g. 'web_crawl_en.jsonl.gz'
+
+    Returns:
+        category_language: e.g. {'category': 'web_crawl', 'language': 'en'}
+    """
+    name = strip_jsonl_suffix(basename(file_name))
+    category, _, language = name.rpartition("_")
+    return {"category": category, "language": language}
+
+
+def scan_file(file_path: str) -> Dict[str, Any]:
+    """
+    scan file_path once (e.g. in a worker process) to get its catalog entry.
+    the line index <file_path>.lineidx is written as well (if the file is not compressed).
+
+    Args:
+        file_path: e.g. '<data_original>/books_en.jsonl'
+
+    Returns:
+        entry: e.g. {
+            'file_size': 126, 'mtime_ns': 1685000000000000000,  # to detect changes
+            'documents': 3, 'bytes': 126, 'chars': 87,             # bytes = decompressed size, chars = of the texts
+            'category': 'books', 'language': 'en',
+            'checksum': '3b5d..',                                  # blake2b of the (decompressed) data
+            'line_index': True,                                    # <file_path>.lineidx is up to date
+        }
+    """
+    stat = os.stat(file_path)
+    compressed = is_compressed(file_path)
+    hasher = hashlib.blake2b(digest_size=16)
+    ends = array("Q")
+    position, chars = 0, 0
+    with open_jsonl(file_path, "rb") as infile:
+        for line in infile:
+            position += len(line)
+            ends.append(position)
+            hasher.update(line)
+            if line.strip():
+                chars += len(get_text(line, default=""))
+
+    if not compressed:
+        head_hash, tail_hash = get_file_hashes(file_path, stat.st_size)
+        LineIndex(
+            file_path, ends, stat.st_size, stat.st_mtime_ns, head_hash, tail_hash
+        ).write()
+    return {
+        "file_size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "documents": len(ends),
+        "bytes": position,
+        "chars": chars,
+        **get_category_language(file_path),
+        "checksum": hasher.hexdigest(),
+        "line_index": not compressed,
+    }
+
+
+class Catalog:
+    """Class used to keep the facts of all dataset files in a directory in <directory>/CATALOG.json
+
+    the catalog is refreshed incrementally, i.e. only new files or files whose size or mtime have changed are scanned.
+    refresh() is only called explicitly (e.g. by script_catalog.py), all other methods are read-only
+    and do not scan any files.
+
+    if the catalog exists, the file names, paths, sizes & languages are answered from its entries without
+    listing or stat-ing the directory, i.e. they reflect the directory at the last refresh.
+    only get_entry() stats the file, as its facts (documents, line index, ..) are used as if read from the file.
+    without a catalog, the directory is listed instead.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: e.g. '<data_train>'
+        """
+        self.directory = directory
+        self.file_path = join(directory, CATALOG_FILE)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.exists = False
+        if isfile(self.file_path):
+            with open(self.file_path, "r", encoding="utf-8") as file:
+                content = json.load(file)
+            # catalogs with a different version are rebuilt
+            if content.get("version") == CATALOG_VERSION:
+                self.entries = content["files"]
+                self.exists = True
+
+    def refresh(self, workers: int = 0) -> "Catalog":
+        """
+        scan new & changed files (in parallel), drop removed files & write the catalog if anything changed
+
+        Args:
+            workers: nr. of processes, 0 = all cores
+
+        Returns:
+            catalog: self
+        """
+        file_names = self._list_directory()
+        stale = [
+            file_name for file_name in file_names if self.get_entry(file_name) is None
+        ]
+        removed = [
+            file_name for file_name in self.entries if file_name not in file_names
+        ]
+        for file_name in removed:
+            self.entries.pop(file_name)
+
+        file_paths = [join(self.directory, file_name) for file_name in stale]
+        workers = min(workers or os.cpu_count() or 1, len(file_paths))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                entries = list(executor.map(scan_file, file_paths))
+        else:
+            entries = [scan_file(file_path) for file_path in file_paths]
+        self.entries.update(zip(stale, entries))
+
+        if stale or removed:
+            self.write()
+        return self
+
+    def get_entry(self, file_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Args:
+            file_name: e.g. 'books_en.jsonl'
+
+        Returns:
+            entry: see scan_file, None if the file is not in the catalog or has changed since it was scanned
+                   (validated by a stat of the file, as the entry is used in place of reading the file)
+        """
+        entry = self.entries.get(file_name)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(join(self.directory, file_name))
+        except FileNotFoundError:
+            return None
+        if stat.st_size != entry["file_size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+            return None
+        return entry
+
+    def _list_directory(self) -> List[str]:
+        """
+        Returns:
+            file_names: dataset files currently in the directory (whether they are in the catalog or not),
+                        e.g. ['articles_en.jsonl', 'books_en.jsonl.gz']
+        """
+        return sorted(
+            file_name
+            for file_name in os.listdir(self.directory)
+            if is_jsonl(file_name) and isfile(join(self.directory, file_name))
+        )
+
+    def get_file_names(self) -> List[str]:
+        """
+        Returns:
+            file_names: dataset files in the catalog (at the last refresh, the directory is not listed),
+                        or in the directory if there is no catalog, e.g. ['articles_en.jsonl', 'books_en.jsonl.gz']
+        """
+        if self.exists:
+            return sorted(self.entries)
+        return self._list_directory()
+
+    def get_file_size(self, file_name: str) -> int:
+        """
+        Args:
+            file_name: e.g. 'books_en.jsonl'
+
+        Returns:
+            file_size: from the catalog (at the last refresh, the file is not stat-ed),
+                       else from os.path.getsize, e.g. 126
+        """
+        entry = self.entries.get(file_name)
+        if entry is None:
+            return os.path.getsize(join(self.directory, file_name))
+        return entry["file_size"]
+
+    def get_file_paths(self, dataset_filter: str = "all") -> List[str]:
+        """
+        Args:
+            dataset_filter: substring of the file names, e.g. '_en', 'all' = no filter
+
+        Returns:
+            file_paths: see get_file_names, e.g. ['<data_train>/articles_en.jsonl', '<data_train>/books_en.jsonl.gz']
+        """
+        return [
+            join(self.directory, file_name)
+            for file_name in self.get_file_names()
+            if not dataset_filter
+            or dataset_filter == "all"
+            or dataset_filter in file_name
+        ]
+
+    def get_languages(self) -> List[str]:
+        """
+        Returns:
+            languages: see get_file_names, e.g. ['en', 'sv']
+        """
+        if self.exists:
+            return sorted({entry["language"] for entry in self.entries.values()})
+        return sorted(
+            {
+                get_category_language(file_name)["language"]
+                for file_name in self._list_directory()
+            }
+        )
+
+    def write(self) -> None:
+        """write catalog to <directory>/CATALOG.json"""
+        file_path_tmp = self.file_path + ".tmp"
+        with open(file_path_tmp, "w", encoding="utf-8") as file:
+            json.dump(
+                {"version": CATALOG_VERSION, "files": self.entries},
+                file,
+                indent=2,
+                sort_keys=True,
+            )
+        os.replace(file_path_tmp, self.file_path)
+        self.exists = True
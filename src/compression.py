@@ -0,0 +1,275 @@
+"""Module that contains functions to read and write (compressed) jsonl files, auto-detected by file suffix"""
+import gzip
+import io
+import os
+import shutil
+import subprocess
+from os.path import basename
+from typing import IO, List, Optional
+
+JSONL_SUFFIXES = (".jsonl", ".jsonl.gz", ".jsonl.zst")
+COMPRESSIONS = {
+    "none": ".jsonl",
+    "gz": ".jsonl.gz",
+    "zst": ".jsonl.zst",
+}
+COMPRESSION_LEVELS = {
+    ".jsonl.gz": 6,
+    ".jsonl.zst": 3,
+}
+BUFFER_SIZE = 2**20  # 1 MiB
+
+try:
+    import zstandard  # optional, otherwise the zstd command line tool is used
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+def get_jsonl_suffix(file_name: str) -> Optional[str]:
+    """
+    Args:
+        file_name: e.g. 'books_en.jsonl.gz'
+
+    Returns:
+        suffix: e.g. '.jsonl.gz', None if file_name is not a (compressed) jsonl file
+    """
+    for suffix in sorted(JSONL_SUFFIXES, key=len, reverse=True):
+        if file_name.endswith(suffix):
+            return suffix
+    return None
+
+
+def is_jsonl(file_name: str) -> bool:
+    """
+    Args:
+        file_name: e.g. 'books_en.jsonl.gz'
+
+    Returns:
+        is_jsonl: True if file_name is a (compressed) jsonl file, e.g. True
+    """
+    return get_jsonl_suffix(file_name) is not None
+
+
+def is_compressed(file_name: str) -> bool:
+    """
+    Args:
+        file_name: e.g. 'books_en.jsonl.gz'
+
+    Returns:
+        is_compressed: e.g. True
+    """
+    return get_jsonl_suffix(file_name) not in [None, ".jsonl"]
+
+
+def strip_jsonl_suffix(file_name: str) -> str:
+    """
+    Args:
+        file_name: e.g. 'books_en.jsonl.gz'
+
+    Returns:
+        file_name without suffix, e.g. 'books_en'
+    """
+    suffix = get_jsonl_suffix(file_name)
+    assert suffix is not None, f"ERROR! file = {file_name} is not a jsonl file."
+    return file_name[: -len(suffix)]
+
+
+def open_jsonl(file_path: str, mode: str = "rb", threads: int = 0) -> IO:
+    """
+    open a (compressed) jsonl file for streaming, the compression is determined by the file suffix.
+    (de)compression of .gz (using pigz, if available) and .zst (using the zstd command line tool
+    if the zstandard package is not installed) runs in a separate process, i.e. in parallel to the caller.
+    files opened for reading may not be seekable (apart from skipping forward), but tell() returns the
+    position in the decompressed data.
+
+    Args:
+        file_path: e.g. '<data_original>/books_en.jsonl.zst'
+        mode: 'rb', 'r', 'wb' or 'w'
+        threads: nr. of compression threads, 0 = all cores
+
+    Returns:
+        file: file object (text mode if mode is 'r' or 'w')
+    """
+    assert mode in [
+        "rb",
+        "r",
+        "wb",
+        "w",
+    ], f"ERROR! mode = {mode} should be rb, r, wb or w."
+    suffix = get_jsonl_suffix(basename(file_path))
+    binary_mode = mode[0] + "b"
+    threads = threads or os.cpu_count() or 1
+
+    if suffix == ".jsonl.gz":
+        if shutil.which("pigz"):
+            file = _open_process(
+                file_path, binary_mode, ["pigz", "-p", str(threads), "-c"]
+            )
+        else:
+            file = gzip.open(
+                file_path,
+                binary_mode,
+                compresslevel=COMPRESSION_LEVELS[suffix],
+            )
+    elif suffix == ".jsonl.zst":
+        if zstandard is not None:
+            file = _open_zstandard(file_path, binary_mode, threads)
+        else:
+            assert shutil.which(
+                "zstd"
+            ), f"ERROR! neither the zstandard package nor the zstd command is available to open {file_path}"
+            file = _open_process(
+                file_path, binary_mode, ["zstd", "-q", f"-T{threads}", "-c"]
+            )
+    else:
+        # a large buffer makes iterating over (long) lines in binary mode considerably faster
+        file = open(file_path, binary_mode, buffering=BUFFER_SIZE)
+
+    if "b" in mode:
+        return file
+    return io.TextIOWrapper(file, encoding="utf-8")
+
+
+def _open_zstandard(file_path: str, binary_mode: str, threads: int) -> IO:
+    """
+    Args:
+        file_path: e.g. '<data_original>/books_en.jsonl.zst'
+        binary_mode: 'rb' or 'wb'
+        threads: nr. of compression threads
+
+    Returns:
+        file: buffered binary file object
+    """
+    raw_file = open(file_path, binary_mode)
+    if binary_mode == "rb":
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            raw_file, read_across_frames=True, closefd=True
+        )
+        return io.BufferedReader(reader, buffer_size=BUFFER_SIZE)
+    writer = zstandard.ZstdCompressor(
+        level=COMPRESSION_LEVELS[".jsonl.zst"], threads=threads
+    ).stream_writer(raw_file, closefd=True)
+    return io.BufferedWriter(writer, buffer_size=BUFFER_SIZE)
+
+
+class _ProcessFile(io.BufferedIOBase):
+    """Class used to represent the output (reading) or input (writing) of a (de)compression process as a file"""
+
+    def __init__(self, process: subprocess.Popen, pipe: IO, raw_file: IO):
+        """
+        Args:
+            process: (de)compression process
+            pipe: process.stdout (reading) or process.stdin (writing)
+            raw_file: compressed file
+        """
+        super().__init__()
+        self.process = process
+        self.pipe = pipe
+        self.raw_file = raw_file
+
+    def readable(self) -> bool:
+        return not self.writable()
+
+    def writable(self) -> bool:
+        return self.pipe is self.process.stdin
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        return self.pipe.read(size)
+
+    def read1(self, size: int = -1) -> bytes:
+        return self.pipe.read1(size)
+
+    def readinto(self, buffer) -> int:
+        return self.pipe.readinto(buffer)
+
+    def readline(self, size: Optional[int] = -1) -> bytes:
+        return self.pipe.readline(size)
+
+    def readlines(self, hint: Optional[int] = -1) -> List[bytes]:
+        return self.pipe.readlines(hint)
+
+    def __iter__(self):
+        return iter(self.pipe)
+
+    def __next__(self) -> bytes:
+        return next(self.pipe)
+
+    def write(self, data) -> int:
+        return self.pipe.write(data)
+
+    def tell(self) -> int:
+        return self.pipe.tell()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        if self.writable():
+            self.pipe.close()
+            return_code = self.process.wait()
+        else:
+            self.pipe.close()  # stops the process early if not all data was read
+            return_code = self.process.wait()
+            return_code = 0 if return_code < 0 else return_code
+        self.raw_file.close()
+        super().close()
+        assert (
+            return_code == 0
+        ), f"ERROR! {self.process.args} exited with code {return_code}"
+
+
+class _CountingReader(io.RawIOBase):
+    """Class used to keep track of the position in a (non-seekable) pipe, such that tell() can be used"""
+
+    def __init__(self, raw: IO):
+        """
+        Args:
+            raw: unbuffered pipe, e.g. process.stdout
+        """
+        super().__init__()
+        self.raw = raw
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        number_of_bytes = self.raw.readinto(buffer)
+        self.position += number_of_bytes or 0
+        return number_of_bytes
+
+    def tell(self) -> int:
+        return self.position
+
+    def close(self) -> None:
+        self.raw.close()
+        super().close()
+
+
+def _open_process(file_path: str, binary_mode: str, command: List[str]) -> IO:
+    """
+    Args:
+        file_path: e.g. '<data_original>/books_en.jsonl.zst'
+        binary_mode: 'rb' or 'wb'
+        command: e.g. ['zstd', '-q', '-T8', '-c']
+
+    Returns:
+        file: binary file object
+    """
+    if binary_mode == "rb":
+        raw_file = open(file_path, "rb")
+        process = subprocess.Popen(
+            command + ["-d"],
+            stdin=raw_file,
+            stdout=subprocess.PIPE,
+            bufsize=0,
+        )
+        pipe = io.BufferedReader(_CountingReader(process.stdout), BUFFER_SIZE)
+        return _ProcessFile(process, pipe, raw_file)
+    raw_file = open(file_path, "wb")
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE,
+        stdout=raw_file,
+        bufsize=BUFFER_SIZE,
+    )
+    return _ProcessFile(process, process.stdin, raw_file)
@@ -0,0 +1,157 @@
+"""Module that contains functions to concatenate (jsonl) files physically (zero-copy) or virtually (manifest)"""
+import json
+import os
+import shutil
+from os.path import basename, dirname, getsize, join, relpath
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple
+
+from src.compression import is_compressed, open_jsonl, BUFFER_SIZE
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+
+
+def copy_file(file_path: str, outfile: BinaryIO) -> int:
+    """
+    append file_path to outfile without copying the data to user space if possible,
+    using os.copy_file_range (linux), os.sendfile or shutil.copyfileobj as fallback
+
+    Args:
+        file_path: e.g. '<data_eval>/books_en.jsonl'
+        outfile: file handler for opened ("wb") file
+
+    Returns:
+        number_of_bytes: nr. of copied bytes, e.g. 2 * 10**9
+    """
+    outfile.flush()
+    out_fd = outfile.fileno()
+    number_of_bytes = 0
+    with open(file_path, "rb") as infile:
+        in_fd = infile.fileno()
+        file_size = os.fstat(in_fd).st_size
+        for _copy in [_copy_file_range, _sendfile]:
+            try:
+                while number_of_bytes < file_size:
+                    copied = _copy(in_fd, out_fd, number_of_bytes, file_size)
+                    if copied == 0:
+                        break
+                    number_of_bytes += copied
+                break
+            except (AttributeError, OSError):
+                # not supported by the os or file system, continue with the next method
+                continue
+        if number_of_bytes < file_size:
+            infile.seek(number_of_bytes)
+            outfile.seek(0, os.SEEK_END)
+            shutil.copyfileobj(infile, outfile, BUFFER_SIZE)
+            outfile.flush()
+            number_of_bytes = file_size
+    outfile.seek(0, os.SEEK_END)
+    return number_of_bytes
+
+
+def _copy_file_range(in_fd: int, out_fd: int, offset: int, file_size: int) -> int:
+    return os.copy_file_range(in_fd, out_fd, file_size - offset, offset)
+
+
+def _sendfile(in_fd: int, out_fd: int, offset: int, file_size: int) -> int:
+    return os.sendfile(out_fd, in_fd, offset, file_size - offset)
+
+
+def is_manifest(file_name: str) -> bool:
+    """
+    Args:
+        file_name: e.g. 'all_en.manifest.json'
+
+    Returns:
+        is_manifest: e.g. True
+    """
+    return file_name.endswith(MANIFEST_SUFFIX)
+
+
+def write_manifest(manifest_path: str, file_paths: Sequence[str]) -> str:
+    """
+    write a virtual concatenation of file_paths, i.e. the (file, offset, length) ranges that make up the
+    concatenated data. the file paths are stored relative to the manifest, compressed files are referenced as a whole.
+
+    Args:
+        manifest_path: e.g. '<data_eval>/all_en.manifest.json'
+        file_paths: e.g. ['<data_eval>/articles_en.jsonl', '<data_eval>/books_en.jsonl.gz']
+
+    Returns:
+        manifest_path: e.g. '<data_eval>/all_en.manifest.json'
+    """
+    assert is_manifest(
+        manifest_path
+    ), f"ERROR! manifest_path = {manifest_path} should end with {MANIFEST_SUFFIX}"
+    ranges = [
+        {
+            "file": relpath(file_path, dirname(manifest_path)),
+            "offset": 0,
+            # the decompressed length of a compressed file is not known without reading it
+            "length": None
+            if is_compressed(basename(file_path))
+            else getsize(file_path),
+        }
+        for file_path in file_paths
+    ]
+    with open(manifest_path, "w", encoding="utf-8") as file:
+        json.dump({"version": MANIFEST_VERSION, "ranges": ranges}, file, indent=2)
+    return manifest_path
+
+
+def read_manifest(manifest_path: str) -> List[Tuple[str, int, Optional[int]]]:
+    """
+    Args:
+        manifest_path: e.g. '<data_eval>/all_en.manifest.json'
+
+    Returns:
+        ranges: (file_path, offset, length) of each part, length None = until the end of the file,
+                e.g. [('<data_eval>/articles_en.jsonl', 0, 1250910), ('<data_eval>/books_en.jsonl.gz', 0, None)]
+    """
+    with open(manifest_path, "r", encoding="utf-8") as file:
+        manifest = json.load(file)
+    assert (
+        manifest.get("version") == MANIFEST_VERSION
+    ), f"ERROR! {manifest_path} has version {manifest.get('version')}, expected {MANIFEST_VERSION}"
+    return [
+        (
+            join(dirname(manifest_path), _range["file"]),
+            _range["offset"],
+            _range["length"],
+        )
+        for _range in manifest["ranges"]
+    ]
+
+
+def read_manifest_lines(manifest_path: str) -> Iterator[bytes]:
+    """
+    read the lines of a virtual concatenation
+
+    Args:
+        manifest_path: e.g. '<data_eval>/all_en.manifest.json'
+
+    Returns:
+        lines: e.g. [b'{"text": "this is test article number 0"}\\n', ..]
+    """
+    for file_path, offset, length in read_manifest(manifest_path):
+        with open_jsonl(file_path, "rb") as infile:
+            if offset > 0:
+                if infile.seekable():
+                    infile.seek(offset)
+                else:
+                    while offset > 0:
+                        chunk = infile.read(min(BUFFER_SIZE, offset))
+                        if not chunk:
+                            raise ValueError(
+                                f"ERROR! {file_path} is shorter than expected"
+                            )
+                        offset -= len(chunk)
+            remaining = length
+            for line in infile:
+                if remaining is not None:
+                    if remaining <= 0:
+                        break
+                    line = line[:remaining]
+                    remaining -= len(line)
+                yield line
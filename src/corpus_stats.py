@@ -0,0 +1,230 @@
+"""Module that contains functions & the StatsCache class for (cached) per-language statistics of jsonl files"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from os.path import abspath, isfile
+from typing import Dict, List, Optional, Sequence
+
+from src.compression import is_compressed, open_jsonl
+from src.line_index import get_file_hashes
+from src.sampling import shard_file
+
+STATS_CACHE_VERSION = 1
+UNITS = ["char", "utf8bytes", "words"]
+
+# unit -> language -> count, e.g. {'char': {'en': 42, ..}, ..}
+Stats = Dict[str, Dict[str, int]]
+
+
+def get_file_fingerprint(file_path: str) -> str:
+    """
+    fingerprint of a file, which changes whenever its size, mtime or first / last bytes change
+
+    Args:
+        file_path: e.g. '<data>/wiki_is.jsonl'
+
+    Returns:
+        fingerprint: e.g. '3b5d..'
+    """
+    stat = os.stat(file_path)
+    head_hash, tail_hash = get_file_hashes(file_path, stat.st_size)
+    content = {
+        "version": STATS_CACHE_VERSION,
+        "file_size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "head_hash": head_hash.hex(),
+        "tail_hash": tail_hash.hex(),
+    }
+    return hashlib.blake2b(
+        json.dumps(content, sort_keys=True).encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+def get_stats(file_path: str, start: int = 0, end: Optional[int] = None) -> Stats:
+    """
+    streaming statistics of the kept documents in the byte range [start, end) of file_path (e.g. in a worker process).
+    the lengths are taken from the fields 'len_char', 'len_utf8bytes' & 'len_words' if present,
+    else they are computed from the text.
+
+    Args:
+        file_path: e.g. '<data>/wiki_is.jsonl'
+        start: e.g. 0, only 0 for compressed files
+        end: e.g. 126, None = end of file
+
+    Returns:
+        stats: e.g. {'char': {'is': 53560978}, 'utf8bytes': {'is': 56309152}, 'words': {'is': 8402352}}
+    """
+    stats: Stats = {unit: {} for unit in UNITS}
+    with open_jsonl(file_path, "rb") as infile:
+        if start > 0:
+            infile.seek(start)
+        position = start
+        for line in infile:
+            if end is not None and position >= end:
+                break
+            position += len(line)
+            document = json.loads(line)
+            if document.get("keep", 1) != 1:
+                continue
+            language = document["lang"]
+            if "len_char" in document:
+                lengths = [
+                    document["len_char"],
+                    document["len_utf8bytes"],
+                    document["len_words"],
+                ]
+            else:
+                text = document["text"]
+                lengths = [len(text), len(text.encode("utf-8")), len(text.split())]
+            for unit, length in zip(UNITS, lengths):
+                stats[unit][language] = stats[unit].get(language, 0) + length
+    return stats
+
+
+def merge_stats(stats: Sequence[Stats]) -> Stats:
+    """
+    Args:
+        stats: e.g. [{'char': {'is': 1}, ..}, {'char': {'is': 2, 'sv': 3}, ..}]
+
+    Returns:
+        merged_stats: e.g. {'char': {'is': 3, 'sv': 3}, ..}
+    """
+    merged_stats: Stats = {unit: {} for unit in UNITS}
+    for _stats in stats:
+        for unit in UNITS:
+            for language, count in _stats[unit].items():
+                merged_stats[unit][language] = (
+                    merged_stats[unit].get(language, 0) + count
+                )
+    return merged_stats
+
+
+def group_languages(stats: Stats, languages: Optional[List[str]]) -> Stats:
+    """
+    Args:
+        stats: e.g. {'char': {'is': 1, 'de': 2, 'fr': 3}, ..}
+        languages: e.g. ['is', 'sv'], None = keep all languages
+
+    Returns:
+        grouped_stats: all languages & 'other', e.g. {'char': {'is': 1, 'sv': 0, 'other': 5}, ..}
+    """
+    if languages is None:
+        return stats
+    grouped_stats: Stats = {}
+    for unit in UNITS:
+        grouped_stats[unit] = {language: 0 for language in languages}
+        grouped_stats[unit]["other"] = 0
+        for language, count in stats[unit].items():
+            grouped_stats[unit][language if language in languages else "other"] += count
+    return grouped_stats
+
+
+class StatsCache:
+    """Class used to keep the statistics of each file together with its fingerprint in a json file,
+    such that only new or changed files need to be analyzed
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Args:
+            file_path: e.g. 'wiki_stats.json'
+        """
+        self.file_path = file_path
+        self.entries: Dict[str, Dict[str, object]] = {}
+        if isfile(self.file_path):
+            with open(self.file_path, "r", encoding="utf-8") as file:
+                content = json.load(file)
+            # files with a different version (or format) are ignored
+            if content.get("version") == STATS_CACHE_VERSION:
+                self.entries = content["files"]
+
+    def get(self, file_path: str, fingerprint: str) -> Optional[Stats]:
+        """
+        Args:
+            file_path: e.g. '<data>/wiki_is.jsonl'
+            fingerprint: e.g. '3b5d..'
+
+        Returns:
+            stats: None if file_path is not in the cache or has changed
+        """
+        entry = self.entries.get(abspath(file_path))
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return None
+        return entry["stats"]  # type: ignore
+
+    def update(self, file_path: str, fingerprint: str, stats: Stats) -> None:
+        """
+        Args:
+            file_path: e.g. '<data>/wiki_is.jsonl'
+            fingerprint: e.g. '3b5d..'
+            stats: see get_stats
+        """
+        self.entries[abspath(file_path)] = {"fingerprint": fingerprint, "stats": stats}
+
+    def write(self) -> None:
+        """write statistics & fingerprints to file_path"""
+        file_path_tmp = self.file_path + ".tmp"
+        with open(file_path_tmp, "w", encoding="utf-8") as file:
+            json.dump(
+                {"version": STATS_CACHE_VERSION, "files": self.entries},
+                file,
+                indent=2,
+                sort_keys=True,
+            )
+        os.replace(file_path_tmp, self.file_path)
+
+
+def get_corpus_stats(
+    file_paths: List[str], cache_file: Optional[str] = None, workers: int = 0
+) -> Stats:
+    """
+    statistics of all file_paths, computed in parallel (across files & byte ranges of a file).
+    if cache_file is given, only files that are not in the cache (or have changed) are analyzed.
+
+    Args:
+        file_paths: e.g. ['<data>/wiki_is.jsonl', '<data>/wiki_sv.jsonl']
+        cache_file: e.g. 'wiki_stats.json'
+        workers: nr. of processes, 0 = all cores
+
+    Returns:
+        stats: see get_stats
+    """
+    workers = workers or os.cpu_count() or 1
+    cache = StatsCache(cache_file) if cache_file is not None else None
+    fingerprints = {
+        file_path: get_file_fingerprint(file_path) for file_path in file_paths
+    }
+    stats: Dict[str, Stats] = {}
+    for file_path in file_paths:
+        cached_stats = cache.get(file_path, fingerprints[file_path]) if cache else None
+        if cached_stats is not None:
+            stats[file_path] = cached_stats
+
+    missing = [file_path for file_path in file_paths if file_path not in stats]
+    if missing:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                file_path: [
+                    executor.submit(get_stats, file_path, start, end)
+                    for start, end in (
+                        [(0, None)]
+                        if is_compressed(file_path)
+                        else shard_file(file_path, workers)
+                    )
+                ]
+                for file_path in missing
+            }
+            for file_path, file_futures in futures.items():
+                stats[file_path] = merge_stats(
+                    [future.result() for future in file_futures]
+                )
+                if cache is not None:
+                    cache.update(file_path, fingerprints[file_path], stats[file_path])
+        if cache is not None:
+            cache.write()
+
+    print(
+        f"> analyzed {len(missing)} files, {len(file_paths) - len(missing)} files cached"
+    )
+    return merge_stats([stats[file_path] for file_path in file_paths])
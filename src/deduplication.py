@@ -0,0 +1,172 @@
+"""Module that contains the Deduplicator class for the exact deduplication of documents during sampling"""
+import hashlib
+import math
+import mmap
+import multiprocessing
+import os
+import struct
+import tempfile
+from typing import Any, Dict, Optional
+
+from src.text_reader import get_text
+
+DEDUPLICATION_MODES = ["none", "text", "md5"]
+HEADER = struct.Struct("<QQ")  # nr. of added documents, nr. of documents without text
+
+
+class Deduplicator:
+    """Class used to detect exact duplicates of documents with bounded memory
+
+    the md5 digests of the documents' texts are inserted into a Bloom filter. the bit array of the filter is
+    a memory-mapped (temporary) file, such that a single filter is shared by all (worker) processes.
+    a document is a duplicate if it was seen before, apart from false positives with probability error_rate
+    (as long as the nr. of documents does not exceed capacity).
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float = 1e-4,
+        use_md5: bool = False,
+        directory: Optional[str] = None,
+    ):
+        """
+        Args:
+            capacity: expected nr. of (distinct) documents, e.g. 10**7
+            error_rate: false positive rate at capacity, e.g. 1e-4
+            use_md5: if True, the 'md5' field of a document is used (if present) instead of hashing its text
+            directory: directory of the temporary file that holds the bit array, None = default temporary directory
+        """
+        assert capacity > 0, f"ERROR! capacity = {capacity} needs to be > 0"
+        assert (
+            0 < error_rate < 1
+        ), f"ERROR! error_rate = {error_rate} needs to be in (0, 1)"
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.use_md5 = use_md5
+        # optimal nr. of bits & hash functions
+        self.number_of_bits = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self.number_of_hashes = max(
+            1, round(self.number_of_bits / capacity * math.log(2))
+        )
+        file_descriptor, self.file_path = tempfile.mkstemp(
+            prefix="dedup_", suffix=".bloom", dir=directory
+        )
+        os.ftruncate(file_descriptor, HEADER.size + -(-self.number_of_bits // 8))
+        os.close(file_descriptor)
+        self.lock = multiprocessing.Lock()
+        self._owner_pid = os.getpid()
+        self._buffer: Optional[mmap.mmap] = None
+
+    @property
+    def buffer(self) -> mmap.mmap:
+        """bit array (& header), memory-mapped once per process"""
+        if self._buffer is None:
+            with open(self.file_path, "r+b") as file:
+                self._buffer = mmap.mmap(file.fileno(), 0)
+        return self._buffer
+
+    @property
+    def number_of_documents(self) -> int:
+        """
+        Returns:
+            number_of_documents: nr. of added (distinct) documents, e.g. 42
+        """
+        return HEADER.unpack_from(self.buffer)[0]
+
+    @property
+    def number_of_documents_without_text(self) -> int:
+        """
+        Returns:
+            number_of_documents_without_text: nr. of documents without a text field (that were kept), e.g. 0
+        """
+        return HEADER.unpack_from(self.buffer)[1]
+
+    def get_digest(self, document: bytes) -> Optional[bytes]:
+        """
+        the fields are read with get_text, i.e. without parsing the whole document
+
+        Args:
+            document: e.g. b'{"text": "this is a test", "md5": ""}\\n'
+
+        Returns:
+            digest: md5 digest of the text, e.g. b'T\\xb0\\xc5\\x8c..', None if the document has no text field
+        """
+        if self.use_md5:
+            md5 = get_text(document, "md5", default="")
+            if md5:
+                try:
+                    digest = bytes.fromhex(md5)
+                    if len(digest) == 16:
+                        return digest
+                except (TypeError, ValueError):
+                    pass
+                return hashlib.md5(f"md5:{md5}".encode("utf-8")).digest()
+        try:
+            text = get_text(document)
+        except KeyError:
+            return None
+        return hashlib.md5(text.encode("utf-8")).digest()
+
+    def is_duplicate(self, document: bytes) -> bool:
+        """
+        check whether document was seen before & add it to the filter.
+        documents without a text field are never duplicates, they are only counted
+
+        Args:
+            document: e.g. b'{"text": "this is a test", "md5": ""}\\n'
+
+        Returns:
+            is_duplicate: e.g. False
+        """
+        digest = self.get_digest(document)
+        buffer = self.buffer
+        if digest is None:
+            with self.lock:
+                (
+                    number_of_documents,
+                    number_of_documents_without_text,
+                ) = HEADER.unpack_from(buffer)
+                HEADER.pack_into(
+                    buffer, 0, number_of_documents, number_of_documents_without_text + 1
+                )
+            return False
+        hash_1 = int.from_bytes(digest[:8], "little")
+        hash_2 = int.from_bytes(digest[8:], "little") | 1
+        positions = [
+            (hash_1 + i * hash_2) % self.number_of_bits
+            for i in range(self.number_of_hashes)
+        ]
+        with self.lock:
+            is_duplicate = True
+            for position in positions:
+                index = HEADER.size + (position >> 3)
+                bit = 1 << (position & 7)
+                byte = buffer[index]
+                if not byte & bit:
+                    is_duplicate = False
+                    buffer[index] = byte | bit
+            if not is_duplicate:
+                (
+                    number_of_documents,
+                    number_of_documents_without_text,
+                ) = HEADER.unpack_from(buffer)
+                HEADER.pack_into(
+                    buffer, 0, number_of_documents + 1, number_of_documents_without_text
+                )
+        return is_duplicate
+
+    def close(self) -> None:
+        """unmap the bit array & remove the temporary file (if called by the process that created it)"""
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+        if os.getpid() == self._owner_pid and os.path.isfile(self.file_path):
+            os.remove(self.file_path)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_buffer"] = None
+        return state
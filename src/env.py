@@ -2,7 +2,9 @@
 from os.path import join, abspath, dirname, isfile
 import configparser
 import csv
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Optional
+
+from src.compression import JSONL_SUFFIXES
 
 config = configparser.ConfigParser()
 BASE_DIR = abspath(dirname(dirname(__file__)))
@@ -61,7 +63,9 @@ class Env:
             self.sampling_weights
         ), f"ERROR! sampling weights file = {self.sampling_weights} not found."
 
-    def get_file_path(self, category: str, language: str, kind: str) -> str:
+    def get_file_path(
+        self, category: str, language: str, kind: str, suffix: Optional[str] = None
+    ) -> str:
         """
         get file path for data of kind 'kind', category 'category' and language 'language'
 
@@ -69,6 +73,7 @@ class Env:
             category: e.g. 'books'
             language: e.g. 'en'
             kind: e.g. 'data_original'
+            suffix: e.g. '.jsonl.gz', None = suffix of the existing (possibly compressed) file, '.jsonl' if there is none
 
         Returns:
             file_path: e.g. '<data_original>/books_en.jsonl
@@ -82,7 +87,16 @@ class Env:
         else:
             raise Exception(f"ERROR! kind = {kind} unknown.")
 
-        return join(directory, f"{category}_{language}.jsonl")
+        if suffix is None:
+            suffix = next(
+                (
+                    _suffix
+                    for _suffix in JSONL_SUFFIXES
+                    if isfile(join(directory, f"{category}_{language}{_suffix}"))
+                ),
+                ".jsonl",
+            )
+        return join(directory, f"{category}_{language}{suffix}")
 
     def read_sampling_weights(
         self, percent: int = 100, verbose: bool = False
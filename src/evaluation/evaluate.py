@@ -4,13 +4,14 @@ import sys
 from collections import Counter
 import time
 import string
-import json
 from typing import Dict
 
 from transformers import PreTrainedTokenizerFast
 import sentencepiece as spm
 
 from src.env import Env
+from src.concatenation import is_manifest, read_manifest_lines
+from src.text_reader import get_texts, read_texts
 from src.evaluation.evaluation_metrics import EvaluationMetrics
 
 env = Env()
@@ -23,7 +24,7 @@ def evaluate(_tokenizer: str, _data_path: str) -> EvaluationMetrics:
 
     Args:
         _tokenizer: e.g. <output>/151508_SP-uNone-d0-p0-w0-c0-f0-bf0-cc1.0-x1-v1000_SP_test
-        _data_path: e.g. <data_eval>/all_en.jsonl'
+        _data_path: e.g. <data_eval>/all_en.jsonl' (or .jsonl.gz / .jsonl.zst / .manifest.json)
 
     Returns:
         evaluation_metrics: [EvaluationMetrics]
@@ -32,8 +33,10 @@ def evaluate(_tokenizer: str, _data_path: str) -> EvaluationMetrics:
     time_start = time.time()
 
     # 0. load data
-    with open(_data_path, "r", encoding="utf-8") as file:
-        _data = [json.loads(line)["text"] for line in file]
+    if is_manifest(_data_path):
+        _data = list(get_texts(read_manifest_lines(_data_path)))
+    else:
+        _data = [text for batch in read_texts(_data_path) for text in batch]
 
     evaluation_metrics = EvaluationMetrics()
 
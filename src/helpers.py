@@ -6,11 +6,15 @@ import json
 from typing import List, Optional, Dict, Tuple
 import time
 import shutil
+from itertools import islice
 
 from tokenizers import normalizers
 from datasets import Dataset
 from sentencepiece import sentencepiece_model_pb2 as model_pb2
 from src.env import Env
+from src.catalog import Catalog
+from src.splitting import split_documents
+from src.upsampling import TrainingRepeats, repeat_documents
 
 
 UNICODE_NORMALIZATION = {
@@ -36,19 +40,44 @@ def get_normalizer(_unicode_normalization: str) -> Optional[normalizers.Normaliz
     return UNICODE_NORMALIZATION[_unicode_normalization]
 
 
-def get_training_corpus_combined(_dataset: Dataset, batch_size: int = 100000):
+def get_training_corpus_combined(
+    _dataset: Dataset,
+    batch_size: int = 100000,
+    max_length: Optional[int] = None,
+    repeats: Optional[TrainingRepeats] = None,
+):
     """
     get generator that creates batches of data
 
     Args:
         _dataset: Dataset
         batch_size: e.g. 10
+        max_length: if specified, documents are split into chunks of at most max_length characters, e.g. 10000
+        repeats: if specified, nr. of times each document is used (virtual upsampling), see src.upsampling
 
     Returns:
         training_corpus_combined
     """
-    for i in range(0, len(_dataset["train"]), batch_size):
-        yield str(_dataset["train"][i : i + batch_size]["text"])
+    if max_length is None and repeats is None:
+        for i in range(0, len(_dataset["train"]), batch_size):
+            yield str(_dataset["train"][i : i + batch_size]["text"])
+    else:
+        texts = (
+            text
+            for i in range(0, len(_dataset["train"]), batch_size)
+            for text in _dataset["train"][i : i + batch_size]["text"]
+        )
+        if repeats is not None:
+            # the repeats are applied by position, i.e. they need to belong to the documents of the dataset
+            assert repeats.number_of_documents == len(_dataset["train"]), (
+                f"ERROR! nr. of documents in the data files = {repeats.number_of_documents} "
+                f"!= nr. of documents in the dataset = {len(_dataset['train'])}, "
+                f"e.g. because of empty lines"
+            )
+            texts = repeat_documents(texts, repeats)
+        chunks = texts if max_length is None else split_documents(texts, max_length)
+        while batch := list(islice(chunks, batch_size)):
+            yield str(batch)
 
 
 def add_special_tokens(
@@ -310,8 +339,7 @@ def get_languages(stage: str) -> List[str]:
 
     env = Env(dirname(".."))
     directory = env.data_train if stage == "train" else env.data_eval
-    files = [file for file in os.listdir(directory) if file.endswith(".jsonl")]
-    languages = list({file.split("_")[-1].split(".jsonl")[0] for file in files})
+    languages = Catalog(directory).get_languages()
     return languages
 
 
@@ -0,0 +1,274 @@
+"""Module that contains the LineIndex class that represents the byte offsets of the documents in a jsonl file"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate, count
+from operator import add
+from os.path import getsize, isfile
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+LINE_INDEX_SUFFIX = ".lineidx"
+MAGIC = b"SW3LIX01"
+# magic, file_size, mtime_ns, nr. of documents, head hash, tail hash
+HEADER = struct.Struct("<8sQqQ16s16s")
+CHUNK_SIZE = 2**24  # 16 MiB
+FINGERPRINT_SIZE = 2**16  # 64 KiB
+
+
+class LineIndex:
+    """Class used to represent the byte offsets of the documents (lines) in a jsonl file
+
+    the line index is stored in a sidecar file <file_path>.lineidx that contains
+    - a header with the size, mtime & hashes of the first and last FINGERPRINT_SIZE bytes of the indexed file
+    - the end offsets of all lines (uint64, little endian)
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        ends: Sequence[int],
+        file_size: int,
+        mtime_ns: int,
+        head_hash: bytes,
+        tail_hash: bytes,
+    ):
+        """
+        Args:
+            file_path: e.g. '<data_original>/books_en.jsonl'
+            ends: end offsets of the lines, e.g. [42, 84, 126]
+            file_size: e.g. 126
+            mtime_ns: e.g. 1685000000000000000
+            head_hash: hash of the first FINGERPRINT_SIZE bytes
+            tail_hash: hash of the last FINGERPRINT_SIZE bytes
+        """
+        self.file_path = file_path
+        self.index_path = file_path + LINE_INDEX_SUFFIX
+        self.ends = ends
+        self.file_size = file_size
+        self.mtime_ns = mtime_ns
+        self.head_hash = head_hash
+        self.tail_hash = tail_hash
+
+    @property
+    def number_of_documents(self) -> int:
+        """
+        Returns:
+            number_of_documents: e.g. 3
+        """
+        return len(self.ends)
+
+    def get_range(self, line_index: int) -> Tuple[int, int]:
+        """
+        Args:
+            line_index: e.g. 1
+
+        Returns:
+            offset: e.g. 42
+            length: e.g. 42
+        """
+        start = self.ends[line_index - 1] if line_index > 0 else 0
+        return start, self.ends[line_index] - start
+
+    def read_lines(self, line_indices: Iterable[int]) -> Iterator[bytes]:
+        """
+        read single lines from the indexed file by seeking to their offsets
+
+        Args:
+            line_indices: preferably sorted, e.g. [0, 2]
+
+        Returns:
+            lines: e.g. [b'{"text": "this is test article number 0"}\\n', ..]
+        """
+        with open(self.file_path, "rb") as file:
+            position = 0
+            for line_index in line_indices:
+                offset, length = self.get_range(line_index)
+                if offset != position:
+                    file.seek(offset)
+                yield file.read(length)
+                position = offset + length
+
+    def is_fresh(self) -> bool:
+        """
+        Returns:
+            is_fresh: True if the indexed file has not changed (w.r.t. size & mtime) since it was indexed
+        """
+        stat = os.stat(self.file_path)
+        return stat.st_size == self.file_size and stat.st_mtime_ns == self.mtime_ns
+
+    def write(self) -> None:
+        """write line index to sidecar file <file_path>.lineidx"""
+        ends = array("Q", self.ends)
+        if sys.byteorder == "big":
+            ends.byteswap()
+        index_path_tmp = self.index_path + ".tmp"
+        with open(index_path_tmp, "wb") as file:
+            file.write(
+                HEADER.pack(
+                    MAGIC,
+                    self.file_size,
+                    self.mtime_ns,
+                    len(ends),
+                    self.head_hash,
+                    self.tail_hash,
+                )
+            )
+            ends.tofile(file)
+        os.replace(index_path_tmp, self.index_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> Optional["LineIndex"]:
+        """
+        load line index from sidecar file <file_path>.lineidx (memory-mapped)
+
+        Args:
+            file_path: e.g. '<data_original>/books_en.jsonl'
+
+        Returns:
+            line_index: None if the sidecar file does not exist
+        """
+        index_path = file_path + LINE_INDEX_SUFFIX
+        if not isfile(index_path):
+            return None
+        with open(index_path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            file_size,
+            mtime_ns,
+            number_of_documents,
+            head_hash,
+            tail_hash,
+        ) = HEADER.unpack_from(buffer)
+        assert magic == MAGIC, f"ERROR! {index_path} is not a line index file."
+        view = memoryview(buffer)[HEADER.size : HEADER.size + 8 * number_of_documents]
+        if sys.byteorder == "little":
+            ends: Sequence[int] = view.cast("Q")
+        else:
+            ends = array("Q", view.tobytes())
+            ends.byteswap()
+        return cls(file_path, ends, file_size, mtime_ns, head_hash, tail_hash)
+
+    @classmethod
+    def build(cls, file_path: str, chunk_size: int = CHUNK_SIZE) -> "LineIndex":
+        """
+        create line index for file_path. if the file was only appended to since an existing
+        line index was created, only the appended part of the file is scanned.
+
+        Args:
+            file_path: e.g. '<data_original>/books_en.jsonl'
+            chunk_size: nr. of bytes that are scanned at once
+
+        Returns:
+            line_index
+        """
+        mtime_ns = os.stat(file_path).st_mtime_ns
+        file_size = getsize(file_path)
+        ends = array("Q")
+        start = 0
+
+        previous = cls.load(file_path)
+        if previous is not None and previous.is_fresh():
+            return previous
+        if previous is not None and _is_appended(previous, file_size):
+            ends.frombytes(previous.ends.tobytes())
+            # a last line without line break may have been continued
+            if len(ends) and _read_bytes(file_path, ends[-1] - 1, 1) != b"\n":
+                ends.pop()
+            start = ends[-1] if len(ends) else 0
+
+        with open(file_path, "rb") as file:
+            file.seek(start)
+            chunk_start = start
+            while chunk_start < file_size:
+                chunk = file.read(min(chunk_size, file_size - chunk_start))
+                if not chunk:
+                    break
+                # end offsets of all lines in chunk = chunk_start + cumulative length of parts + nr. of line breaks
+                parts = chunk.split(b"\n")
+                ends.extend(
+                    map(add, accumulate(map(len, parts[:-1])), count(chunk_start + 1))
+                )
+                chunk_start += len(chunk)
+
+        # last line without line break
+        if file_size > (ends[-1] if len(ends) else 0):
+            ends.append(file_size)
+
+        head_hash, tail_hash = get_file_hashes(file_path, file_size)
+        return cls(file_path, ends, file_size, mtime_ns, head_hash, tail_hash)
+
+
+def get_line_index(file_path: str, create: bool = True) -> Optional[LineIndex]:
+    """
+    get up-to-date line index for file_path
+
+    Args:
+        file_path: e.g. '<data_original>/books_en.jsonl'
+        create: if True, a missing or outdated line index is created (or refreshed) and written to disk
+
+    Returns:
+        line_index: None if create is False and there is no up-to-date line index
+    """
+    line_index = LineIndex.load(file_path)
+    if line_index is not None and line_index.is_fresh():
+        return line_index
+    if not create:
+        return None
+    line_index = LineIndex.build(file_path)
+    line_index.write()
+    return line_index
+
+
+def _is_appended(previous: LineIndex, file_size: int) -> bool:
+    """
+    Args:
+        previous: line index of a previous version of the file
+        file_size: current file size
+
+    Returns:
+        is_appended: True if the previously indexed bytes seem unchanged (same size or larger, same head & tail hash)
+    """
+    if file_size < previous.file_size:
+        return False
+    return get_file_hashes(previous.file_path, previous.file_size) == (
+        previous.head_hash,
+        previous.tail_hash,
+    )
+
+
+def get_file_hashes(file_path: str, file_size: int) -> Tuple[bytes, bytes]:
+    """
+    Args:
+        file_path: e.g. '<data_original>/books_en.jsonl'
+        file_size: nr. of bytes of the file that are taken into account
+
+    Returns:
+        head_hash: hash of the first FINGERPRINT_SIZE bytes
+        tail_hash: hash of the last FINGERPRINT_SIZE bytes
+    """
+    head = _read_bytes(file_path, 0, min(FINGERPRINT_SIZE, file_size))
+    tail_start = max(0, file_size - FINGERPRINT_SIZE)
+    tail = _read_bytes(file_path, tail_start, file_size - tail_start)
+    return (
+        hashlib.blake2b(head, digest_size=16).digest(),
+        hashlib.blake2b(tail, digest_size=16).digest(),
+    )
+
+
+def _read_bytes(file_path: str, offset: int, length: int) -> bytes:
+    """
+    Args:
+        file_path: e.g. '<data_original>/books_en.jsonl'
+        offset: e.g. 0
+        length: e.g. 65536
+
+    Returns:
+        bytes of file_path in the range [offset, offset + length)
+    """
+    with open(file_path, "rb") as file:
+        file.seek(offset)
+        return file.read(length)
@@ -1,51 +1,169 @@
 """Module that contains the Logger class to print and log to file"""
-from typing import Optional, Dict
+import json
+import os
+import sys
+from typing import Any, IO, Optional, Dict, List, Tuple
 from os.path import join
 
+try:
+    import resource  # not available on windows
+except ImportError:  # pragma: no cover
+    resource = None
+
+LOG_FILE = "SAMPLING.log"
+METRICS_FILE = "SAMPLING_METRICS.ndjson"  # json lines, not .jsonl (which is reserved for data files)
+
 
 class Logger:
-    """Class used to print and log to file"""
+    """Class used to print and log to file
+
+    the log file (and the metrics file) are kept open with a single buffered handle per process.
+    complete lines are flushed at once to a file that is opened in append mode, such that
+    the Logger can also be used from several (worker) processes without interleaving lines.
+    """
 
     def __init__(self, logger_folder: str):
-        self.log_file_path = join(logger_folder, "SAMPLING.log")
+        self.log_file_path = join(logger_folder, LOG_FILE)
+        self.metrics_file_path = join(logger_folder, METRICS_FILE)
+        self._files: Dict[str, IO] = {}
+        self._pid = os.getpid()
 
     def initialize(
         self, percent: str, sampling_weights: Dict[str, Dict[str, float]]
     ) -> None:
         """
-        logs initial information about the sampling process
+        logs initial information about the sampling process, the log file & metrics file are truncated
 
         Args:
             percent: e.g. '10'
             sampling_weights: e.g. {'books': {'en': 0.5}, 'articles': {'en': 1.0}}
         """
-        with open(self.log_file_path, "w", encoding="utf-8") as file:
-            file.write("======================\n")
-            file.write(f"> PERCENT = {percent}\n")
-            file.write("> WEIGHTS:\n")
-            for category, language_dict in sampling_weights.items():
-                for language, weight in language_dict.items():
-                    file.write(f"  {category}, {language}: {weight}\n")
-            file.write("======================\n\n")
+        self.close()
+        for file_path in [self.log_file_path, self.metrics_file_path]:
+            with open(file_path, "w", encoding="utf-8"):
+                pass
+        file = self._get_file(self.log_file_path)
+        file.write("======================\n")
+        file.write(f"> PERCENT = {percent}\n")
+        file.write("> WEIGHTS:\n")
+        for category, language_dict in sampling_weights.items():
+            for language, weight in language_dict.items():
+                file.write(f"  {category}, {language}: {weight}\n")
+        file.write("======================\n\n")
+        file.flush()
 
-    def log_print(self, _str: Optional[str] = None, end: Optional[str] = None) -> None:
+    def log_messages(self, messages: List[Tuple[Optional[str], Optional[str]]]) -> None:
+        """
+        print (to stdout) and logs (to file) messages that were collected by a CellLogger
+
+        Args:
+            messages: e.g. [('this is a test', None), (None, None)]
+        """
+        for _str, end in messages:
+            self.log_print(_str, end=end, flush=False)
+        self._get_file(self.log_file_path).flush()
+
+    def log_print(
+        self, _str: Optional[str] = None, end: Optional[str] = None, flush: bool = True
+    ) -> None:
         """
         print (to stdout) and logs (to file) the input string '_str'
 
         Args:
             _str: input str, e.g. 'this is a test'
             end: e.g. '', which avoids a line break
+            flush: if True, the log file is flushed after a complete line
         """
+        file = self._get_file(self.log_file_path)
         if _str is None:
             print()
-            with open(self.log_file_path, "a", encoding="utf-8") as file:
-                file.write("\n")
+            file.write("\n")
+        elif end is None:
+            print(_str)
+            file.write(f"{_str}\n")
         else:
-            if end is None:
-                print(_str)
-                with open(self.log_file_path, "a", encoding="utf-8") as file:
-                    file.write(f"{_str}\n")
-            else:
-                print(_str, end=end)
-                with open(self.log_file_path, "a", encoding="utf-8") as file:
-                    file.write(f"{_str}")
+            print(_str, end=end)
+            file.write(f"{_str}")
+        if flush and end is None:
+            file.flush()
+
+    def log_metrics(self, metrics: Dict[str, Any]) -> None:
+        """
+        logs (to the metrics file) a single record as a json line
+
+        Args:
+            metrics: e.g. {'category': 'books', 'language': 'en', 'time': 1.2, 'mb_per_s': 350.1}
+        """
+        file = self._get_file(self.metrics_file_path)
+        file.write(json.dumps(metrics) + "\n")
+        file.flush()
+
+    def close(self) -> None:
+        """close the file handles (of the current process)"""
+        if self._pid == os.getpid():
+            for file in self._files.values():
+                file.close()
+        self._files = {}
+        self._pid = os.getpid()
+
+    def _get_file(self, file_path: str) -> IO:
+        """
+        Args:
+            file_path: e.g. '<data_train>/SAMPLING.log'
+
+        Returns:
+            file: buffered handle opened in append mode (once per process)
+        """
+        if self._pid != os.getpid():
+            # forked process: the inherited (buffered) handles must not be used
+            self._files = {}
+            self._pid = os.getpid()
+        if file_path not in self._files:
+            self._files[file_path] = open(file_path, "a", encoding="utf-8")
+        return self._files[file_path]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_files"] = {}
+        return state
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:  # pragma: no cover
+            pass
+
+
+class CellLogger:
+    """Class used to collect the log output of a single combination of category & language,
+    e.g. in a worker process. The messages are printed & logged by Logger.log_messages()
+    """
+
+    def __init__(self):
+        self.messages: List[Tuple[Optional[str], Optional[str]]] = []
+
+    def log_print(self, _str: Optional[str] = None, end: Optional[str] = None) -> None:
+        """
+        collects the input string '_str'
+
+        Args:
+            _str: input str, e.g. 'this is a test'
+            end: e.g. '', which avoids a line break
+        """
+        self.messages.append((_str, end))
+
+
+def get_peak_rss() -> Optional[float]:
+    """
+    Returns:
+        peak_rss: peak resident set size of the current process in MB, e.g. 85.3 (None if not available)
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is given in bytes on macOS and in kibibytes on linux
+    return (
+        max_rss / float(10**6)
+        if sys.platform == "darwin"
+        else max_rss * 1024 / float(10**6)
+    )
@@ -0,0 +1,217 @@
+"""Module that contains functions for the detection of near-duplicate documents using MinHash & LSH"""
+import heapq
+import zlib
+from array import array
+from bisect import bisect_left
+from itertools import islice
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Set
+
+from src.compression import open_jsonl
+from src.text_reader import get_text
+
+HASH_BITS = 32  # zlib.crc32
+
+
+def get_shingle_hashes(text: str, ngram: int = 5) -> List[int]:
+    """
+    hash all word n-grams (shingles) of text. the n-grams are built, encoded and hashed
+    in bulk using map (i.e. without python code per shingle).
+
+    Args:
+        text: e.g. 'this is a test'
+        ngram: nr. of words per shingle, e.g. 2
+
+    Returns:
+        shingle_hashes: unique 32-bit hashes of the shingles (sorted), e.g. [392847571, 1823717311, 2975817392]
+    """
+    words = text.split()
+    if len(words) <= ngram:
+        shingles: Iterator[str] = iter([" ".join(words)])
+    else:
+        shingles = map(" ".join, zip(*(islice(words, i, None) for i in range(ngram))))
+    return sorted(set(map(zlib.crc32, map(str.encode, shingles))))
+
+
+def get_signature(shingle_hashes: Sequence[int], number_of_bins: int = 128) -> array:
+    """
+    MinHash signature using one permutation hashing (with densification):
+    the hash space is split into number_of_bins bins and the minimum hash of each bin is kept,
+    i.e. a single hash per shingle is needed instead of one hash per bin and shingle.
+    empty bins are filled with the (shifted) minimum of the next non-empty bin.
+    two documents have the same value in a bin with a probability of (approximately) the jaccard similarity of their shingles.
+
+    Args:
+        shingle_hashes: sorted 32-bit hashes, see get_shingle_hashes
+        number_of_bins: power of 2, e.g. 128
+
+    Returns:
+        signature: minimum hash of each bin, e.g. array('Q', [392847571, ..])
+    """
+    assert (
+        number_of_bins & (number_of_bins - 1) == 0
+    ), f"ERROR! number_of_bins = {number_of_bins} needs to be a power of 2"
+    shift = HASH_BITS - (number_of_bins.bit_length() - 1)
+    # the hashes are sorted, so the last assignment to each bin is its minimum
+    minima = {
+        shingle_hash >> shift: shingle_hash for shingle_hash in reversed(shingle_hashes)
+    }
+    signature = array("Q", [0] * number_of_bins)
+    if not minima:
+        return signature
+    # walk through the bins backwards (twice, as the bins are circular) to find the next non-empty bin
+    next_bin = None
+    for _bin in reversed(range(2 * number_of_bins)):
+        if _bin % number_of_bins in minima:
+            next_bin = _bin
+        if next_bin is not None and _bin < number_of_bins:
+            distance = next_bin - _bin
+            signature[_bin] = minima[next_bin % number_of_bins] + (
+                distance << HASH_BITS
+            )
+    return signature
+
+
+def get_band_keys(signature: Sequence[int], number_of_bands: int) -> List[int]:
+    """
+    locality sensitive hashing: split the signature into number_of_bands bands and hash each band.
+    documents with the same key in at least one band are near-duplicate candidates.
+
+    Args:
+        signature: see get_signature, e.g. array('Q', [1, 2, 3, 4])
+        number_of_bands: e.g. 2
+
+    Returns:
+        band_keys: e.g. [-3550055125485641917, 8389048192121911274]
+    """
+    assert (
+        len(signature) % number_of_bands == 0
+    ), f"ERROR! signature length = {len(signature)} is not divisible by number_of_bands = {number_of_bands}"
+    rows = len(signature) // number_of_bands
+    # hashes of tuples of ints are deterministic (not salted), i.e. identical in all processes
+    return [
+        hash((band, *signature[band * rows : (band + 1) * rows]))
+        for band in range(number_of_bands)
+    ]
+
+
+def get_band_keys_of_lines(
+    lines: Iterator[bytes], ngram: int, number_of_bins: int, number_of_bands: int
+) -> array:
+    """
+    Args:
+        lines: jsonl documents, e.g. [b'{"text": "this is a test"}\\n', ..]
+        ngram: e.g. 5
+        number_of_bins: e.g. 128
+        number_of_bands: e.g. 16
+
+    Returns:
+        band_keys: number_of_bands keys for each document (flattened), e.g. array('q', [..])
+    """
+    band_keys = array("q")
+    for line in lines:
+        text = get_text(line)
+        signature = get_signature(get_shingle_hashes(text, ngram), number_of_bins)
+        band_keys.extend(get_band_keys(signature, number_of_bands))
+    return band_keys
+
+
+def get_band_keys_of_file(
+    file_path: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    ngram: int = 5,
+    number_of_bins: int = 128,
+    number_of_bands: int = 16,
+) -> array:
+    """
+    compute the band keys of the documents in the byte range [start, end) of file_path (e.g. in a worker process)
+
+    Args:
+        file_path: e.g. '<data_train>/books_en.jsonl'
+        start: e.g. 0, only 0 for compressed files
+        end: e.g. 126, None = end of file
+        ngram: e.g. 5
+        number_of_bins: e.g. 128
+        number_of_bands: e.g. 16
+
+    Returns:
+        band_keys: see get_band_keys_of_lines
+    """
+    with open_jsonl(file_path, "rb") as infile:
+        if start > 0:
+            infile.seek(start)
+        return get_band_keys_of_lines(
+            _read_lines(infile, start, end), ngram, number_of_bins, number_of_bands
+        )
+
+
+def _read_lines(infile: BinaryIO, start: int, end: Optional[int]) -> Iterator[bytes]:
+    position = start
+    for line in infile:
+        if end is not None and position >= end:
+            break
+        position += len(line)
+        yield line
+
+
+class NearDuplicateIndex:
+    """Class used to keep the LSH band keys of all documents seen so far
+
+    for each band, the keys of the most recent documents are kept in a set of at most buffer_size keys.
+    when the set is full, it is flushed into a sorted array('q') (a run). runs of similar length are merged,
+    such that there are at most about log2(number_of_documents / buffer_size) runs per band,
+    which are searched with bisect. i.e. the index needs 8 bytes per band & document,
+    plus up to buffer_size python ints per band.
+    """
+
+    def __init__(self, number_of_bands: int, buffer_size: int = 2**14):
+        """
+        Args:
+            number_of_bands: e.g. 16
+            buffer_size: max. nr. of keys per band that are kept in a set before they are flushed, e.g. 16384
+        """
+        self.number_of_bands = number_of_bands
+        self.buffer_size = buffer_size
+        self.buffers: List[Set[int]] = [set() for _ in range(number_of_bands)]
+        self.runs: List[List[array]] = [[] for _ in range(number_of_bands)]
+
+    def __len__(self) -> int:
+        """
+        Returns:
+            number_of_documents: nr. of added documents, e.g. 42
+        """
+        return len(self.buffers[0]) + sum(len(run) for run in self.runs[0])
+
+    def is_duplicate(self, band_keys: Sequence[int]) -> bool:
+        """
+        check whether a document is a near-duplicate of a document seen before & add it otherwise
+
+        Args:
+            band_keys: see get_band_keys
+
+        Returns:
+            is_duplicate: True if the document shares a bucket with a document seen before
+        """
+        for key, buffer, runs in zip(band_keys, self.buffers, self.runs):
+            if key in buffer or any(_contains(run, key) for run in runs):
+                return True
+        for key, buffer in zip(band_keys, self.buffers):
+            buffer.add(key)
+        if len(self.buffers[0]) >= self.buffer_size:
+            for band in range(self.number_of_bands):
+                self._flush(band)
+        return False
+
+    def _flush(self, band: int) -> None:
+        """move the keys of the buffer of band into a new run & merge runs of similar length"""
+        runs = self.runs[band]
+        runs.append(array("q", sorted(self.buffers[band])))
+        self.buffers[band].clear()
+        while len(runs) > 1 and len(runs[-2]) <= 2 * len(runs[-1]):
+            run = runs.pop()
+            runs[-1] = array("q", heapq.merge(runs[-1], run))
+
+
+def _contains(run: array, key: int) -> bool:
+    index = bisect_left(run, key)
+    return index < len(run) and run[index] == key
@@ -2,13 +2,14 @@
 import json
 import sys
 from os import makedirs
-from os.path import getsize, join
+from os.path import basename, dirname, join
 from typing import List, Union, Dict
 from collections import Counter
 
 from datasets import Dataset
 import sentencepiece as spm
 from src.parameters import Parameters
+from src.catalog import Catalog
 
 
 class Output:
@@ -124,16 +125,25 @@ class Output:
             _time:
         """
         print("-------------------")
-        # a. get document count
+        # a. get document count & file sizes (from the catalogs of the data directories, if they are up to date)
+        _catalogs = {
+            _directory: Catalog(_directory)
+            for _directory in {
+                dirname(_dataset_file) for _dataset_file in _dataset_files
+            }
+        }
+        _file_sizes = [
+            _catalogs[dirname(_dataset_file)].get_file_size(basename(_dataset_file))
+            for _dataset_file in _dataset_files
+        ]
         _overview = {
             "files": len(_dataset_combined),
             "documents_total": len(_dataset_combined["train"]),
             "documents": len(_dataset_combined["train"]),
             "dataset_files": _dataset_files,
-            "data_size_total": f"{sum(getsize(_dataset_file) for _dataset_file in _dataset_files)/1073741824.:.4f}G",
+            "data_size_total": f"{sum(_file_sizes)/1073741824.:.4f}G",
             "data_size": [
-                f"{getsize(_dataset_file)/1073741824.:.4f}G"
-                for _dataset_file in _dataset_files
+                f"{_file_size/1073741824.:.4f}G" for _file_size in _file_sizes
             ],
             "time": _time,
         }
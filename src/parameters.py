@@ -1,10 +1,10 @@
 """Module that contains the Parameters class that contains all parameters for tokenizer training"""
-import os
 import csv
 from typing import List
-from os.path import join, isfile
+from os.path import join
 import time
 from src.env import Env
+from src.catalog import Catalog
 from src.helpers import LIST_OF_SPECIAL_TOKENS
 
 env = Env()
@@ -136,20 +136,14 @@ def _get_dataset_files_in_folder(_folder: str, _dataset_filter: str) -> List[str
         _dataset_filter: 'file'
 
     Returns:
-        files_in_folder: e.g. ['file1.jsonl', 'file2.jsonl']
+        files_in_folder: e.g. ['file1.jsonl', 'file2.jsonl.gz']
     """
     print(f"> get files in {_folder}")
-    _files = [
-        elem
-        for elem in os.listdir(_folder)
-        if isfile(join(_folder, elem)) and elem.endswith(".jsonl")
-    ]
-    if len(_dataset_filter) and _dataset_filter != "all":
-        _files = [elem for elem in _files if _dataset_filter in elem]
+    _files = Catalog(_folder).get_file_paths(_dataset_filter)
     assert len(
         _files
     ), f"ERROR! no files found in {_folder} (that contain '{_dataset_filter}')"
-    return [join(_folder, elem) for elem in _files]
+    return _files
 
 
 def _get_code_tokens() -> List[str]:
@@ -0,0 +1,169 @@
+"""Module that contains functions to write and read the sample indices (SAMPLING.idx or SAMPLING.json)"""
+import json
+import mmap
+import os
+import re
+import sys
+from array import array
+from os.path import isfile, join
+from typing import Dict, Iterable, Optional, Sequence
+
+SAMPLE_INDICES_FILES = {
+    "binary": "SAMPLING.idx",
+    "json": "SAMPLING.json",
+}
+MAGIC = b"SW3IDX01"
+ALIGNMENT = 8
+
+assert array("I").itemsize == 4, "ERROR! array typecode 'I' is expected to have 4 bytes"
+assert array("Q").itemsize == 8, "ERROR! array typecode 'Q' is expected to have 8 bytes"
+
+
+def write_sample_indices(
+    directory: str,
+    sample_indices: Dict[str, Sequence[int]],
+    file_format: str = "binary",
+) -> str:
+    """
+    write sample indices to <directory>/SAMPLING.idx (file_format = 'binary') or <directory>/SAMPLING.json.
+    an existing file of the other format is removed.
+
+    the binary file contains
+    - MAGIC (8 bytes)
+    - length of the header (uint64, little endian)
+    - header (json), e.g. {"books_en.jsonl": {"typecode": "I", "offset": 0, "length": 2}}
+    - sorted sample indices for each file (uint32 or uint64, little endian, aligned to 8 bytes)
+
+    Args:
+        directory: e.g. '<data_train>'
+        sample_indices: e.g. {'books_en.jsonl': (4, 2), 'articles_en.jsonl': (0, 3)}
+        file_format: 'binary' or 'json'
+
+    Returns:
+        file_path: e.g. '<data_train>/SAMPLING.idx'
+    """
+    assert (
+        file_format in SAMPLE_INDICES_FILES
+    ), f"ERROR! file_format = {file_format} unknown, should be one of {list(SAMPLE_INDICES_FILES)}"
+    file_path = join(directory, SAMPLE_INDICES_FILES[file_format])
+
+    # remove stale file of the other format, as read_sample_indices() prefers SAMPLING.idx
+    for _file_format, _file_name in SAMPLE_INDICES_FILES.items():
+        if _file_format != file_format and isfile(join(directory, _file_name)):
+            os.remove(join(directory, _file_name))
+
+    if file_format == "json":
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {key: sorted(indices) for key, indices in sample_indices.items()}, file
+            )
+        return file_path
+
+    arrays = {}
+    header = {}
+    offset = 0
+    for key, indices in sample_indices.items():
+        indices_sorted = sorted(indices)
+        typecode = (
+            "I" if len(indices_sorted) == 0 or indices_sorted[-1] < 2**32 else "Q"
+        )
+        arrays[key] = array(typecode, indices_sorted)
+        if sys.byteorder == "big":
+            arrays[key].byteswap()
+        header[key] = {
+            "typecode": typecode,
+            "offset": offset,
+            "length": len(indices_sorted),
+        }
+        offset += _aligned(len(indices_sorted) * arrays[key].itemsize)
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    header_bytes += b" " * (_aligned(len(header_bytes)) - len(header_bytes))
+    with open(file_path, "wb") as file:
+        file.write(MAGIC)
+        file.write(len(header_bytes).to_bytes(8, "little"))
+        file.write(header_bytes)
+        for _array in arrays.values():
+            number_of_bytes = len(_array) * _array.itemsize
+            _array.tofile(file)
+            file.write(b"\x00" * (_aligned(number_of_bytes) - number_of_bytes))
+    return file_path
+
+
+def read_sample_indices(directory: str) -> Dict[str, Sequence[int]]:
+    """
+    read sample indices from <directory>/SAMPLING.idx (memory-mapped) or, if it does not exist, <directory>/SAMPLING.json
+
+    Args:
+        directory: e.g. '<data_train>'
+
+    Returns:
+        sample_indices: sorted indices for each file, e.g. {'books_en.jsonl': [2, 4], 'articles_en.jsonl': [0, 3]}
+    """
+    file_path = join(directory, SAMPLE_INDICES_FILES["binary"])
+    if not isfile(file_path):
+        file_path_json = join(directory, SAMPLE_INDICES_FILES["json"])
+        assert isfile(
+            file_path_json
+        ), f"ERROR! neither {file_path} nor {file_path_json} exists."
+        with open(file_path_json, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    with open(file_path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    assert (
+        buffer[: len(MAGIC)] == MAGIC
+    ), f"ERROR! {file_path} is not a sample indices file."
+    header_length = int.from_bytes(buffer[len(MAGIC) : len(MAGIC) + 8], "little")
+    data_start = len(MAGIC) + 8 + header_length
+    header = json.loads(buffer[len(MAGIC) + 8 : data_start].decode("utf-8"))
+
+    sample_indices: Dict[str, Sequence[int]] = {}
+    view = memoryview(buffer)
+    for key, entry in header.items():
+        start = data_start + entry["offset"]
+        end = start + entry["length"] * array(entry["typecode"]).itemsize
+        if sys.byteorder == "little":
+            sample_indices[key] = view[start:end].cast(entry["typecode"])
+        else:
+            sample_indices[key] = array(entry["typecode"], view[start:end].tobytes())
+            sample_indices[key].byteswap()
+    return sample_indices
+
+
+def get_train_key(keys: Iterable[str], category: str, language: str) -> Optional[str]:
+    """
+    key of the training sample of <category> & <language> that contains all others.
+    after nested sampling of several percents (keys '<category>_<language>_<percent>p.jsonl'),
+    this is the key of the largest percent, as its sample contains the samples of all smaller percents.
+
+    Args:
+        keys: keys of the training sample indices, e.g. ['books_en_10p.jsonl', 'books_en_20p.jsonl']
+        category: e.g. 'books'
+        language: e.g. 'en'
+
+    Returns:
+        key: e.g. 'books_en_20p.jsonl', None if there is no training sample of <category> & <language>
+    """
+    keys = list(keys)
+    category_language = f"{category}_{language}.jsonl"
+    if category_language in keys:
+        return category_language
+    pattern = re.compile(rf"{re.escape(category)}_{re.escape(language)}_(\d+)p\.jsonl")
+    nested = {
+        int(match.group(1)): key
+        for key in keys
+        if (match := pattern.fullmatch(key)) is not None
+    }
+    return nested[max(nested)] if len(nested) else None
+
+
+def _aligned(number_of_bytes: int) -> int:
+    """
+    Args:
+        number_of_bytes: e.g. 13
+
+    Returns:
+        number_of_bytes rounded up to a multiple of ALIGNMENT, e.g. 16
+    """
+    return -(-number_of_bytes // ALIGNMENT) * ALIGNMENT
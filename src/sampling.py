@@ -1,10 +1,36 @@
 """Module that contains functions for sampling"""
+import hashlib
+import math
 import random
-from typing import Tuple, List
+from array import array
+from bisect import bisect_left
+from concurrent.futures import Executor
+from itertools import accumulate, count, islice, repeat, tee
+from os.path import getsize
+from typing import (
+    BinaryIO,
+    Callable,
+    Iterable,
+    Iterator,
+    Tuple,
+    List,
+    Optional,
+    Sequence,
+)
+
+from src.compression import open_jsonl
+
+# number of standard deviations by which the candidate threshold of single_pass_sampling
+# exceeds the expected sampling fraction
+SINGLE_PASS_MARGIN = 5.0
+CHUNK_SIZE = 2**22  # 4 MiB
+# number of standard deviations by which the candidate threshold of budget_sampling
+# exceeds the expected sampling fraction (of the bytes)
+BUDGET_MARGIN = 5.0
 
 
 def reservoir_sampling(
-    infile, number_of_sampled_documents: int, exclude: Tuple[int, ...] = ()
+    infile, number_of_sampled_documents: int, exclude: Sequence[int] = ()
 ) -> Tuple[List[str], Tuple[int, ...]]:
     """see
     https://stackoverflow.com/questions/40144869/python-read-random-lines-from-a-very-big-file-and-append-to-another-file
@@ -12,7 +38,7 @@ def reservoir_sampling(
     Args:
         infile: file handler for opened ("r") file
         number_of_sampled_documents: e.g. 100
-        exclude: tuple of excluded lines e.g. (1, 4, 5, )
+        exclude: excluded lines, preferably sorted, e.g. (1, 4, 5, )
 
     Returns:
         sample: sampled documents as single string, e.g.
@@ -23,6 +49,7 @@ def reservoir_sampling(
         sample_indices: e.g. (4, 2)
     """
     iteration = iter(infile)  # n = nr. of original documents, e.g. 5
+    excluded = _sorted_exclude(exclude)  # walked in lockstep with count["iteration"]
 
     # create reservoir of k documents
     sample: List[str] = []
@@ -32,7 +59,7 @@ def reservoir_sampling(
         "skipped": 0,
     }
     while len(sample) < number_of_sampled_documents:
-        if count["iteration"] not in exclude:
+        if not _is_excluded(count["iteration"], excluded, count["skipped"]):
             try:
                 sample.append(next(iteration))  # k = nr. of sampled documents, e.g. 2
                 sample_indices.append(count["iteration"])
@@ -50,7 +77,7 @@ def reservoir_sampling(
     # replace elements in reservoir
     for item in iteration:  # e.g. i = 2, 3, 4
         i = count["iteration"] - count["skipped"]
-        if count["iteration"] not in exclude:
+        if not _is_excluded(count["iteration"], excluded, count["skipped"]):
             random_int = random.randint(0, i)  # (i+1) possible numbers
             if random_int < number_of_sampled_documents:
                 # probability = k / (i+1)
@@ -67,6 +94,82 @@ def reservoir_sampling(
     return sample, tuple(sample_indices)
 
 
+def reservoir_sampling_skip(
+    infile, number_of_sampled_documents: int, exclude: Sequence[int] = ()
+) -> Tuple[List[str], Tuple[int, ...]]:
+    """reservoir sampling with geometric skips (Algorithm L), see
+    https://dl.acm.org/doi/10.1145/198429.198435
+
+    instead of drawing a random number for each document, the number of documents that are skipped
+    before the next replacement in the reservoir is drawn directly.
+    this requires only O(k * log(n/k)) random numbers, and skipped documents are consumed without python bookkeeping.
+
+    Args:
+        infile: file handler for opened ("r") file
+        number_of_sampled_documents: e.g. 100
+        exclude: excluded lines, preferably sorted, e.g. (1, 4, 5, )
+
+    Returns:
+        sample: sampled documents as single string, e.g.
+        [
+            '{"text": "this is test article number 4"}\n',
+            '{"text": "this is test article number 2"}\n',
+        ]
+        sample_indices: e.g. (4, 2)
+    """
+    iteration = iter(infile)
+    excluded = _sorted_exclude(exclude)
+    number_of_excluded = 0  # nr. of excluded lines before the current line
+
+    # create reservoir of k documents
+    sample: List[str] = []
+    sample_indices: List[int] = []
+    line_index = -1
+    while len(sample) < number_of_sampled_documents:
+        line_index += 1
+        try:
+            item = next(iteration)
+        except StopIteration as exc:
+            raise ValueError("Sample larger than population") from exc
+        if _is_excluded(line_index, excluded, number_of_excluded):
+            number_of_excluded += 1
+        else:
+            sample.append(item)
+            sample_indices.append(line_index)
+
+    if number_of_sampled_documents == 0:
+        return sample, tuple(sample_indices)
+
+    # replace elements in reservoir
+    population_index = line_index - number_of_excluded
+    next_line_index = line_index + 1
+    w = math.exp(math.log(_uniform()) / number_of_sampled_documents)
+    while True:
+        # nr. of skipped documents is geometrically distributed with success probability w
+        skip = math.floor(math.log(_uniform()) / math.log1p(-w)) if w < 1.0 else 0
+        population_index += skip + 1
+
+        number_of_excluded = _count_excluded(
+            population_index, excluded, number_of_excluded
+        )
+        line_index = population_index + number_of_excluded
+
+        item = next(islice(iteration, line_index - next_line_index, None), None)
+        if item is None:
+            break
+        next_line_index = line_index + 1
+
+        random_int = min(
+            int(random.random() * number_of_sampled_documents),
+            number_of_sampled_documents - 1,
+        )
+        sample[random_int] = item
+        sample_indices[random_int] = line_index
+        w *= math.exp(math.log(_uniform()) / number_of_sampled_documents)
+
+    return sample, tuple(sample_indices)
+
+
 def reservoir_sampling_original(infile, number_of_sampled_documents: int) -> List[str]:
     """used only as a reference
     taken from
@@ -87,3 +190,940 @@ def reservoir_sampling_original(infile, number_of_sampled_documents: int) -> Lis
 
     # random.shuffle(sample)  # additional cost without effect
     return sample
+
+
+def single_pass_sampling(
+    infile, weight: float, exclude: Sequence[int] = ()
+) -> Tuple[Optional[List[str]], Optional[Tuple[int, ...]], int]:
+    """sample int(weight * n) documents in a single pass, where n = nr. of original documents is not known in advance
+
+    each non-excluded document is assigned a uniform random key,
+    the sample consists of the int(weight * n) documents with the smallest keys (i.e. a uniform random sample).
+    only documents with a key below an adaptive threshold are kept as candidates while reading the file.
+    in the (very unlikely) case that too few candidates are kept, sample = None is returned
+    and the caller needs to fall back to reservoir_sampling() with the now known n.
+
+    Args:
+        infile: file handler for opened ("r") file
+        weight: e.g. 0.5
+        exclude: excluded lines, preferably sorted, e.g. (1, 4, 5, )
+
+    Returns:
+        sample: sampled documents in the order of the original file, e.g.
+        [
+            '{"text": "this is test article number 2"}\n',
+            '{"text": "this is test article number 4"}\n',
+        ]
+        sample_indices: e.g. (2, 4)
+        number_of_original_documents: e.g. 5
+    """
+    candidates, threshold_min, number_of_original_documents = _single_pass_candidates(
+        infile, weight, exclude
+    )
+    excluded = _sorted_exclude(exclude)
+    number_of_sampled_documents = int(weight * number_of_original_documents)
+    population = number_of_original_documents - bisect_left(
+        excluded, number_of_original_documents
+    )
+    if number_of_sampled_documents > population:
+        raise ValueError("Sample larger than population")
+
+    # all documents with key <= threshold_min are guaranteed to be among the candidates
+    candidates.sort()
+    if len(candidates) < number_of_sampled_documents or (
+        number_of_sampled_documents > 0
+        and candidates[number_of_sampled_documents - 1][0] > threshold_min
+    ):
+        return None, None, number_of_original_documents
+
+    selected = sorted(
+        candidates[:number_of_sampled_documents], key=lambda candidate: candidate[1]
+    )
+    sample = [candidate[2] for candidate in selected]
+    sample_indices = tuple(candidate[1] for candidate in selected)
+    return sample, sample_indices, number_of_original_documents
+
+
+def _single_pass_candidates(
+    infile, weight: float, exclude: Sequence[int] = ()
+) -> Tuple[List[Tuple[float, int, str]], float, int]:
+    """
+    read infile once and keep the documents with a random key below an adaptive threshold (see single_pass_sampling)
+
+    Args:
+        infile: file handler for opened ("r") file
+        weight: e.g. 0.5
+        exclude: excluded lines, preferably sorted, e.g. (1, 4, 5, )
+
+    Returns:
+        candidates: (key, line_index, document) for each candidate, e.g. [(0.12, 2, '{"text": ..}\n'), ..]
+        threshold_min: all documents with key <= threshold_min are among the candidates, e.g. 0.73
+        number_of_original_documents: e.g. 5
+    """
+    counter = count()
+    iteration = zip(
+        infile, counter
+    )  # counter yields the nr. of read lines once infile is exhausted
+    excluded = _sorted_exclude(exclude)
+    number_of_excluded = 0  # nr. of excluded lines before the current line
+
+    candidates: List[Tuple[float, int, str]] = []
+    threshold = 1.0
+    threshold_min = 1.0
+    population_index = -1
+    next_line_index = 0
+    next_threshold_update = 0
+    while True:
+        # update threshold whenever the nr. of read non-excluded documents has doubled
+        population = population_index + 1
+        if population >= next_threshold_update:
+            if population > 0:
+                fraction = weight * (population + number_of_excluded) / population
+                threshold = _candidate_threshold(
+                    fraction, population, SINGLE_PASS_MARGIN
+                )
+                threshold_min = min(threshold_min, threshold)
+            next_threshold_update = max(2 * population, 16)
+
+        # nr. of documents with key > threshold until the next candidate is geometrically distributed
+        if threshold < 1.0:
+            skip = math.floor(math.log(_uniform()) / math.log1p(-threshold))
+        else:
+            skip = 0
+        population_index += skip + 1
+        number_of_excluded = _count_excluded(
+            population_index, excluded, number_of_excluded
+        )
+        line_index = population_index + number_of_excluded
+
+        entry = next(islice(iteration, line_index - next_line_index, None), None)
+        if entry is None:
+            break
+        next_line_index = line_index + 1
+        candidates.append((random.random() * threshold, line_index, entry[0]))
+
+    return candidates, threshold_min, next(counter)
+
+
+def _candidate_threshold(fraction: float, population: float, margin: float) -> float:
+    """
+    candidate threshold that exceeds the expected sampling fraction by margin standard deviations
+
+    Args:
+        fraction: expected sampling fraction, e.g. 0.1
+        population: (effective) nr. of documents, e.g. 1000
+        margin: nr. of standard deviations, e.g. 5.0
+
+    Returns:
+        threshold: e.g. 0.148
+    """
+    if population <= 0:
+        return 1.0
+    fraction = min(fraction, 1.0)
+    return min(
+        1.0,
+        fraction
+        + margin * math.sqrt(fraction * max(1.0 - fraction, 0.0) / population)
+        + 1.0 / population,
+    )
+
+
+def budget_threshold(
+    candidates: List[Tuple[float, int, Tuple[int, int]]],
+    threshold: float,
+    number_of_bytes_budget: int,
+) -> float:
+    """
+    candidate threshold for another pass of budget_candidates, if the candidates of a pass did not reach the budget.
+    the candidates with key <= threshold are a uniform sample of the documents with probability threshold,
+    i.e. the total & the effective nr. of (non-excluded) documents can be estimated from their lengths.
+
+    Args:
+        candidates: see budget_candidates
+        threshold: threshold_min of the pass, e.g. 0.1
+        number_of_bytes_budget: e.g. 84
+
+    Returns:
+        threshold: e.g. 0.25
+    """
+    lengths = [candidate[2][1] for candidate in candidates if candidate[0] <= threshold]
+    number_of_bytes = sum(lengths)
+    if number_of_bytes == 0:
+        return min(1.0, 2 * threshold)
+    # effective nr. of documents (sum of lengths)^2 / (sum of squared lengths), scales with the nr. of documents
+    population = (
+        number_of_bytes**2 / sum(length**2 for length in lengths) / threshold
+    )
+    fraction = number_of_bytes_budget * threshold / number_of_bytes
+    return max(
+        _candidate_threshold(fraction, population, BUDGET_MARGIN),
+        min(1.0, 2 * threshold),
+    )
+
+
+def budget_sampling(
+    _byte_ranges: Iterable[Tuple[int, int]],
+    number_of_bytes_budget: int,
+    exclude: Sequence[int] = (),
+) -> Tuple[Optional[List[Tuple[int, int]]], Optional[Tuple[int, ...]], int]:
+    """sample documents in a single pass until their total length reaches number_of_bytes_budget
+
+    each non-excluded document is assigned a uniform random key. the sample consists of the documents
+    with the smallest keys, up to (and including) the one with which the total length reaches the budget,
+    i.e. it is a uniform random sample whose size is determined by the document lengths instead of their number.
+    only documents with a key below an adaptive threshold are kept as candidates while reading (see budget_candidates).
+    in the (very unlikely) case that the candidates do not reach the budget, sample = None is returned
+    and the caller needs to read the documents again with budget_candidates & the threshold from budget_threshold.
+
+    Args:
+        _byte_ranges: (offset, length) of each document, see byte_ranges
+        number_of_bytes_budget: e.g. 84
+        exclude: excluded lines, preferably sorted, e.g. (1, 4, 5, )
+
+    Returns:
+        sample: byte ranges (offset, length) of the sampled documents in random order, e.g. [(82, 42), (0, 42)]
+        sample_indices: line indices of the sampled documents in the same order, e.g. (2, 0)
+        number_of_original_documents: e.g. 5
+    """
+    candidates, threshold_min, number_of_original_documents = budget_candidates(
+        _byte_ranges, 1.0, number_of_bytes_budget, exclude
+    )
+    sample, sample_indices = select_budget(
+        candidates, number_of_bytes_budget, threshold_min
+    )
+    return sample, sample_indices, number_of_original_documents
+
+
+def budget_candidates(
+    _byte_ranges: Iterable[Tuple[int, int]],
+    weight: float,
+    number_of_bytes_reference: Optional[int] = None,
+    exclude: Sequence[int] = (),
+    threshold: Optional[float] = None,
+) -> Tuple[List[Tuple[float, int, Tuple[int, int]]], float, int]:
+    """first part of budget_sampling: read all documents & keep those with a key below a threshold
+
+    the budget is int(weight * number_of_bytes_reference), where the reference is either given
+    or the total length of the documents, which is only known after reading (e.g. for compressed files).
+    the threshold is adapted whenever the nr. of read non-excluded documents has doubled (see single_pass_sampling):
+    the expected fraction of the bytes that is needed, plus BUDGET_MARGIN standard deviations,
+    which depend on the effective nr. of documents (sum of lengths)^2 / (sum of squared lengths).
+    the lengths are estimated from the candidates, the total length from the offsets.
+
+    Args:
+        _byte_ranges: (offset, length) of each document, see byte_ranges
+        weight: e.g. 0.1
+        number_of_bytes_reference: e.g. 2 * 1024**3, None = total length of the documents
+        exclude: excluded lines, preferably sorted, e.g. (1, 4, 5, )
+        threshold: fixed threshold, e.g. 0.6 (see budget_threshold), None = adaptive
+
+    Returns:
+        candidates: (key, line index, byte range) sorted by key, e.g. [(0.1, 2, (82, 42)), (0.3, 0, (0, 42))]
+        threshold_min: all documents with key <= threshold_min are among the candidates, e.g. 0.6
+        number_of_original_documents: e.g. 5
+    """
+    counter = count()
+    iteration = zip(_byte_ranges, counter)
+    excluded = _sorted_exclude(exclude)
+    number_of_excluded = 0
+
+    candidates: List[Tuple[float, int, Tuple[int, int]]] = []
+    adaptive = threshold is None
+    threshold = 1.0 if threshold is None else threshold
+    threshold_min = threshold
+    number_of_bytes = (
+        0  # nr. of bytes up to the current document (incl. excluded documents)
+    )
+    sum_lengths = 0  # of the candidates
+    sum_squared_lengths = 0
+    population_index = -1
+    next_line_index = 0
+    next_threshold_update = 0
+    while True:
+        # update threshold whenever the nr. of read non-excluded documents has doubled
+        population = population_index + 1
+        if adaptive and population >= next_threshold_update:
+            if population > 0 and sum_lengths > 0:
+                number_of_bytes_budget = weight * (
+                    number_of_bytes
+                    if number_of_bytes_reference is None
+                    else number_of_bytes_reference
+                )
+                # bytes of the non-excluded documents, assuming that excluded documents have average length
+                number_of_bytes_population = (
+                    number_of_bytes * population / (population + number_of_excluded)
+                )
+                threshold = _candidate_threshold(
+                    number_of_bytes_budget / number_of_bytes_population,
+                    population
+                    * sum_lengths**2
+                    / sum_squared_lengths
+                    / len(candidates),
+                    BUDGET_MARGIN,
+                )
+                threshold_min = min(threshold_min, threshold)
+            next_threshold_update = max(2 * population, 16)
+
+        # nr. of documents with key > threshold until the next candidate is geometrically distributed
+        if threshold < 1.0:
+            skip = math.floor(math.log(_uniform()) / math.log1p(-threshold))
+        else:
+            skip = 0
+        population_index += skip + 1
+        number_of_excluded = _count_excluded(
+            population_index, excluded, number_of_excluded
+        )
+        line_index = population_index + number_of_excluded
+
+        entry = next(islice(iteration, line_index - next_line_index, None), None)
+        if entry is None:
+            break
+        next_line_index = line_index + 1
+        offset, length = entry[0]
+        number_of_bytes = offset + length
+        sum_lengths += length
+        sum_squared_lengths += length**2
+        candidates.append((random.random() * threshold, line_index, entry[0]))
+
+    number_of_original_documents = next(counter)
+    candidates.sort()
+    return candidates, threshold_min, number_of_original_documents
+
+
+def select_budget(
+    candidates: List[Tuple[float, int, Tuple[int, int]]],
+    number_of_bytes_budget: int,
+    threshold: float,
+) -> Tuple[Optional[List[Tuple[int, int]]], Optional[Tuple[int, ...]]]:
+    """second part of budget_sampling: select the candidates with the smallest keys until the budget is reached
+
+    Args:
+        candidates: see budget_candidates
+        number_of_bytes_budget: e.g. 84
+        threshold: threshold_min of budget_candidates, e.g. 0.6
+
+    Returns:
+        sample: byte ranges (offset, length) of the sampled documents in random order, e.g. [(82, 42), (0, 42)]
+                None if the candidates with key <= threshold do not reach the budget
+        sample_indices: line indices of the sampled documents in the same order, e.g. (2, 0)
+    """
+    number_of_bytes = 0
+    number_of_sampled_documents = 0
+    for candidate in candidates:
+        if number_of_bytes >= number_of_bytes_budget:
+            break
+        if candidate[0] > threshold:
+            # documents with a key between threshold and the candidate's key may be missing
+            return None, None
+        number_of_bytes += candidate[2][1]
+        number_of_sampled_documents += 1
+    else:
+        if number_of_bytes < number_of_bytes_budget and threshold < 1.0:
+            return None, None
+
+    selected = candidates[:number_of_sampled_documents]
+    sample = [candidate[2] for candidate in selected]
+    sample_indices = tuple(candidate[1] for candidate in selected)
+    return sample, sample_indices
+
+
+def _sorted_exclude(exclude: Sequence[int]) -> Sequence[int]:
+    """
+    bring excluded lines into a form that can be walked in lockstep with the line counter,
+    i.e. sorted without duplicates. sorted input (e.g. sample indices read from file) is used as is.
+
+    Args:
+        exclude: excluded lines, e.g. (4, 1, 5, 1)
+
+    Returns:
+        excluded: sorted excluded lines without duplicates, e.g. (1, 4, 5)
+    """
+    if hasattr(exclude, "__getitem__") and all(
+        exclude[i] < exclude[i + 1] for i in range(len(exclude) - 1)
+    ):
+        return exclude
+    return sorted(set(exclude))
+
+
+def _is_excluded(
+    line_index: int, excluded: Sequence[int], number_of_excluded: int
+) -> bool:
+    """
+    check in O(1) whether line_index is excluded, given that lines are visited in ascending order
+
+    Args:
+        line_index: e.g. 4
+        excluded: sorted excluded lines, e.g. [1, 4, 5]
+        number_of_excluded: nr. of excluded lines before line_index, e.g. 1
+
+    Returns:
+        is_excluded: e.g. True
+    """
+    return (
+        number_of_excluded < len(excluded)
+        and excluded[number_of_excluded] == line_index
+    )
+
+
+def _count_excluded(
+    population_index: int, excluded: Sequence[int], number_of_excluded: int
+) -> int:
+    """
+    translate the index of a document among the non-excluded documents to its line index
+
+    Args:
+        population_index: index among the non-excluded documents, e.g. 3
+        excluded: sorted excluded lines, e.g. [1, 4, 5]
+        number_of_excluded: nr. of excluded lines before the previously translated document, e.g. 1
+
+    Returns:
+        number_of_excluded: nr. of excluded lines before the document, e.g. 3 (=> line index = 3 + 3 = 6)
+    """
+    while (
+        number_of_excluded < len(excluded)
+        and excluded[number_of_excluded] <= population_index + number_of_excluded
+    ):
+        number_of_excluded += 1
+    return number_of_excluded
+
+
+def index_sampling(
+    number_of_original_documents: int,
+    number_of_sampled_documents: int,
+    exclude: Sequence[int] = (),
+) -> Tuple[int, ...]:
+    """sample line indices directly, without reading the file.
+    requires the number of original documents to be known in advance (e.g. from a line index)
+
+    Args:
+        number_of_original_documents: e.g. 5
+        number_of_sampled_documents: e.g. 2
+        exclude: excluded lines, preferably sorted, e.g. (1, 4, 5, )
+
+    Returns:
+        sample_indices: sorted, e.g. (2, 4)
+    """
+    excluded = _sorted_exclude(exclude)
+    population = number_of_original_documents - bisect_left(
+        excluded, number_of_original_documents
+    )
+    if number_of_sampled_documents > population:
+        raise ValueError("Sample larger than population")
+
+    sample_indices: List[int] = []
+    number_of_excluded = 0
+    for population_index in sorted(
+        random.sample(range(population), number_of_sampled_documents)
+    ):
+        number_of_excluded = _count_excluded(
+            population_index, excluded, number_of_excluded
+        )
+        sample_indices.append(population_index + number_of_excluded)
+    return tuple(sample_indices)
+
+
+def byte_ranges(
+    infile: BinaryIO, start: int = 0, end: Optional[int] = None
+) -> Iterator[Tuple[int, int]]:
+    """
+    get byte range of each line, to be used as input to the sampling functions instead of the file itself.
+    this way, the sampled documents are not held in memory (see copy_byte_ranges)
+
+    Args:
+        infile: file handler for opened ("rb") file
+        start: offset of the first line, e.g. 0
+        end: offset after the last line (newline-aligned, see shard_file), None = end of file
+
+    Returns:
+        byte_ranges: iterator over (offset, length) of each line, e.g. (0, 42), (42, 40), (82, 42), ..
+    """
+    if start == 0 and end is None:
+        lengths, lengths_copy = tee(map(len, infile))
+    else:
+        lengths, lengths_copy = tee(_line_lengths(infile, start, end))
+    return zip(accumulate(lengths, initial=start), lengths_copy)
+
+
+def _line_lengths(
+    infile: BinaryIO, start: int, end: Optional[int], chunk_size: int = CHUNK_SIZE
+) -> Iterator[int]:
+    """
+    Args:
+        infile: file handler for opened ("rb") file
+        start: e.g. 0
+        end: e.g. 126, None = end of file
+        chunk_size: nr. of bytes that are read at once
+
+    Returns:
+        lengths: lengths (incl. line break) of the lines in the byte range [start, end), e.g. 42, 40, 42, ..
+    """
+    infile.seek(start)
+    position = start
+    carry = 0  # length of the incomplete line at the end of the previous chunk
+    while end is None or position < end:
+        chunk = infile.read(
+            chunk_size if end is None else min(chunk_size, end - position)
+        )
+        if not chunk:
+            break
+        position += len(chunk)
+        parts = chunk.split(b"\n")
+        if len(parts) > 1:
+            yield carry + len(parts[0]) + 1
+            yield from map((1).__add__, map(len, islice(parts, 1, len(parts) - 1)))
+            carry = len(parts[-1])
+        else:
+            carry += len(chunk)
+    if carry:
+        yield carry
+
+
+def shard_file(file_path: str, number_of_shards: int) -> List[Tuple[int, int]]:
+    """
+    split a file into (at most) number_of_shards byte ranges of similar size that start and end at line breaks
+
+    Args:
+        file_path: e.g. '<data_original>/books_en.jsonl'
+        number_of_shards: e.g. 2
+
+    Returns:
+        shards: (start, end) of each byte range, e.g. [(0, 84), (84, 126)]
+    """
+    file_size = getsize(file_path)
+    boundaries = [0]
+    with open(file_path, "rb") as file:
+        for shard in range(1, number_of_shards):
+            position = max(file_size * shard // number_of_shards, boundaries[-1])
+            if position >= file_size:
+                break
+            # move boundary to the start of the next line
+            file.seek(position - 1 if position > 0 else 0)
+            file.readline()
+            position = file.tell()
+            if boundaries[-1] < position < file_size:
+                boundaries.append(position)
+    boundaries.append(file_size)
+    return [
+        (start, end)
+        for start, end in zip(boundaries[:-1], boundaries[1:])
+        if end > start
+    ]
+
+
+def count_lines(file_path: str, start: int = 0, end: Optional[int] = None) -> int:
+    """
+    Args:
+        file_path: e.g. '<data_original>/books_en.jsonl'
+        start: e.g. 0
+        end: e.g. 126, None = end of file
+
+    Returns:
+        number_of_lines: nr. of lines in the byte range [start, end), e.g. 3
+    """
+    with open(file_path, "rb") as infile:
+        return sum(1 for _ in _line_lengths(infile, start, end))
+
+
+def sample_shard(
+    file_path: str,
+    start: int,
+    end: int,
+    weight: float,
+    exclude: Sequence[int] = (),
+    seed: Optional[int] = None,
+) -> Tuple[array, array, array, array, float, int]:
+    """
+    build the local candidate reservoir of a single shard (see shard_file & merge_shard_samples)
+
+    Args:
+        file_path: e.g. '<data_original>/books_en.jsonl'
+        start: e.g. 84
+        end: e.g. 126
+        weight: e.g. 0.5
+        exclude: excluded lines relative to the first line of the shard, e.g. (0, )
+        seed: e.g. 42
+
+    Returns:
+        keys: random keys of the candidates, e.g. array('d', [0.12, ..])
+        line_indices: line indices of the candidates relative to the first line of the shard, e.g. array('Q', [1, ..])
+        offsets: e.g. array('Q', [126, ..])
+        lengths: e.g. array('Q', [42, ..])
+        threshold_min: all documents with key <= threshold_min are among the candidates, e.g. 0.73
+        number_of_documents: nr. of lines in the shard, e.g. 1
+    """
+    if seed is not None:
+        random.seed(seed)
+    with open(file_path, "rb") as infile:
+        candidates, threshold_min, number_of_documents = _single_pass_candidates(
+            byte_ranges(infile, start, end), weight, exclude
+        )
+    return (
+        array("d", [candidate[0] for candidate in candidates]),
+        array("Q", [candidate[1] for candidate in candidates]),
+        array("Q", [candidate[2][0] for candidate in candidates]),
+        array("Q", [candidate[2][1] for candidate in candidates]),
+        threshold_min,
+        number_of_documents,
+    )
+
+
+def merge_shard_samples(
+    shard_samples: Sequence[Tuple[array, array, array, array, float, int]],
+    weight: float,
+    number_of_excluded: int = 0,
+) -> Tuple[Optional[List[Tuple[int, int]]], Optional[Tuple[int, ...]], int]:
+    """
+    merge the local candidate reservoirs of all shards (in the order of the file).
+
+    as each document is assigned an independent uniform random key, the int(weight * n) documents with the
+    smallest keys across all shards are a uniform random sample of the whole file. shards with more documents
+    contribute proportionally more candidates, i.e. the merge is weighted by the shard sizes implicitly.
+    if a shard might have discarded one of those documents, sample = None is returned
+    and the caller needs to fall back to reservoir_sampling_skip() with the now known n.
+
+    Args:
+        shard_samples: output of sample_shard for each shard
+        weight: e.g. 0.5
+        number_of_excluded: total nr. of excluded lines, e.g. 0
+
+    Returns:
+        sample: byte ranges (offset, length) of the sampled documents in the order of the original file
+        sample_indices: global line indices, e.g. (2, 4)
+        number_of_original_documents: e.g. 5
+    """
+    number_of_original_documents = sum(
+        shard_sample[5] for shard_sample in shard_samples
+    )
+    number_of_sampled_documents = int(weight * number_of_original_documents)
+    if number_of_sampled_documents > number_of_original_documents - number_of_excluded:
+        raise ValueError("Sample larger than population")
+
+    candidates: List[Tuple[float, int, int, int]] = []
+    threshold_min = 1.0
+    first_line_index = 0
+    for (
+        keys,
+        line_indices,
+        offsets,
+        lengths,
+        _threshold_min,
+        number_of_documents,
+    ) in shard_samples:
+        candidates.extend(
+            zip(
+                keys,
+                map((first_line_index).__add__, line_indices),
+                offsets,
+                lengths,
+            )
+        )
+        threshold_min = min(threshold_min, _threshold_min)
+        first_line_index += number_of_documents
+
+    candidates.sort()
+    if len(candidates) < number_of_sampled_documents or (
+        number_of_sampled_documents > 0
+        and candidates[number_of_sampled_documents - 1][0] > threshold_min
+    ):
+        return None, None, number_of_original_documents
+
+    selected = sorted(
+        candidates[:number_of_sampled_documents], key=lambda candidate: candidate[1]
+    )
+    sample = [(candidate[2], candidate[3]) for candidate in selected]
+    sample_indices = tuple(candidate[1] for candidate in selected)
+    return sample, sample_indices, number_of_original_documents
+
+
+def sharded_sampling(
+    file_path: str,
+    weight: float,
+    exclude: Sequence[int] = (),
+    number_of_shards: int = 2,
+    executor: Optional[Executor] = None,
+) -> Tuple[Optional[List[Tuple[int, int]]], Optional[Tuple[int, ...]], int]:
+    """
+    sample int(weight * n) documents from a single file by splitting it into newline-aligned shards,
+    which are sampled independently (in parallel if an executor is given) and merged (see merge_shard_samples)
+
+    Args:
+        file_path: e.g. '<data_original>/books_en.jsonl'
+        weight: e.g. 0.5
+        exclude: excluded lines, preferably sorted, e.g. (1, 4, 5, )
+        number_of_shards: e.g. 2
+        executor: e.g. ProcessPoolExecutor(max_workers=2), None = sample shards sequentially
+
+    Returns:
+        sample: byte ranges (offset, length) of the sampled documents in the order of the original file, None if failed
+        sample_indices: global line indices, e.g. (2, 4)
+        number_of_original_documents: e.g. 5
+    """
+    _map = map if executor is None else executor.map
+    shards = shard_file(file_path, number_of_shards)
+    starts, ends = [start for start, _ in shards], [end for _, end in shards]
+    excluded = _sorted_exclude(exclude)
+
+    # the excluded lines of each shard are only known once the nr. of lines of the previous shards is known.
+    # hence, the shards are read once without exclusions and the excluded candidates are dropped afterwards.
+    # to keep enough candidates, the weight of the shards is increased by the fraction of excluded lines
+    # (estimated from the excluded lines themselves, e.g. a uniform training sample).
+    shard_weight = weight
+    if len(excluded):
+        excluded_fraction = len(excluded) / (excluded[-1] + 1)
+        shard_weight = (
+            min(1.0, weight / (1.0 - excluded_fraction))
+            if excluded_fraction < 1.0
+            else 1.0
+        )
+
+    seeds = [random.getrandbits(64) for _ in shards]
+    shard_samples = list(
+        _map(
+            sample_shard,
+            repeat(file_path),
+            starts,
+            ends,
+            repeat(shard_weight),
+            repeat(()),
+            seeds,
+        )
+    )
+    number_of_original_documents = sum(
+        shard_sample[5] for shard_sample in shard_samples
+    )
+    if len(excluded):
+        first_line_indices = accumulate(
+            [shard_sample[5] for shard_sample in shard_samples], initial=0
+        )
+        shard_samples = [
+            _drop_excluded_candidates(shard_sample, excluded, first_line_index)
+            for shard_sample, first_line_index in zip(shard_samples, first_line_indices)
+        ]
+    number_of_excluded = bisect_left(excluded, number_of_original_documents)
+    return merge_shard_samples(shard_samples, weight, number_of_excluded)
+
+
+def _drop_excluded_candidates(
+    shard_sample: Tuple[array, array, array, array, float, int],
+    excluded: Sequence[int],
+    first_line_index: int,
+) -> Tuple[array, array, array, array, float, int]:
+    """
+    drop the excluded lines from the candidates of a shard (see sample_shard).
+    the remaining candidates still contain all non-excluded documents with key <= threshold_min.
+
+    Args:
+        shard_sample: output of sample_shard
+        excluded: sorted global line indices of the excluded lines, e.g. (1, 4, 5, )
+        first_line_index: global line index of the first line of the shard, e.g. 3
+
+    Returns:
+        shard_sample: without the excluded candidates
+    """
+    (
+        keys,
+        line_indices,
+        offsets,
+        lengths,
+        threshold_min,
+        number_of_documents,
+    ) = shard_sample
+    shard_excluded = set(
+        excluded[
+            bisect_left(excluded, first_line_index) : bisect_left(
+                excluded, first_line_index + number_of_documents
+            )
+        ]
+    )
+    kept = [
+        i
+        for i, line_index in enumerate(line_indices)
+        if first_line_index + line_index not in shard_excluded
+    ]
+    return (
+        array("d", [keys[i] for i in kept]),
+        array("Q", [line_indices[i] for i in kept]),
+        array("Q", [offsets[i] for i in kept]),
+        array("Q", [lengths[i] for i in kept]),
+        threshold_min,
+        number_of_documents,
+    )
+
+
+def copy_byte_ranges(
+    file_path: str,
+    _byte_ranges: Iterable[Tuple[int, int]],
+    outfile: BinaryIO,
+    buffer_size: int = 2**20,
+    is_duplicate: Optional[Callable[[int, bytes], bool]] = None,
+) -> int:
+    """
+    copy byte ranges of file_path to outfile in the order of the original file.
+    adjacent byte ranges are merged and copied at once (unless is_duplicate is given).
+
+    Args:
+        file_path: e.g. '<data_original>/books_en.jsonl'
+        _byte_ranges: (offset, length) of each sampled line, e.g. [(82, 42), (0, 42)]
+        outfile: file handler for opened ("wb") file
+        buffer_size: max. nr. of bytes that are held in memory at once
+        is_duplicate: optional, called with the offset & the document, documents for which it returns True are skipped
+
+    Returns:
+        number_of_bytes: nr. of copied bytes, e.g. 84
+    """
+    number_of_bytes = 0
+    position = 0
+    if is_duplicate is not None:
+        with open_jsonl(file_path, "rb") as infile:
+            for offset, length in sorted(_byte_ranges):
+                if offset != position:
+                    _seek(infile, position, offset, buffer_size)
+                document = infile.read(length)
+                position = offset + length
+                if not is_duplicate(offset, document):
+                    outfile.write(document)
+                    number_of_bytes += length
+        return number_of_bytes
+
+    with open_jsonl(file_path, "rb") as infile:
+
+        def _copy(_start: int, _end: int) -> None:
+            nonlocal position
+            _seek(infile, position, _start, buffer_size)
+            position = _end
+            remaining = _end - _start
+            while remaining > 0:
+                chunk = infile.read(min(buffer_size, remaining))
+                if not chunk:
+                    raise ValueError(f"ERROR! {file_path} is shorter than expected")
+                outfile.write(chunk)
+                remaining -= len(chunk)
+
+        start, end = 0, -1
+        for offset, length in sorted(_byte_ranges):
+            if offset != end:
+                if end > start:
+                    _copy(start, end)
+                start, end = offset, offset
+            end += length
+            number_of_bytes += length
+        if end > start:
+            _copy(start, end)
+    return number_of_bytes
+
+
+def nested_ranks(number_of_sampled_documents: int) -> List[int]:
+    """
+    assign a random rank to each sampled document. the documents with start <= rank < end form a uniform random
+    sub-sample of size end - start, i.e. sub-samples with start = 0 are nested and sub-samples with
+    non-overlapping ranges are disjunct
+
+    Args:
+        number_of_sampled_documents: e.g. 4
+
+    Returns:
+        ranks: random permutation of range(number_of_sampled_documents), e.g. [2, 0, 3, 1]
+    """
+    return random.sample(
+        range(number_of_sampled_documents), number_of_sampled_documents
+    )
+
+
+def copy_ranked_byte_ranges(
+    file_path: str,
+    _byte_ranges: Iterable[Tuple[int, int]],
+    ranks: Iterable[int],
+    outfiles: Sequence[BinaryIO],
+    rank_ranges: Sequence[Tuple[int, int]],
+    buffer_size: int = 2**20,
+    is_duplicate: Optional[Callable[[int, bytes], bool]] = None,
+) -> List[int]:
+    """
+    copy byte ranges of file_path to several outfiles in the order of the original file, reading each byte range once.
+    a byte range is copied to outfiles[j] if its rank is in rank_ranges[j], e.g.
+    - nested samples: rank_ranges = [(0, 10), (0, 20)]
+    - disjunct samples: rank_ranges = [(0, 10), (10, 12)]
+
+    Args:
+        file_path: e.g. '<data_original>/books_en.jsonl'
+        _byte_ranges: (offset, length) of each sampled line, e.g. [(82, 42), (0, 42)]
+        ranks: rank of each sampled line (see nested_ranks), e.g. [1, 0]
+        outfiles: file handlers for opened ("wb") files
+        rank_ranges: [start, end) of the ranks for each outfile, e.g. [(0, 1), (0, 2)]
+        buffer_size: e.g. 2**20
+        is_duplicate: optional, called with the offset & the document, documents for which it returns True are skipped
+
+    Returns:
+        numbers_of_bytes: nr. of copied bytes for each outfile, e.g. [42, 84]
+    """
+    numbers_of_bytes = [0] * len(outfiles)
+    with open_jsonl(file_path, "rb") as infile:
+        position = 0
+        for (offset, length), rank in sorted(zip(_byte_ranges, ranks)):
+            if offset != position:
+                _seek(infile, position, offset, buffer_size)
+            document = infile.read(length)
+            position = offset + length
+            if is_duplicate is not None and is_duplicate(offset, document):
+                continue
+            for j, (rank_start, rank_end) in enumerate(rank_ranges):
+                if rank_start <= rank < rank_end:
+                    outfiles[j].write(document)
+                    numbers_of_bytes[j] += length
+    return numbers_of_bytes
+
+
+def get_cell_seed(seed: int, category: str, language: str) -> int:
+    """
+    derive a deterministic random seed for a single combination of category & language,
+    such that the sampled data does not depend on the order (or parallelization) of the combinations
+
+    Args:
+        seed: e.g. 42
+        category: e.g. 'books'
+        language: e.g. 'en'
+
+    Returns:
+        cell_seed: e.g. 3016536349243148612
+    """
+    return int.from_bytes(
+        hashlib.blake2b(
+            f"{seed}_{category}_{language}".encode("utf-8"), digest_size=8
+        ).digest(),
+        "little",
+    )
+
+
+def _seek(infile: BinaryIO, position: int, offset: int, buffer_size: int) -> None:
+    """
+    move to offset, by reading (and discarding) the bytes in between if infile is not seekable (e.g. compressed)
+
+    Args:
+        infile: file handler for opened ("rb") file
+        position: current position, e.g. 42
+        offset: e.g. 82
+        buffer_size: max. nr. of bytes that are held in memory at once
+    """
+    if infile.seekable():
+        infile.seek(offset)
+        return
+    assert (
+        offset >= position
+    ), f"ERROR! cannot seek backwards from {position} to {offset} in stream"
+    remaining = offset - position
+    while remaining > 0:
+        chunk = infile.read(min(buffer_size, remaining))
+        if not chunk:
+            raise ValueError("ERROR! stream is shorter than expected")
+        remaining -= len(chunk)
+
+
+def _uniform() -> float:
+    """
+    Returns:
+        random number drawn uniformly from the open interval (0, 1)
+    """
+    random_float = random.random()
+    while random_float == 0.0:
+        random_float = random.random()
+    return random_float
@@ -0,0 +1,122 @@
+"""Module that contains the SamplingCache class that keeps track of the fingerprints of the sampled files"""
+import hashlib
+import json
+import os
+from array import array
+from os.path import getsize, isfile, join
+from typing import Dict, Optional, Sequence, Union
+
+from src.line_index import get_file_hashes
+
+SAMPLING_CACHE_FILE = "SAMPLING_CACHE.json"
+SAMPLING_CACHE_VERSION = 1
+
+
+def get_cell_fingerprint(
+    file_path_original: str,
+    weight: float,
+    percent: int,
+    seed: int,
+    exclude: Sequence[int] = (),
+    **settings: Union[int, str, bool],
+) -> str:
+    """
+    fingerprint of a single combination of category & language, which changes whenever the sampled data would change
+
+    Args:
+        file_path_original: e.g. '<data_original>/books_en.jsonl'
+        weight: e.g. 0.5
+        percent: e.g. 10
+        seed: e.g. 42
+        exclude: excluded lines, e.g. (1, 4, 5, )
+        settings: other arguments that affect the sampled data, e.g. single_pass=1
+
+    Returns:
+        fingerprint: e.g. '3b5d..'
+    """
+    stat = os.stat(file_path_original)
+    head_hash, tail_hash = get_file_hashes(file_path_original, stat.st_size)
+    content = {
+        "version": SAMPLING_CACHE_VERSION,
+        "file_size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "head_hash": head_hash.hex(),
+        "tail_hash": tail_hash.hex(),
+        "weight": weight,
+        "percent": percent,
+        "seed": seed,
+        "exclude": hashlib.blake2b(
+            array("Q", exclude).tobytes(), digest_size=16
+        ).hexdigest(),
+        "settings": settings,
+    }
+    return hashlib.blake2b(
+        json.dumps(content, sort_keys=True).encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+class SamplingCache:
+    """Class used to keep track of the fingerprints of the sampled files in <directory>/SAMPLING_CACHE.json,
+    such that unchanged combinations of category & language do not need to be sampled again
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: e.g. '<data_train>'
+        """
+        self.file_path = join(directory, SAMPLING_CACHE_FILE)
+        self.entries: Dict[str, Dict[str, Union[str, int]]] = {}
+        if isfile(self.file_path):
+            with open(self.file_path, "r", encoding="utf-8") as file:
+                self.entries = json.load(file)
+
+    def is_valid(
+        self, category_language: str, fingerprint: str, file_path_sampled: str
+    ) -> bool:
+        """
+        Args:
+            category_language: e.g. 'books_en.jsonl'
+            fingerprint: e.g. '3b5d..'
+            file_path_sampled: e.g. '<data_train>/books_en.jsonl'
+
+        Returns:
+            is_valid: True if the sampled file exists & was sampled with the same fingerprint
+        """
+        entry: Optional[Dict[str, Union[str, int]]] = self.entries.get(
+            category_language
+        )
+        return (
+            entry is not None
+            and entry["fingerprint"] == fingerprint
+            and isfile(file_path_sampled)
+            and getsize(file_path_sampled) == entry["file_size"]
+        )
+
+    def update(
+        self, category_language: str, fingerprint: str, file_path_sampled: str
+    ) -> None:
+        """
+        Args:
+            category_language: e.g. 'books_en.jsonl'
+            fingerprint: e.g. '3b5d..'
+            file_path_sampled: e.g. '<data_train>/books_en.jsonl'
+        """
+        self.entries[category_language] = {
+            "fingerprint": fingerprint,
+            "file_size": getsize(file_path_sampled),
+        }
+
+    def remove(self, category_language: str) -> None:
+        """
+        Args:
+            category_language: e.g. 'books_en.jsonl'
+        """
+        self.entries.pop(category_language, None)
+
+    def write(self) -> None:
+        """write fingerprints to <directory>/SAMPLING_CACHE.json"""
+        file_path_tmp = self.file_path + ".tmp"
+        with open(file_path_tmp, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file, indent=2, sort_keys=True)
+        os.replace(file_path_tmp, self.file_path)
@@ -0,0 +1,67 @@
+"""Module that contains functions to split long documents into chunks at sentence or whitespace boundaries"""
+from typing import Iterable, Iterator
+
+MAX_DOCUMENT_LENGTH = 10000  # characters per chunk, used for SP training
+SENTENCE_BOUNDARIES = ["\n", ". ", "! ", "? "]
+WHITESPACES = [" ", "\t", "\r", "\n"]
+
+
+def split_text(text: str, max_length: int) -> Iterator[str]:
+    """
+    split text into chunks of at most max_length characters.
+    each chunk ends after the last sentence boundary in the second half of its window if there is one,
+    else after the last whitespace, else it is cut at max_length characters.
+    the chunks add up to the original text.
+
+    Args:
+        text: e.g. 'This is a test. This is another test.'
+        max_length: e.g. 20
+
+    Returns:
+        chunks: e.g. ['This is a test. ', 'This is another ', 'test.']
+    """
+    assert max_length > 0, f"ERROR! max_length = {max_length} needs to be > 0"
+    start = 0
+    while len(text) - start > max_length:
+        end = start + max_length
+        cut = _find_boundary(text, start + max(1, max_length // 2), end)
+        yield text[start:cut]
+        start = cut
+    yield text[start:]
+
+
+def _find_boundary(text: str, lower: int, upper: int) -> int:
+    """
+    Args:
+        text: e.g. 'This is a test. This is another test.'
+        lower: e.g. 10
+        upper: e.g. 20
+
+    Returns:
+        cut: index in (lower, upper] right after a boundary, upper if there is none, e.g. 16
+    """
+    # str.rfind with start & end searches the window without copying it
+    for boundaries in [SENTENCE_BOUNDARIES, WHITESPACES]:
+        cut = max(
+            text.rfind(boundary, lower, upper) + len(boundary)
+            for boundary in boundaries
+        )
+        # rfind returns -1 (i.e. cut <= lower) if there is no boundary in the window
+        if lower < cut <= upper:
+            return cut
+    return upper
+
+
+def split_documents(texts: Iterable[str], max_length: int) -> Iterator[str]:
+    """
+    generator stage that splits each document using split_text
+
+    Args:
+        texts: e.g. ['This is a test. This is another test.', 'short']
+        max_length: e.g. 20
+
+    Returns:
+        chunks: e.g. ['This is a test. ', 'This is another ', 'test.', 'short']
+    """
+    for text in texts:
+        yield from split_text(text, max_length)
@@ -1,4 +1,48 @@
+import json
+import os
 from os.path import abspath, dirname
+from typing import Any, Dict, Iterable, List, Union
+
+from src.compression import open_jsonl
 
 BASE_DIR = abspath(dirname(dirname(dirname(__file__))))
 TEST_DATA_DIRECTORY_RELATIVE = "src/tests/data"
+
+
+def write_lines(
+    file_path: str, lines: Iterable[Union[str, bytes]], append: bool = False
+) -> str:
+    """
+    write lines to a (compressed) jsonl file, the compression is determined by the file suffix.
+    the mtime is moved ahead by 1s, so that a rewritten file is detected as changed
+    even on file systems with coarse timestamps.
+
+    Args:
+        file_path: e.g. '<tmp_path>/books_en.jsonl.gz'
+        lines: e.g. ['{"text": "a"}\n'] or [b'a\nbb\n']
+        append: append to the (uncompressed) file instead of overwriting it
+
+    Returns:
+        file_path: e.g. '<tmp_path>/books_en.jsonl.gz'
+    """
+    with open(file_path, "ab") if append else open_jsonl(file_path, "wb") as file:
+        for line in lines:
+            file.write(line if isinstance(line, bytes) else line.encode("utf-8"))
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    return file_path
+
+
+def write_jsonl(file_path: str, documents: List[Dict[str, Any]]) -> str:
+    """
+    Args:
+        file_path: e.g. '<tmp_path>/books_en.jsonl.gz'
+        documents: e.g. [{'text': 'this is test book number 0'}]
+
+    Returns:
+        file_path: e.g. '<tmp_path>/books_en.jsonl.gz'
+    """
+    return write_lines(
+        file_path,
+        (json.dumps(document, ensure_ascii=False) + "\n" for document in documents),
+    )
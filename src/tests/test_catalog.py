@@ -0,0 +1,121 @@
+import os
+from os.path import join
+
+from src.catalog import Catalog, CATALOG_FILE, get_category_language, scan_file
+from src.line_index import get_line_index
+from src.tests.helpers import write_jsonl
+
+DOCUMENTS = [
+    {"text": "this is test book number 0"},
+    {"text": "här är testbok nummer 1"},
+]
+
+
+class TestCatalog:
+    def test_get_category_language(self):
+        category_language = get_category_language("<data>/web_crawl_en.jsonl.gz")
+        assert category_language == {
+            "category": "web_crawl",
+            "language": "en",
+        }, f"ERROR! category_language = {category_language}"
+
+    def test_scan_file(self, tmp_path):
+        file_path = join(str(tmp_path), "books_sv.jsonl")
+        write_jsonl(file_path, DOCUMENTS)
+        entry = scan_file(file_path)
+        assert entry["documents"] == 2, f"ERROR! documents = {entry['documents']} != 2"
+        assert entry["bytes"] == os.path.getsize(file_path)
+        assert entry["chars"] == sum(len(document["text"]) for document in DOCUMENTS)
+        assert (entry["category"], entry["language"]) == ("books", "sv")
+        line_index = get_line_index(file_path, create=False)
+        assert line_index is not None, "ERROR! line index was not written"
+        assert line_index.number_of_documents == 2
+
+        # compressed files have the same facts (apart from their size), but no line index
+        file_path_gz = join(str(tmp_path), "books_sv.jsonl.gz")
+        write_jsonl(file_path_gz, DOCUMENTS)
+        entry_gz = scan_file(file_path_gz)
+        for key in ["documents", "bytes", "chars", "checksum"]:
+            assert (
+                entry_gz[key] == entry[key]
+            ), f"ERROR! {key} differs for compressed file"
+        assert entry_gz["line_index"] is False
+
+    def test_scan_file_without_text(self, tmp_path):
+        file_path = join(str(tmp_path), "books_sv.jsonl")
+        write_jsonl(file_path, DOCUMENTS + [{"title": "no text"}])
+        entry = scan_file(file_path)
+        assert entry["documents"] == 3, f"ERROR! documents = {entry['documents']} != 3"
+        assert entry["chars"] == sum(len(document["text"]) for document in DOCUMENTS)
+
+    def test_catalog(self, tmp_path):
+        directory = str(tmp_path)
+        write_jsonl(join(directory, "books_en.jsonl"), DOCUMENTS)
+        write_jsonl(join(directory, "articles_sv.jsonl.gz"), DOCUMENTS[:1])
+
+        catalog = Catalog(directory).refresh(workers=2)
+        assert os.path.isfile(join(directory, CATALOG_FILE))
+        assert catalog.get_languages() == ["en", "sv"]
+        assert catalog.get_file_paths() == [
+            join(directory, "articles_sv.jsonl.gz"),
+            join(directory, "books_en.jsonl"),
+        ]
+        assert catalog.get_file_paths("_en") == [join(directory, "books_en.jsonl")]
+        checksum = catalog.get_entry("books_en.jsonl")["checksum"]
+
+        # changed file is outdated until refresh, removed files are dropped
+        write_jsonl(join(directory, "books_en.jsonl"), DOCUMENTS * 2)
+        os.remove(join(directory, "articles_sv.jsonl.gz"))
+        catalog = Catalog(directory)
+        assert catalog.get_entry("books_en.jsonl") is None
+        catalog.refresh(workers=1)
+        assert catalog.get_entry("books_en.jsonl")["documents"] == 4
+        assert catalog.get_entry("books_en.jsonl")["checksum"] != checksum
+        assert catalog.get_languages() == ["en"]
+
+        # queries are read-only & answered from the catalog, i.e. new files are not listed until refresh
+        write_jsonl(join(directory, "books_is.jsonl"), DOCUMENTS)
+        catalog = Catalog(directory)
+        assert catalog.get_languages() == ["en"]
+        assert catalog.get_file_paths("_is") == []
+        assert catalog.get_entry("books_is.jsonl") is None
+        assert catalog.get_file_size("books_is.jsonl") == os.path.getsize(
+            join(directory, "books_is.jsonl")
+        )
+        assert not os.path.isfile(join(directory, "books_is.jsonl.lineidx"))
+        catalog.refresh(workers=1)
+        assert catalog.get_languages() == ["en", "is"]
+        assert catalog.get_file_paths("_is") == [join(directory, "books_is.jsonl")]
+
+        # unchanged files are not scanned again
+        mtime_ns = os.stat(join(directory, CATALOG_FILE)).st_mtime_ns
+        Catalog(directory).refresh()
+        assert os.stat(join(directory, CATALOG_FILE)).st_mtime_ns == mtime_ns
+
+    def test_catalog_queries(self, tmp_path, monkeypatch):
+        directory = str(tmp_path)
+        write_jsonl(join(directory, "books_en.jsonl"), DOCUMENTS)
+        write_jsonl(join(directory, "articles_sv.jsonl.gz"), DOCUMENTS[:1])
+
+        # without a catalog, the directory is listed
+        catalog = Catalog(directory)
+        assert catalog.get_file_names() == ["articles_sv.jsonl.gz", "books_en.jsonl"]
+        assert catalog.get_languages() == ["en", "sv"]
+        catalog.refresh(workers=1)
+
+        # with a catalog, the directory is neither listed nor stat-ed
+        def _fail(*_args, **_kwargs):
+            raise AssertionError("ERROR! directory listed or file stat-ed")
+
+        catalog = Catalog(directory)
+        monkeypatch.setattr(os, "listdir", _fail)
+        monkeypatch.setattr(os.path, "getsize", _fail)
+        assert catalog.get_file_names() == ["articles_sv.jsonl.gz", "books_en.jsonl"]
+        assert catalog.get_file_paths("_sv") == [
+            join(directory, "articles_sv.jsonl.gz")
+        ]
+        assert catalog.get_languages() == ["en", "sv"]
+        assert (
+            catalog.get_file_size("books_en.jsonl")
+            == catalog.entries["books_en.jsonl"]["file_size"]
+        )
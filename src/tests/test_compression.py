@@ -0,0 +1,70 @@
+import pytest
+import shutil
+from os.path import join
+
+from src.compression import (
+    zstandard,
+    get_jsonl_suffix,
+    is_compressed,
+    open_jsonl,
+    strip_jsonl_suffix,
+)
+
+LINES = [f'{{"text": "this is test document number {i}"}}\n' for i in range(1000)]
+
+
+class TestCompression:
+    @pytest.mark.parametrize(
+        "file_name, suffix, stem, compressed",
+        [
+            ("books_en.jsonl", ".jsonl", "books_en", False),
+            ("books_en.jsonl.gz", ".jsonl.gz", "books_en", True),
+            ("books_en_10p.jsonl.zst", ".jsonl.zst", "books_en_10p", True),
+        ],
+    )
+    def test_suffix(self, file_name: str, suffix: str, stem: str, compressed: bool):
+        assert (
+            get_jsonl_suffix(file_name) == suffix
+        ), f"ERROR! suffix = {get_jsonl_suffix(file_name)} != {suffix}"
+        assert (
+            strip_jsonl_suffix(file_name) == stem
+        ), f"ERROR! stem = {strip_jsonl_suffix(file_name)} != {stem}"
+        assert (
+            is_compressed(file_name) == compressed
+        ), f"ERROR! is_compressed = {is_compressed(file_name)} != {compressed}"
+
+    def test_suffix_unknown(self):
+        assert get_jsonl_suffix("SAMPLING.log") is None
+        assert not is_compressed("SAMPLING.log")
+
+    @pytest.mark.parametrize(
+        "suffix",
+        [
+            ".jsonl",
+            ".jsonl.gz",
+            pytest.param(
+                ".jsonl.zst",
+                marks=pytest.mark.skipif(
+                    zstandard is None and shutil.which("zstd") is None,
+                    reason="neither zstandard nor zstd available",
+                ),
+            ),
+        ],
+    )
+    def test_open_jsonl(self, tmp_path, suffix: str):
+        file_path = join(str(tmp_path), f"books_en{suffix}")
+        with open_jsonl(file_path, "w") as file:
+            file.writelines(LINES)
+
+        with open_jsonl(file_path, "r") as file:
+            test_lines = list(file)
+        assert test_lines == LINES, f"ERROR! lines read from {file_path} differ"
+
+        with open_jsonl(file_path, "rb") as file:
+            first_line = file.readline()
+            number_of_bytes = len(first_line) + sum(len(line) for line in file)
+            assert file.tell() == number_of_bytes, (
+                f"ERROR! tell() = {file.tell()} != {number_of_bytes} "
+                f"(position in the decompressed data)"
+            )
+        assert first_line == LINES[0].encode("utf-8")
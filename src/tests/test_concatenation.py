@@ -0,0 +1,66 @@
+import pytest
+import os
+from os.path import join
+
+from src.concatenation import (
+    copy_file,
+    write_manifest,
+    read_manifest,
+    read_manifest_lines,
+)
+from src.tests.helpers import write_lines
+
+LINES = [
+    [f'{{"text": "this is test article number {i}"}}\n' for i in range(100)],
+    [f'{{"text": "this is test book number {i}"}}\n' for i in range(50)],
+]
+
+
+class TestConcatenation:
+    @pytest.mark.parametrize("supported", [True, False])
+    def test_copy_file(self, tmp_path, monkeypatch, supported: bool):
+        if not supported:
+            # e.g. macOS or a file system without copy_file_range & sendfile support
+            def _raise(*args):
+                raise OSError("not supported")
+
+            monkeypatch.setattr(os, "copy_file_range", _raise, raising=False)
+            monkeypatch.setattr(os, "sendfile", _raise, raising=False)
+        file_paths = [
+            write_lines(join(str(tmp_path), f"{name}_en.jsonl"), lines)
+            for name, lines in zip(["articles", "books"], LINES)
+        ]
+        output_file = join(str(tmp_path), "all_en.jsonl")
+        with open(output_file, "wb") as outfile:
+            outfile.write(b"")
+            numbers_of_bytes = [
+                copy_file(file_path, outfile) for file_path in file_paths
+            ]
+            outfile.write(b"\n")
+        with open(output_file, "r", encoding="utf-8") as file:
+            test_lines = list(file)
+        assert test_lines == LINES[0] + LINES[1] + [
+            "\n"
+        ], "ERROR! concatenation differs"
+        assert numbers_of_bytes == [
+            sum(len(line) for line in lines) for lines in LINES
+        ], f"ERROR! numbers_of_bytes = {numbers_of_bytes}"
+
+    def test_manifest(self, tmp_path):
+        file_paths = [
+            write_lines(join(str(tmp_path), "articles_en.jsonl"), LINES[0]),
+            write_lines(join(str(tmp_path), "books_en.jsonl.gz"), LINES[1]),
+        ]
+        manifest_path = write_manifest(
+            join(str(tmp_path), "all_en.manifest.json"), file_paths
+        )
+        ranges = read_manifest(manifest_path)
+        assert ranges == [
+            (file_paths[0], 0, sum(len(line) for line in LINES[0])),
+            (file_paths[1], 0, None),
+        ], f"ERROR! ranges = {ranges}"
+
+        test_lines = [
+            line.decode("utf-8") for line in read_manifest_lines(manifest_path)
+        ]
+        assert test_lines == LINES[0] + LINES[1], "ERROR! virtual concatenation differs"
@@ -0,0 +1,106 @@
+import json
+import os
+import pytest
+from os.path import join
+from typing import List, Optional
+
+from src.corpus_stats import (
+    StatsCache,
+    get_corpus_stats,
+    get_file_fingerprint,
+    get_stats,
+    group_languages,
+    merge_stats,
+)
+from src.sampling import shard_file
+from src.tests.helpers import write_jsonl
+
+DOCUMENTS = [
+    {"text": "ett två tre", "lang": "sv", "keep": 1},
+    {"text": "one two", "lang": "en", "keep": 1},
+    {"text": "removed", "lang": "en", "keep": 0},
+    {"text": "x", "lang": "en", "len_char": 10, "len_utf8bytes": 11, "len_words": 2},
+]
+STATS = {
+    "char": {"sv": 11, "en": 17},
+    "utf8bytes": {"sv": 12, "en": 18},
+    "words": {"sv": 3, "en": 4},
+}
+
+
+class TestCorpusStats:
+    def test_get_stats(self, tmp_path):
+        file_path = join(str(tmp_path), "wiki.jsonl")
+        write_jsonl(file_path, DOCUMENTS)
+        test_stats = get_stats(file_path)
+        assert test_stats == STATS, f"ERROR! test_stats = {test_stats} != {STATS}"
+
+        # partial statistics of byte ranges add up
+        test_stats = merge_stats(
+            [
+                get_stats(file_path, start, end)
+                for start, end in shard_file(file_path, 3)
+            ]
+        )
+        assert test_stats == STATS, f"ERROR! test_stats = {test_stats} != {STATS}"
+
+    @pytest.mark.parametrize(
+        "languages, grouped_stats",
+        [
+            (None, STATS),
+            (
+                ["sv", "da"],
+                {
+                    "char": {"sv": 11, "da": 0, "other": 17},
+                    "utf8bytes": {"sv": 12, "da": 0, "other": 18},
+                    "words": {"sv": 3, "da": 0, "other": 4},
+                },
+            ),
+        ],
+    )
+    def test_group_languages(self, languages: Optional[List[str]], grouped_stats: dict):
+        test_grouped_stats = group_languages(STATS, languages)
+        assert (
+            test_grouped_stats == grouped_stats
+        ), f"ERROR! test_grouped_stats = {test_grouped_stats} != {grouped_stats}"
+
+    def test_get_corpus_stats(self, tmp_path, capsys):
+        file_paths = [join(str(tmp_path), f"wiki_{i}.jsonl") for i in range(2)]
+        cache_file = join(str(tmp_path), "stats.json")
+        write_jsonl(file_paths[0], DOCUMENTS[:2])
+        write_jsonl(file_paths[1], DOCUMENTS[2:])
+
+        test_stats = get_corpus_stats(file_paths, cache_file, workers=2)
+        assert test_stats == STATS, f"ERROR! test_stats = {test_stats} != {STATS}"
+        assert "analyzed 2 files, 0 files cached" in capsys.readouterr().out
+
+        # only the changed file is analyzed again
+        write_jsonl(file_paths[1], DOCUMENTS[2:3])
+        test_stats = get_corpus_stats(file_paths, cache_file, workers=2)
+        stats = get_stats(file_paths[0])
+        assert test_stats == stats, f"ERROR! test_stats = {test_stats} != {stats}"
+        assert "analyzed 1 files, 1 files cached" in capsys.readouterr().out
+
+    def test_stats_cache(self, tmp_path):
+        file_path = join(str(tmp_path), "wiki.jsonl")
+        cache_file = join(str(tmp_path), "stats.json")
+        write_jsonl(file_path, DOCUMENTS)
+        fingerprint = get_file_fingerprint(file_path)
+
+        cache = StatsCache(cache_file)
+        assert cache.get(file_path, fingerprint) is None
+        cache.update(file_path, fingerprint, STATS)
+        cache.write()
+
+        cache = StatsCache(cache_file)
+        assert cache.get(file_path, fingerprint) == STATS
+        write_jsonl(file_path, DOCUMENTS[:1])
+        assert (
+            get_file_fingerprint(file_path) != fingerprint
+        ), "ERROR! fingerprint did not change after the file was changed"
+
+        # stats files in the old format (without version) are ignored
+        with open(cache_file, "w", encoding="utf-8") as file:
+            json.dump(STATS, file)
+        assert StatsCache(cache_file).entries == {}
+        os.remove(cache_file)
@@ -0,0 +1,142 @@
+import pytest
+import json
+from concurrent.futures import ProcessPoolExecutor
+from os.path import isfile, join
+from typing import List
+
+from src.deduplication import Deduplicator
+from src.sampling import byte_ranges, copy_byte_ranges
+
+
+def _document(text: str, md5: str = "") -> bytes:
+    return (json.dumps({"text": text, "md5": md5}) + "\n").encode("utf-8")
+
+
+_DEDUPLICATOR = None
+
+
+def _set_deduplicator(deduplicator: Deduplicator) -> None:
+    global _DEDUPLICATOR
+    _DEDUPLICATOR = deduplicator
+
+
+def _count_duplicates(texts: List[str]) -> int:
+    return sum(_DEDUPLICATOR.is_duplicate(_document(text)) for text in texts)
+
+
+class TestDeduplication:
+    @pytest.mark.parametrize(
+        "use_md5, documents, duplicates",
+        [
+            (
+                False,
+                [_document("a"), _document("b"), _document("a"), _document("ä")],
+                [False, False, True, False],
+            ),
+            # other fields are ignored
+            (
+                False,
+                [_document("a", "1"), _document("a", "2")],
+                [False, True],
+            ),
+            # the md5 field is trusted if present
+            (
+                True,
+                [_document("a", "1"), _document("b", "1"), _document("a")],
+                [False, True, False],
+            ),
+            (
+                True,
+                [
+                    _document("a", "0cc175b9c0f1b6a831c399e269772661"),  # md5 of "a"
+                    _document("a"),
+                ],
+                [False, True],
+            ),
+            # a missing, empty or non-string md5 field
+            (
+                True,
+                [b'{"text": "a"}\n', _document("a"), b'{"text": "a", "md5": 1}\n'],
+                [False, True, False],
+            ),
+            # documents without text field are kept
+            (
+                False,
+                [b'{"title": "a"}\n', b'{"title": "a"}\n', _document("a")],
+                [False, False, False],
+            ),
+            (
+                True,
+                [b'{"title": "a"}\n', b'{"md5": "1"}\n', _document("b", "1")],
+                [False, False, True],
+            ),
+        ],
+    )
+    def test_is_duplicate(
+        self, use_md5: bool, documents: List[bytes], duplicates: List[bool]
+    ):
+        deduplicator = Deduplicator(capacity=1000, use_md5=use_md5)
+        test_duplicates = [
+            deduplicator.is_duplicate(document) for document in documents
+        ]
+        assert (
+            test_duplicates == duplicates
+        ), f"ERROR! duplicates = {test_duplicates} != {duplicates}"
+        number_of_documents_without_text = sum(
+            b'"text"' not in document and b'"md5"' not in document
+            for document in documents
+        )
+        assert (
+            deduplicator.number_of_documents_without_text
+            == number_of_documents_without_text
+        )
+        assert (
+            deduplicator.number_of_documents
+            == duplicates.count(False) - number_of_documents_without_text
+        )
+        deduplicator.close()
+        assert not isfile(deduplicator.file_path), "ERROR! bit array file not removed"
+
+    def test_is_duplicate_several_processes(self):
+        deduplicator = Deduplicator(capacity=10000)
+        texts = [f"document {i}" for i in range(2000)]
+        # the deduplicator (incl. its lock) is passed to the worker processes on creation, as in script_sampling.py
+        with ProcessPoolExecutor(
+            max_workers=4, initializer=_set_deduplicator, initargs=(deduplicator,)
+        ) as executor:
+            numbers_of_duplicates = list(executor.map(_count_duplicates, [texts] * 4))
+        assert sum(numbers_of_duplicates) == 3 * len(
+            texts
+        ), f"ERROR! nr. of duplicates = {numbers_of_duplicates}, expected {3 * len(texts)} in total"
+        assert deduplicator.number_of_documents == len(texts)
+        deduplicator.close()
+
+    def test_copy_byte_ranges_with_deduplication(self, tmp_path):
+        file_path = join(str(tmp_path), "test.jsonl")
+        documents = [_document(text) for text in ["a", "b", "a", "c", "b"]]
+        with open(file_path, "wb") as file:
+            file.writelines(documents)
+        with open(file_path, "rb") as infile:
+            _byte_ranges = list(byte_ranges(infile))
+
+        deduplicator = Deduplicator(capacity=100)
+        duplicate_offsets = []
+
+        def is_duplicate(offset: int, document: bytes) -> bool:
+            if deduplicator.is_duplicate(document):
+                duplicate_offsets.append(offset)
+                return True
+            return False
+
+        output_file_path = join(str(tmp_path), "test_sampled.jsonl")
+        with open(output_file_path, "wb") as outfile:
+            number_of_bytes = copy_byte_ranges(
+                file_path, _byte_ranges[::-1], outfile, is_duplicate=is_duplicate
+            )
+        deduplicator.close()
+
+        with open(output_file_path, "rb") as file:
+            test_documents = list(file)
+        assert test_documents == documents[:2] + documents[3:4]
+        assert number_of_bytes == sum(len(document) for document in test_documents)
+        assert duplicate_offsets == [_byte_ranges[2][0], _byte_ranges[4][0]]
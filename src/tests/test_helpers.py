@@ -1,6 +1,8 @@
 import pytest
+from datasets import Dataset
 from tokenizers.normalizers import Normalizer
-from src.helpers import get_normalizer
+from src.helpers import get_normalizer, get_training_corpus_combined
+from src.upsampling import TrainingRepeats
 
 
 class TestHelpers:
@@ -21,3 +23,24 @@ class TestHelpers:
             assert isinstance(
                 test_normalizer, Normalizer
             ), f"ERROR! test_normalizer is not a Normalizer instance."
+
+    @pytest.mark.parametrize(
+        "repeats, batches",
+        [
+            ([1, 0, 2], [str(["a", "c"]), str(["c"])]),
+            ([1, 0], None),
+        ],
+    )
+    def test_get_training_corpus_combined_repeats(self, repeats, batches):
+        dataset = {"train": Dataset.from_dict({"text": ["a", "b", "c"]})}
+        training_repeats = TrainingRepeats(len(repeats), iter(repeats))
+        if batches is None:
+            with pytest.raises(AssertionError):
+                list(get_training_corpus_combined(dataset, 2, repeats=training_repeats))
+        else:
+            test_batches = list(
+                get_training_corpus_combined(dataset, 2, repeats=training_repeats)
+            )
+            assert (
+                test_batches == batches
+            ), f"ERROR! test_batches = {test_batches} != {batches}"
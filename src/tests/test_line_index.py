@@ -0,0 +1,74 @@
+import pytest
+import os
+from os.path import join
+from typing import List
+
+from src.line_index import LineIndex, get_line_index, LINE_INDEX_SUFFIX
+from src.tests.helpers import BASE_DIR, write_lines
+
+
+class TestLineIndex:
+    @pytest.mark.parametrize(
+        "content, chunk_size",
+        [
+            (b"", 4),
+            (b"a\n", 4),
+            (b"a\nbb\nccc\n", 4),
+            (b"a\nbb\nccc", 2),
+            (b"\n\n\nlonger line\n", 3),
+        ],
+    )
+    def test_build(self, tmp_path, content: bytes, chunk_size: int):
+        file_path = join(str(tmp_path), "test_en.jsonl")
+        write_lines(file_path, [content])
+        lines = content.splitlines(keepends=True)
+
+        test_line_index = LineIndex.build(file_path, chunk_size=chunk_size)
+        assert test_line_index.number_of_documents == len(
+            lines
+        ), f"ERROR! number_of_documents = {test_line_index.number_of_documents} != {len(lines)}"
+        assert (
+            list(test_line_index.read_lines(range(len(lines)))) == lines
+        ), f"ERROR! lines read via line index differ from {lines}"
+
+    def test_get_line_index(self):
+        file_path = join(
+            BASE_DIR, "src", "tests", "data", "test_data_original", "articles_en.jsonl"
+        )
+        assert get_line_index(file_path, create=False) is None
+        with open(file_path, "rb") as file:
+            lines = list(file)
+
+        try:
+            test_line_index = get_line_index(file_path)
+            assert test_line_index.is_fresh(), "ERROR! line index is not fresh"
+            test_line_index_loaded = get_line_index(file_path, create=False)
+            assert list(test_line_index_loaded.ends) == list(test_line_index.ends)
+            assert list(test_line_index_loaded.read_lines([3, 1])) == [
+                lines[3],
+                lines[1],
+            ]
+        finally:
+            os.remove(file_path + LINE_INDEX_SUFFIX)
+
+    @pytest.mark.parametrize(
+        "content, appended, lines",
+        [
+            (b"a\nbb\n", b"ccc\n", [b"a\n", b"bb\n", b"ccc\n"]),
+            (b"a\nbb", b"b\nccc", [b"a\n", b"bbb\n", b"ccc"]),
+        ],
+    )
+    def test_refresh_appended(
+        self, tmp_path, content: bytes, appended: bytes, lines: List[bytes]
+    ):
+        file_path = join(str(tmp_path), "test_en.jsonl")
+        write_lines(file_path, [content])
+        _ = get_line_index(file_path)
+
+        write_lines(file_path, [appended], append=True)
+        assert (
+            get_line_index(file_path, create=False) is None
+        ), "ERROR! stale line index"
+        test_line_index = get_line_index(file_path)
+        assert list(test_line_index.read_lines(range(len(lines)))) == lines
+        assert test_line_index.number_of_documents == len(lines)
@@ -0,0 +1,44 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from os.path import join
+
+from src.logger import Logger, CellLogger, LOG_FILE, METRICS_FILE
+
+
+def _log_metrics(logger: Logger, i: int) -> None:
+    for j in range(100):
+        logger.log_metrics({"worker": i, "j": j, "text": "x" * 1000})
+
+
+class TestLogger:
+    def test_log_print(self, tmp_path):
+        logger = Logger(str(tmp_path))
+        logger.initialize(percent="10", sampling_weights={"books": {"en": 0.5}})
+        logger.log_print("a", end="")
+        logger.log_print("b")
+        cell_logger = CellLogger()
+        cell_logger.log_print("c")
+        cell_logger.log_print()
+        logger.log_messages(cell_logger.messages)
+
+        # the log file is readable before the logger is closed
+        with open(join(str(tmp_path), LOG_FILE), "r", encoding="utf-8") as file:
+            lines = file.read().split("\n")
+        assert "  books, en: 0.5" in lines, f"ERROR! weights missing in {lines}"
+        assert lines[-4:] == ["ab", "c", "", ""], f"ERROR! lines = {lines[-4:]}"
+        logger.close()
+
+    def test_log_metrics_from_several_processes(self, tmp_path):
+        logger = Logger(str(tmp_path))
+        logger.initialize(percent="10", sampling_weights={})
+        logger.log_metrics({"worker": -1, "j": 0, "text": ""})
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(_log_metrics, [logger] * 4, range(4)))
+        logger.close()
+
+        with open(join(str(tmp_path), METRICS_FILE), "r", encoding="utf-8") as file:
+            records = [json.loads(line) for line in file]
+        assert len(records) == 401, f"ERROR! nr. of records = {len(records)} != 401"
+        assert sorted((record["worker"], record["j"]) for record in records) == [
+            (-1, 0)
+        ] + [(i, j) for i in range(4) for j in range(100)]
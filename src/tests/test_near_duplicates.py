@@ -0,0 +1,127 @@
+import pytest
+import json
+import random
+from os.path import join
+from typing import List
+
+from src.near_duplicates import (
+    get_shingle_hashes,
+    get_signature,
+    get_band_keys,
+    get_band_keys_of_file,
+    NearDuplicateIndex,
+)
+from src.sampling import shard_file
+
+random.seed(1)
+WORDS = [f"word{i}" for i in range(1000)]
+TEXTS = [" ".join(random.choice(WORDS) for _ in range(200)) for _ in range(3)]
+
+
+def _jaccard(text_1: str, text_2: str) -> float:
+    shingles_1, shingles_2 = set(get_shingle_hashes(text_1)), set(
+        get_shingle_hashes(text_2)
+    )
+    return len(shingles_1 & shingles_2) / len(shingles_1 | shingles_2)
+
+
+def _modify(text: str, number_of_words: int) -> str:
+    words = text.split()
+    for i in range(number_of_words):
+        words[i * len(words) // number_of_words] = "modified"
+    return " ".join(words)
+
+
+class TestNearDuplicates:
+    @pytest.mark.parametrize(
+        "text, shingle_hashes_length",
+        [
+            ("", 1),
+            ("a b c", 1),
+            ("a b c d e f", 2),
+            ("a b c d e a b c d e", 5),
+        ],
+    )
+    def test_get_shingle_hashes(self, text: str, shingle_hashes_length: int):
+        shingle_hashes = get_shingle_hashes(text, ngram=5)
+        assert (
+            len(shingle_hashes) == shingle_hashes_length
+        ), f"ERROR! nr. of shingle hashes = {len(shingle_hashes)} != {shingle_hashes_length}"
+        assert shingle_hashes == sorted(shingle_hashes)
+
+    @pytest.mark.parametrize("number_of_words", [0, 2, 10, 50])
+    def test_get_signature(self, number_of_words: int):
+        text_1 = TEXTS[0]
+        text_2 = _modify(text_1, number_of_words)
+        signature_1 = get_signature(get_shingle_hashes(text_1))
+        signature_2 = get_signature(get_shingle_hashes(text_2))
+        similarity = sum(a == b for a, b in zip(signature_1, signature_2)) / len(
+            signature_1
+        )
+        jaccard = _jaccard(text_1, text_2)
+        assert (
+            abs(similarity - jaccard) < 0.15
+        ), f"ERROR! estimated similarity = {similarity} differs from jaccard similarity = {jaccard}"
+
+    def test_get_signature_short_text(self):
+        signature = get_signature(get_shingle_hashes("a"), number_of_bins=8)
+        assert len(set(signature)) == 8, "ERROR! empty bins are not densified"
+
+    @pytest.mark.parametrize(
+        "texts, duplicates",
+        [
+            (TEXTS, [False, False, False]),
+            (TEXTS + TEXTS[:1], [False, False, False, True]),
+            ([TEXTS[0], _modify(TEXTS[0], 2), TEXTS[1]], [False, True, False]),
+            ([TEXTS[0], _modify(TEXTS[0], 50)], [False, False]),
+        ],
+    )
+    def test_near_duplicate_index(self, texts: List[str], duplicates: List[bool]):
+        index = NearDuplicateIndex(number_of_bands=16)
+        test_duplicates = [
+            index.is_duplicate(
+                get_band_keys(get_signature(get_shingle_hashes(text)), 16)
+            )
+            for text in texts
+        ]
+        assert (
+            test_duplicates == duplicates
+        ), f"ERROR! duplicates = {test_duplicates} != {duplicates}"
+
+    @pytest.mark.parametrize("buffer_size", [1, 3, 16])
+    def test_near_duplicate_index_runs(self, buffer_size: int):
+        rng = random.Random(42)
+        band_keys = [
+            [rng.randint(-(2**63), 2**63 - 1) for _ in range(4)] for _ in range(100)
+        ]
+        band_keys += [
+            [rng.randint(-(2**63), 2**63 - 1) for _ in range(3)] + [keys[3]]
+            for keys in band_keys[::7]
+        ]
+        index = NearDuplicateIndex(number_of_bands=4, buffer_size=buffer_size)
+        test_duplicates = [index.is_duplicate(keys) for keys in band_keys]
+        duplicates = [False] * 100 + [True] * len(band_keys[100:])
+        assert (
+            test_duplicates == duplicates
+        ), f"ERROR! duplicates = {test_duplicates} != {duplicates}"
+        assert len(index) == 100, f"ERROR! len(index) = {len(index)} != 100"
+        for runs in index.runs:
+            assert all(
+                list(run) == sorted(run) for run in runs
+            ), "ERROR! runs not sorted"
+            assert len(runs) <= 8, f"ERROR! nr. of runs = {len(runs)} too large"
+
+    @pytest.mark.parametrize("number_of_shards", [1, 3])
+    def test_get_band_keys_of_file(self, tmp_path, number_of_shards: int):
+        file_path = join(str(tmp_path), "test.jsonl")
+        with open(file_path, "w", encoding="utf-8") as file:
+            for text in TEXTS * 3:
+                file.write(json.dumps({"text": text}) + "\n")
+
+        band_keys = []
+        for start, end in shard_file(file_path, number_of_shards):
+            band_keys.extend(
+                get_band_keys_of_file(file_path, start, end, number_of_bands=4)
+            )
+        assert len(band_keys) == 4 * 9, f"ERROR! nr. of band keys = {len(band_keys)}"
+        assert band_keys[:12] == band_keys[12:24] == band_keys[24:]
@@ -0,0 +1,66 @@
+import pytest
+from typing import Dict, List, Optional, Sequence
+from os.path import isfile, join
+
+from src.sample_indices import (
+    get_train_key,
+    read_sample_indices,
+    write_sample_indices,
+    SAMPLE_INDICES_FILES,
+)
+
+
+class TestSampleIndices:
+    @pytest.mark.parametrize(
+        "file_format, sample_indices",
+        [
+            ("binary", {"articles_en.jsonl": (3, 1), "books_en.jsonl": (2, 0, 1)}),
+            ("binary", {"articles_en.jsonl": (), "books_en.jsonl": (5,)}),
+            ("binary", {"articles_en.jsonl": (2**32 + 7, 0, 2**40)}),
+            ("json", {"articles_en.jsonl": (3, 1), "books_en.jsonl": (2, 0, 1)}),
+        ],
+    )
+    def test_write_and_read_sample_indices(
+        self, tmp_path, file_format: str, sample_indices: Dict[str, Sequence[int]]
+    ):
+        file_path = write_sample_indices(str(tmp_path), sample_indices, file_format)
+        assert file_path == join(
+            str(tmp_path), SAMPLE_INDICES_FILES[file_format]
+        ), f"ERROR! file_path = {file_path} unexpected"
+
+        test_sample_indices = read_sample_indices(str(tmp_path))
+        assert (
+            test_sample_indices.keys() == sample_indices.keys()
+        ), f"ERROR! keys = {test_sample_indices.keys()} != {sample_indices.keys()}"
+        for key, indices in sample_indices.items():
+            assert list(test_sample_indices[key]) == sorted(
+                indices
+            ), f"ERROR! test_sample_indices[{key}] = {list(test_sample_indices[key])} != {sorted(indices)}"
+
+    def test_write_sample_indices_removes_other_format(self, tmp_path):
+        _ = write_sample_indices(str(tmp_path), {"articles_en.jsonl": (1,)}, "binary")
+        _ = write_sample_indices(str(tmp_path), {"articles_en.jsonl": (2,)}, "json")
+        assert not isfile(
+            join(str(tmp_path), SAMPLE_INDICES_FILES["binary"])
+        ), "ERROR! stale binary sample indices file was not removed"
+        assert list(read_sample_indices(str(tmp_path))["articles_en.jsonl"]) == [2]
+
+    @pytest.mark.parametrize(
+        "keys, key",
+        [
+            (["books_en.jsonl", "books_sv.jsonl"], "books_en.jsonl"),
+            (
+                [
+                    "books_en_10p.jsonl",
+                    "books_en_20p.jsonl",
+                    "books_en_5p.jsonl",
+                    "books_hq_en_50p.jsonl",
+                ],
+                "books_en_20p.jsonl",
+            ),
+            (["books_hq_en.jsonl", "books_en_10.jsonl"], None),
+        ],
+    )
+    def test_get_train_key(self, keys: List[str], key: Optional[str]):
+        test_key = get_train_key(keys, "books", "en")
+        assert test_key == key, f"ERROR! test_key = {test_key} != {key}"
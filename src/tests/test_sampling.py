@@ -1,9 +1,29 @@
 import pytest
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from os.path import join
+from collections import Counter
+import io
+from itertools import accumulate, combinations
 import random
 
-from src.sampling import reservoir_sampling, reservoir_sampling_original
+from src.sampling import (
+    budget_candidates,
+    budget_sampling,
+    budget_threshold,
+    byte_ranges,
+    copy_byte_ranges,
+    copy_ranked_byte_ranges,
+    get_cell_seed,
+    index_sampling,
+    nested_ranks,
+    reservoir_sampling,
+    reservoir_sampling_original,
+    reservoir_sampling_skip,
+    select_budget,
+    shard_file,
+    sharded_sampling,
+    single_pass_sampling,
+)
 from src.tests.helpers import BASE_DIR
 
 
@@ -217,6 +237,607 @@ class TestSampling:
                     test_sample, None, number_of_sampled_documents, sample, None
                 )
 
+    @pytest.mark.parametrize(
+        "input_file, weight, exclude, number_of_sampled_documents",
+        [
+            ("articles_en.jsonl", 0.5, (), 2),
+            ("articles_en.jsonl", 0.75, (1,), 3),
+            ("articles_en.jsonl", 1.0, (), 4),
+            ("articles_en.jsonl", 1.0, (1,), None),
+            ("test.jsonl", 0.3, (), 30),
+            ("test.jsonl", 0.3, tuple(range(0, 100, 2)), 30),
+        ],
+    )
+    def test_single_pass_sampling(
+        self,
+        input_file: str,
+        weight: float,
+        exclude: Tuple[int],
+        number_of_sampled_documents: int,
+    ):
+        input_file_path = join(
+            BASE_DIR, "src", "tests", "data", "test_data_original", input_file
+        )
+        with open(input_file_path, "r") as infile:
+            lines = list(infile)
+
+        for random_seed in range(20):
+            random.seed(random_seed)
+            if number_of_sampled_documents is None:
+                with pytest.raises(ValueError):
+                    _ = single_pass_sampling(lines, weight, exclude)
+                continue
+
+            (
+                test_sample,
+                test_sample_indices,
+                test_number_of_original_documents,
+            ) = single_pass_sampling(lines, weight, exclude)
+            assert test_number_of_original_documents == len(
+                lines
+            ), f"ERROR! number_of_original_documents = {test_number_of_original_documents} != {len(lines)}"
+            assert test_sample is not None, "ERROR! single pass sampling failed."
+            _test_sampling(
+                test_sample,
+                test_sample_indices,
+                number_of_sampled_documents,
+                [lines[index] for index in test_sample_indices],
+                test_sample_indices,
+            )
+            assert list(test_sample_indices) == sorted(
+                set(test_sample_indices)
+            ), f"ERROR! sample_indices = {test_sample_indices} not unique & sorted"
+            assert not set(test_sample_indices).intersection(
+                exclude
+            ), f"ERROR! sample_indices = {test_sample_indices} contain excluded lines"
+
+    @pytest.mark.parametrize(
+        "input_file, number_of_sampled_documents, exclude",
+        [
+            ("articles_en.jsonl", 0, ()),
+            ("articles_en.jsonl", 2, ()),
+            ("articles_en.jsonl", 3, (1,)),
+            ("articles_en.jsonl", 4, ()),
+            ("articles_en.jsonl", 5, ()),
+            ("articles_en.jsonl", 4, (1,)),
+            ("test.jsonl", 10, tuple(range(0, 100, 3))),
+        ],
+    )
+    def test_reservoir_sampling_skip(
+        self,
+        input_file: str,
+        number_of_sampled_documents: int,
+        exclude: Tuple[int],
+    ):
+        input_file_path = join(
+            BASE_DIR, "src", "tests", "data", "test_data_original", input_file
+        )
+        with open(input_file_path, "r") as infile:
+            lines = list(infile)
+
+        random.seed(42)
+        if number_of_sampled_documents > len(lines) - len(exclude):
+            with pytest.raises(ValueError):
+                with open(input_file_path, "r") as infile:
+                    _ = reservoir_sampling_skip(
+                        infile, number_of_sampled_documents, exclude
+                    )
+        else:
+            with open(input_file_path, "r") as infile:
+                test_sample, test_sample_indices = reservoir_sampling_skip(
+                    infile, number_of_sampled_documents, exclude
+                )
+            _test_sampling(
+                test_sample,
+                test_sample_indices,
+                number_of_sampled_documents,
+                [lines[index] for index in test_sample_indices],
+                test_sample_indices,
+            )
+            assert len(set(test_sample_indices)) == len(
+                test_sample_indices
+            ), f"ERROR! sample_indices = {test_sample_indices} not unique"
+            assert not set(test_sample_indices).intersection(
+                exclude
+            ), f"ERROR! sample_indices = {test_sample_indices} contain excluded lines"
+
+    @pytest.mark.parametrize(
+        "sampling_function, exclude",
+        [
+            ("reservoir_sampling_original", ()),
+            ("reservoir_sampling", ()),
+            ("reservoir_sampling", (1, 4)),
+            ("reservoir_sampling_skip", ()),
+            ("reservoir_sampling_skip", (1, 4)),
+            ("single_pass_sampling", ()),
+            ("single_pass_sampling", (1, 4)),
+            ("index_sampling", ()),
+            ("index_sampling", (1, 4)),
+            ("sharded_sampling", ()),
+            ("sharded_sampling", (1, 4)),
+            ("budget_sampling", ()),
+            ("budget_sampling", (1, 4)),
+        ],
+    )
+    def test_sampling_uniformity(
+        self, tmp_path, sampling_function: str, exclude: Tuple[int]
+    ):
+        """chi-squared test: each subset of k out of n (non-excluded) documents is sampled equally often"""
+        number_of_documents = 8
+        number_of_sampled_documents = 2
+        number_of_trials = 6000
+        population = [i for i in range(number_of_documents) if i not in exclude]
+        subsets = list(combinations(population, number_of_sampled_documents))
+        file_path = join(str(tmp_path), "documents.jsonl")
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write("".join(f"{i}\n" for i in range(number_of_documents)))
+
+        random.seed(42)
+        counter: Counter = Counter()
+        for _ in range(number_of_trials):
+            documents = range(number_of_documents)
+            if sampling_function == "reservoir_sampling_original":
+                test_sample = reservoir_sampling_original(
+                    documents, number_of_sampled_documents
+                )
+            elif sampling_function == "reservoir_sampling":
+                test_sample, _ = reservoir_sampling(
+                    documents, number_of_sampled_documents, exclude
+                )
+            elif sampling_function == "reservoir_sampling_skip":
+                test_sample, _ = reservoir_sampling_skip(
+                    documents, number_of_sampled_documents, exclude
+                )
+            elif sampling_function == "index_sampling":
+                test_sample = index_sampling(
+                    number_of_documents, number_of_sampled_documents, exclude
+                )
+            elif sampling_function == "budget_sampling":
+                # documents of equal length (1 byte), i.e. a budget of 2 bytes corresponds to 2 documents
+                _, test_sample, _ = budget_sampling(
+                    [(i, 1) for i in documents],
+                    number_of_sampled_documents,
+                    exclude,
+                )
+            elif sampling_function == "sharded_sampling":
+                _, test_sample, _ = sharded_sampling(
+                    file_path,
+                    number_of_sampled_documents / number_of_documents,
+                    exclude,
+                    number_of_shards=3,
+                )
+            else:
+                test_sample, _, _ = single_pass_sampling(
+                    documents,
+                    number_of_sampled_documents / number_of_documents,
+                    exclude,
+                )
+            counter[tuple(sorted(test_sample))] += 1
+
+        assert set(counter.keys()) == set(
+            subsets
+        ), f"ERROR! sampled subsets = {sorted(counter.keys())} != {subsets}"
+        expected = number_of_trials / len(subsets)
+        chi_squared = sum(
+            (counter[subset] - expected) ** 2 / expected for subset in subsets
+        )
+        # 99.9% quantile of the chi-squared distribution with 27 (14) degrees of freedom = 55.5 (36.1)
+        threshold = 55.5 if len(subsets) == 28 else 36.1
+        assert (
+            chi_squared < threshold
+        ), f"ERROR! chi_squared = {chi_squared:.1f} >= {threshold} for {sampling_function}"
+
+    @pytest.mark.parametrize(
+        "number_of_original_documents, number_of_sampled_documents, exclude",
+        [
+            (5, 0, ()),
+            (5, 2, ()),
+            (5, 5, ()),
+            (5, 6, ()),
+            (5, 3, (0, 2)),
+            (5, 4, (0, 2)),
+            (100, 30, (4, 1, 1, 99)),
+        ],
+    )
+    def test_index_sampling(
+        self,
+        number_of_original_documents: int,
+        number_of_sampled_documents: int,
+        exclude: Tuple[int],
+    ):
+        random.seed(42)
+        if number_of_sampled_documents > number_of_original_documents - len(
+            set(exclude)
+        ):
+            with pytest.raises(ValueError):
+                _ = index_sampling(
+                    number_of_original_documents, number_of_sampled_documents, exclude
+                )
+        else:
+            test_sample_indices = index_sampling(
+                number_of_original_documents, number_of_sampled_documents, exclude
+            )
+            assert isinstance(test_sample_indices, tuple)
+            assert len(test_sample_indices) == number_of_sampled_documents
+            assert list(test_sample_indices) == sorted(set(test_sample_indices))
+            assert all(
+                0 <= index < number_of_original_documents
+                for index in test_sample_indices
+            )
+            assert not set(test_sample_indices).intersection(exclude)
+
+    @pytest.mark.parametrize(
+        "exclude",
+        [
+            (5, 1, 17, 1, 3),
+            {1, 3, 5, 17},
+            list(range(99, 0, -2)),
+        ],
+    )
+    def test_exclude_unsorted(self, exclude):
+        input_file_path = join(
+            BASE_DIR, "src", "tests", "data", "test_data_original", "test.jsonl"
+        )
+        exclude_sorted = tuple(sorted(set(exclude)))
+        for sampling_function in [
+            reservoir_sampling,
+            reservoir_sampling_skip,
+            lambda infile, k, _exclude: single_pass_sampling(infile, k / 100, _exclude),
+        ]:
+            test_samples = []
+            for _exclude in [exclude, exclude_sorted]:
+                random.seed(42)
+                with open(input_file_path, "r") as infile:
+                    test_samples.append(sampling_function(infile, 20, _exclude))
+            assert (
+                test_samples[0] == test_samples[1]
+            ), f"ERROR! exclude = {exclude} and exclude = {exclude_sorted} lead to different samples"
+            assert not set(test_samples[0][1]).intersection(
+                exclude_sorted
+            ), f"ERROR! sample_indices = {test_samples[0][1]} contain excluded lines"
+
+    @pytest.mark.parametrize(
+        "input_file, number_of_sampled_documents, exclude",
+        [
+            ("articles_en.jsonl", 2, ()),
+            ("articles_en.jsonl", 3, (1,)),
+            ("test.jsonl", 50, (0, 17, 99)),
+            ("test.jsonl", 97, (0, 17, 99)),
+        ],
+    )
+    def test_byte_ranges(
+        self,
+        input_file: str,
+        number_of_sampled_documents: int,
+        exclude: Tuple[int],
+    ):
+        input_file_path = join(
+            BASE_DIR, "src", "tests", "data", "test_data_original", input_file
+        )
+        with open(input_file_path, "rb") as infile:
+            lines = list(infile)
+
+        with open(input_file_path, "rb") as infile:
+            test_byte_ranges = list(byte_ranges(infile))
+        assert test_byte_ranges == [
+            (sum(len(line) for line in lines[:i]), len(lines[i]))
+            for i in range(len(lines))
+        ], f"ERROR! test_byte_ranges = {test_byte_ranges} incorrect"
+
+        random.seed(42)
+        with open(input_file_path, "rb") as infile:
+            test_sample, test_sample_indices = reservoir_sampling_skip(
+                byte_ranges(infile), number_of_sampled_documents, exclude
+            )
+        outfile = io.BytesIO()
+        number_of_bytes = copy_byte_ranges(input_file_path, test_sample, outfile)
+        expected = b"".join(lines[index] for index in sorted(test_sample_indices))
+        assert (
+            outfile.getvalue() == expected
+        ), f"ERROR! copied bytes = {outfile.getvalue()} != {expected}"
+        assert number_of_bytes == len(
+            expected
+        ), f"ERROR! number_of_bytes = {number_of_bytes} != {len(expected)}"
+
+    @pytest.mark.parametrize(
+        "content, number_of_shards",
+        [
+            (b"a\nbb\nccc\ndddd\n", 1),
+            (b"a\nbb\nccc\ndddd\n", 2),
+            (b"a\nbb\nccc\ndddd\n", 3),
+            (b"a\nbb\nccc\ndddd", 4),
+            (b"a\nbb\nccc\ndddd\n", 20),
+            (b"abcdefghij\n", 3),
+            (b"", 2),
+        ],
+    )
+    def test_shard_file(self, tmp_path, content: bytes, number_of_shards: int):
+        file_path = join(str(tmp_path), "documents.jsonl")
+        with open(file_path, "wb") as file:
+            file.write(content)
+        with open(file_path, "rb") as infile:
+            expected = list(byte_ranges(infile))
+
+        shards = shard_file(file_path, number_of_shards)
+        assert (
+            len(shards) <= number_of_shards
+        ), f"ERROR! len(shards) = {len(shards)} > {number_of_shards}"
+        test_byte_ranges = []
+        for start, end in shards:
+            assert (
+                start == 0 or content[start - 1 : start] == b"\n"
+            ), f"ERROR! shard ({start}, {end}) does not start at a line"
+            with open(file_path, "rb") as infile:
+                test_byte_ranges.extend(byte_ranges(infile, start, end))
+        assert (
+            test_byte_ranges == expected
+        ), f"ERROR! test_byte_ranges = {test_byte_ranges} != {expected}"
+
+    @pytest.mark.parametrize(
+        "weight, exclude, number_of_shards",
+        [
+            (0.3, (), 1),
+            (0.3, (), 4),
+            (0.5, (4, 1, 1, 99), 4),
+            (1.0, (), 7),
+            (0.3, tuple(range(0, 100, 3)), 3),
+        ],
+    )
+    def test_sharded_sampling(
+        self, monkeypatch, weight: float, exclude: Tuple[int], number_of_shards: int
+    ):
+        # the file is read only once, also with exclusions
+        monkeypatch.setattr(
+            "src.sampling.count_lines",
+            lambda *args: pytest.fail("ERROR! count_lines was called"),
+        )
+        input_file_path = join(
+            BASE_DIR, "src", "tests", "data", "test_data_original", "test.jsonl"
+        )
+        with open(input_file_path, "rb") as infile:
+            lines = list(infile)
+
+        random.seed(42)
+        (
+            test_sample,
+            test_sample_indices,
+            number_of_original_documents,
+        ) = sharded_sampling(input_file_path, weight, exclude, number_of_shards)
+        assert number_of_original_documents == len(
+            lines
+        ), f"ERROR! number_of_original_documents = {number_of_original_documents} != {len(lines)}"
+        assert len(test_sample_indices) == int(
+            weight * len(lines)
+        ), f"ERROR! len(test_sample_indices) = {len(test_sample_indices)} != {int(weight * len(lines))}"
+        assert list(test_sample_indices) == sorted(
+            set(test_sample_indices) - set(exclude)
+        ), f"ERROR! test_sample_indices = {test_sample_indices} not sorted, unique & disjunct from {exclude}"
+        outfile = io.BytesIO()
+        _ = copy_byte_ranges(input_file_path, test_sample, outfile)
+        expected = b"".join(lines[index] for index in test_sample_indices)
+        assert (
+            outfile.getvalue() == expected
+        ), f"ERROR! copied bytes = {outfile.getvalue()} != {expected}"
+
+    @pytest.mark.parametrize(
+        "numbers_of_sampled_documents",
+        [
+            [10],
+            [3, 10, 30],
+            [0, 30, 30],
+        ],
+    )
+    def test_nested_sampling(self, numbers_of_sampled_documents: List[int]):
+        input_file_path = join(
+            BASE_DIR, "src", "tests", "data", "test_data_original", "test.jsonl"
+        )
+        with open(input_file_path, "rb") as infile:
+            lines = list(infile)
+
+        random.seed(42)
+        with open(input_file_path, "rb") as infile:
+            test_sample, test_sample_indices = reservoir_sampling_skip(
+                byte_ranges(infile), numbers_of_sampled_documents[-1]
+            )
+        ranks = nested_ranks(numbers_of_sampled_documents[-1])
+        assert sorted(ranks) == list(
+            range(numbers_of_sampled_documents[-1])
+        ), f"ERROR! ranks = {ranks} is not a permutation"
+
+        outfiles = [io.BytesIO() for _ in numbers_of_sampled_documents]
+        numbers_of_bytes = copy_ranked_byte_ranges(
+            input_file_path,
+            test_sample,
+            ranks,
+            outfiles,
+            [(0, number) for number in numbers_of_sampled_documents],
+        )
+        previous_indices: List[int] = []
+        for outfile, number_of_bytes, number_of_sampled_documents in zip(
+            outfiles, numbers_of_bytes, numbers_of_sampled_documents
+        ):
+            indices = sorted(
+                index
+                for index, rank in zip(test_sample_indices, ranks)
+                if rank < number_of_sampled_documents
+            )
+            assert (
+                len(indices) == number_of_sampled_documents
+            ), f"ERROR! len(indices) = {len(indices)} != {number_of_sampled_documents}"
+            assert set(previous_indices) <= set(
+                indices
+            ), f"ERROR! samples are not nested: {previous_indices} vs. {indices}"
+            expected = b"".join(lines[index] for index in indices)
+            assert (
+                outfile.getvalue() == expected
+            ), f"ERROR! copied bytes = {outfile.getvalue()} != {expected}"
+            assert number_of_bytes == len(
+                expected
+            ), f"ERROR! number_of_bytes = {number_of_bytes} != {len(expected)}"
+            previous_indices = indices
+
+    def test_disjunct_sampling(self):
+        input_file_path = join(
+            BASE_DIR, "src", "tests", "data", "test_data_original", "test.jsonl"
+        )
+        with open(input_file_path, "rb") as infile:
+            lines = list(infile)
+
+        random.seed(42)
+        with open(input_file_path, "rb") as infile:
+            test_sample, test_sample_indices = reservoir_sampling_skip(
+                byte_ranges(infile), 40
+            )
+        ranks = nested_ranks(40)
+        rank_ranges = [(0, 30), (30, 39)]
+        outfiles = [io.BytesIO() for _ in rank_ranges]
+        _ = copy_ranked_byte_ranges(
+            input_file_path, test_sample, ranks, outfiles, rank_ranges
+        )
+        indices = [
+            sorted(
+                index
+                for index, rank in zip(test_sample_indices, ranks)
+                if rank_start <= rank < rank_end
+            )
+            for rank_start, rank_end in rank_ranges
+        ]
+        assert [len(_indices) for _indices in indices] == [
+            30,
+            9,
+        ], f"ERROR! lengths = {[len(_indices) for _indices in indices]} != [30, 9]"
+        assert not set(indices[0]) & set(
+            indices[1]
+        ), f"ERROR! samples are not disjunct: {indices}"
+        for outfile, _indices in zip(outfiles, indices):
+            expected = b"".join(lines[index] for index in _indices)
+            assert (
+                outfile.getvalue() == expected
+            ), f"ERROR! copied bytes = {outfile.getvalue()} != {expected}"
+
+    @pytest.mark.parametrize(
+        "number_of_bytes_budget, exclude",
+        [
+            (0, ()),
+            (1000, ()),
+            (1000, (4, 1, 1, 99)),
+            (10**9, ()),
+        ],
+    )
+    def test_budget_sampling(self, number_of_bytes_budget: int, exclude: Tuple[int]):
+        input_file_path = join(
+            BASE_DIR, "src", "tests", "data", "test_data_original", "test.jsonl"
+        )
+        with open(input_file_path, "rb") as infile:
+            lines = list(infile)
+        population = [i for i in range(len(lines)) if i not in exclude]
+
+        random.seed(42)
+        with open(input_file_path, "rb") as infile:
+            (
+                test_sample,
+                test_sample_indices,
+                number_of_original_documents,
+            ) = budget_sampling(byte_ranges(infile), number_of_bytes_budget, exclude)
+        assert test_sample is not None, "ERROR! budget not reached in a single pass"
+
+        assert number_of_original_documents == len(
+            lines
+        ), f"ERROR! number_of_original_documents = {number_of_original_documents} != {len(lines)}"
+        assert not set(test_sample_indices) & set(
+            exclude
+        ), f"ERROR! test_sample_indices = {test_sample_indices} contains excluded lines"
+        lengths = [len(lines[index]) for index in test_sample_indices]
+        assert [length for _, length in test_sample] == lengths
+        if number_of_bytes_budget >= sum(len(lines[index]) for index in population):
+            assert sorted(test_sample_indices) == population
+        else:
+            # the budget is reached, but not without the last document
+            assert (
+                sum(lengths) >= number_of_bytes_budget
+            ), f"ERROR! sum(lengths) = {sum(lengths)} < {number_of_bytes_budget}"
+            assert (
+                len(lengths) == 0 or sum(lengths[:-1]) < number_of_bytes_budget
+            ), f"ERROR! sum(lengths[:-1]) = {sum(lengths[:-1])} >= {number_of_bytes_budget}"
+
+    @pytest.mark.parametrize(
+        "weight, number_of_bytes_reference, exclude",
+        [
+            (0.005, None, ()),
+            (0.05, None, tuple(range(0, 20000, 3))),
+            (0.5, None, ()),
+            (1.0, 50000, ()),  # small absolute budget
+            (0.1, 10**6, tuple(range(0, 20000, 3))),
+        ],
+    )
+    def test_budget_candidates(
+        self,
+        weight: float,
+        number_of_bytes_reference: Optional[int],
+        exclude: Tuple[int],
+    ):
+        """the adaptive threshold reaches the budget in a single pass, heavy-tailed document lengths"""
+        random.seed(42)
+        lengths = [int(random.paretovariate(1.5) * 100) for _ in range(20000)]
+        _byte_ranges = list(zip(accumulate(lengths, initial=0), lengths))
+        number_of_bytes_budget = int(
+            weight
+            * (
+                sum(lengths)
+                if number_of_bytes_reference is None
+                else number_of_bytes_reference
+            )
+        )
+        number_of_failures = 0
+        for _ in range(100):
+            candidates, threshold_min, _ = budget_candidates(
+                _byte_ranges, weight, number_of_bytes_reference, exclude
+            )
+            sample, _ = select_budget(candidates, number_of_bytes_budget, threshold_min)
+            number_of_failures += sample is None
+            assert (
+                len(candidates) < 3 * weight * len(lengths) + 1000
+            ), f"ERROR! too many candidates = {len(candidates)}"
+        assert number_of_failures == 0, f"ERROR! {number_of_failures} failures"
+
+    def test_budget_threshold(self):
+        """a pass with a too small threshold is followed by a pass with a threshold from the collected bytes"""
+        random.seed(42)
+        lengths = [int(random.paretovariate(1.5) * 100) for _ in range(20000)]
+        _byte_ranges = list(zip(accumulate(lengths, initial=0), lengths))
+        number_of_bytes_budget = int(0.1 * sum(lengths))
+        for _ in range(100):
+            threshold = 0.05
+            candidates, threshold_min, _ = budget_candidates(
+                _byte_ranges, 0.1, threshold=threshold
+            )
+            assert threshold_min == threshold
+            sample, _ = select_budget(candidates, number_of_bytes_budget, threshold_min)
+            assert sample is None, "ERROR! budget reached with a too small threshold"
+            threshold = budget_threshold(
+                candidates, threshold_min, number_of_bytes_budget
+            )
+            assert 0.1 < threshold < 0.3, f"ERROR! threshold = {threshold}"
+            candidates, threshold_min, _ = budget_candidates(
+                _byte_ranges, 0.1, threshold=threshold
+            )
+            sample, _ = select_budget(candidates, number_of_bytes_budget, threshold_min)
+            assert sample is not None, "ERROR! budget not reached in the second pass"
+
+    def test_get_cell_seed(self):
+        seed = get_cell_seed(42, "books", "en")
+        assert seed == get_cell_seed(
+            42, "books", "en"
+        ), "ERROR! cell seed is not deterministic"
+        assert 0 <= seed < 2**64, f"ERROR! cell seed = {seed} out of range"
+        seeds = {
+            get_cell_seed(42, "books", "en"),
+            get_cell_seed(43, "books", "en"),
+            get_cell_seed(42, "articles", "en"),
+            get_cell_seed(42, "books", "sv"),
+        }
+        assert len(seeds) == 4, f"ERROR! cell seeds = {seeds} are not distinct"
+
 
 def _test_sampling(
     _test_sample,
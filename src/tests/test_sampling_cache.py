@@ -0,0 +1,56 @@
+import os
+from os.path import join
+
+from src.sampling_cache import SamplingCache, get_cell_fingerprint
+
+
+class TestSamplingCache:
+    def test_get_cell_fingerprint(self, tmp_path):
+        file_path = join(str(tmp_path), "books_en.jsonl")
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write('{"text": "this is test book number 0"}\n')
+
+        fingerprint = get_cell_fingerprint(file_path, 0.5, 10, 42, single_pass=True)
+        assert fingerprint == get_cell_fingerprint(
+            file_path, 0.5, 10, 42, single_pass=True
+        ), "ERROR! fingerprint is not deterministic"
+        for other in [
+            get_cell_fingerprint(file_path, 0.4, 10, 42, single_pass=True),
+            get_cell_fingerprint(file_path, 0.5, 20, 42, single_pass=True),
+            get_cell_fingerprint(file_path, 0.5, 10, 43, single_pass=True),
+            get_cell_fingerprint(file_path, 0.5, 10, 42, (1,), single_pass=True),
+            get_cell_fingerprint(file_path, 0.5, 10, 42, single_pass=False),
+        ]:
+            assert other != fingerprint, "ERROR! fingerprint did not change"
+
+        with open(file_path, "a", encoding="utf-8") as file:
+            file.write('{"text": "this is test book number 1"}\n')
+        assert fingerprint != get_cell_fingerprint(
+            file_path, 0.5, 10, 42, single_pass=True
+        ), "ERROR! fingerprint did not change after the file was changed"
+
+    def test_sampling_cache(self, tmp_path):
+        file_path_sampled = join(str(tmp_path), "books_en.jsonl")
+        with open(file_path_sampled, "w", encoding="utf-8") as file:
+            file.write('{"text": "this is test book number 0"}\n')
+
+        cache = SamplingCache(str(tmp_path))
+        assert not cache.is_valid("books_en.jsonl", "abc", file_path_sampled)
+        cache.update("books_en.jsonl", "abc", file_path_sampled)
+        cache.write()
+
+        cache = SamplingCache(str(tmp_path))
+        assert cache.is_valid("books_en.jsonl", "abc", file_path_sampled)
+        assert not cache.is_valid("books_en.jsonl", "abd", file_path_sampled)
+
+        with open(file_path_sampled, "a", encoding="utf-8") as file:
+            file.write('{"text": "this is test book number 1"}\n')
+        assert not cache.is_valid(
+            "books_en.jsonl", "abc", file_path_sampled
+        ), "ERROR! changed sampled file is considered valid"
+
+        os.remove(file_path_sampled)
+        assert not cache.is_valid("books_en.jsonl", "abc", file_path_sampled)
+
+        cache.remove("books_en.jsonl")
+        assert cache.entries == {}, f"ERROR! cache.entries = {cache.entries} not empty"
@@ -0,0 +1,435 @@
+import argparse
+import os
+import pytest
+import random
+import shutil
+from itertools import product
+from os.path import dirname, isfile, join
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import script_sampling
+from script_sampling import (
+    _get_parser,
+    _get_rank_ranges,
+    _get_train_indices,
+    _parse_size,
+    _prepare_outputs,
+    _sample_bytes,
+    _sample_documents,
+    _sample_line_index,
+    _set_deduplicator,
+    _write_samples,
+)
+from src.compression import COMPRESSIONS, open_jsonl
+from src.deduplication import Deduplicator
+from src.env import Env
+from src.line_index import get_line_index
+from src.logger import CellLogger
+from src.sample_indices import get_train_key, read_sample_indices, write_sample_indices
+from src.tests.helpers import BASE_DIR, TEST_DATA_DIRECTORY_RELATIVE
+
+INPUT_FILE_PATH = join(
+    BASE_DIR, "src", "tests", "data", "test_data_original", "test.jsonl"
+)
+
+
+def _read_lines(file_path: str) -> List[bytes]:
+    with open_jsonl(file_path, "rb") as file:
+        return list(file)
+
+
+def _copy_test_data(tmp_path, monkeypatch) -> Env:
+    """
+    copy src/tests/data to tmp_path & let script_sampling.main() use it as environment
+
+    Returns:
+        env: Env with absolute paths in tmp_path
+    """
+    directory = join(str(tmp_path), "data")
+    shutil.copytree(join(BASE_DIR, TEST_DATA_DIRECTORY_RELATIVE), directory)
+    with open(join(directory, "env.ini"), "w", encoding="utf-8") as file:
+        file.write(
+            "[main]\n"
+            f"data_original = {directory}/test_data_original\n"
+            f"data_train = {directory}/test_data_train\n"
+            f"data_eval = {directory}/test_data_eval\n"
+            f"output = {directory}/test_output\n"
+            "[sampling]\n"
+            f"weights = {directory}/test_SAMPLING_WEIGHTS.csv\n"
+            "[other]\n"
+            "debug = 0\n"
+            "verbose = 0\n"
+        )
+    env = Env(directory)
+    os.makedirs(env.data_train)
+    os.makedirs(env.data_eval)
+    monkeypatch.setattr(script_sampling, "Env", lambda: Env(directory))
+    return env
+
+
+def _run_main(arguments: List[str]) -> None:
+    script_sampling.main(_get_parser().parse_args(arguments))
+
+
+def _check_samples(
+    env: Env,
+    folder: str,
+    percents: Sequence[int],
+    compression: str = "none",
+    unit: str = "documents",
+) -> Dict[str, Sequence[int]]:
+    """
+    check that the sampled files in folder contain the documents of SAMPLING.idx (nested for several percents)
+
+    Returns:
+        sample_indices: see read_sample_indices
+    """
+    categories, languages, sampling_weights, _ = env.read_sampling_weights()
+    sample_indices = read_sample_indices(folder)
+    for category, language in product(categories, languages):
+        lines = _read_lines(env.get_file_path(category, language, "data_original"))
+        previous_indices: Sequence[int] = ()
+        for percent in percents:
+            key = f"{category}_{language}" + (
+                f"_{percent}p" if len(percents) > 1 else ""
+            )
+            indices = sample_indices[f"{key}.jsonl"]
+            test_lines = _read_lines(join(folder, key + COMPRESSIONS[compression]))
+            assert sorted(test_lines) == sorted(
+                lines[index] for index in indices
+            ), f"ERROR! sampled file {key} does not match SAMPLING.idx"
+            if unit == "documents":
+                number_of_documents = int(
+                    sampling_weights[category][language] * percent / 100 * len(lines)
+                )
+                assert (
+                    len(indices) == number_of_documents
+                ), f"ERROR! {key}: {len(indices)} != {number_of_documents} documents"
+            assert set(previous_indices) <= set(
+                indices
+            ), f"ERROR! {key} does not contain the sample of the smaller percent"
+            previous_indices = indices
+    return sample_indices
+
+
+def _check_disjunct(env: Env) -> None:
+    """check that the indices in <data_train> & <data_eval> are disjunct (see e2e_tests/script_sampling_disjunct.py)"""
+    categories, languages, _, _ = env.read_sampling_weights()
+    train_indices = read_sample_indices(env.data_train)
+    eval_indices = read_sample_indices(env.data_eval)
+    for category, language in product(categories, languages):
+        key = get_train_key(train_indices.keys(), category, language)
+        assert not set(train_indices[key]) & set(
+            eval_indices[f"{category}_{language}.jsonl"]
+        ), f"ERROR! train & eval indices are not disjunct for {key}"
+
+
+class TestScriptSampling:
+    @pytest.mark.parametrize(
+        "train_indices, indices",
+        [
+            # single percent
+            ({"books_en.jsonl": [2, 4], "books_sv.jsonl": [1]}, [2, 4]),
+            # nested percents: the largest percent contains the others
+            (
+                {
+                    "books_en_10p.jsonl": [2],
+                    "books_en_20p.jsonl": [2, 4, 7],
+                    "books_en_5p.jsonl": [],
+                    "books_hq_en_50p.jsonl": [0, 1, 2, 3],
+                },
+                [2, 4, 7],
+            ),
+            # nothing sampled for books_en
+            ({"books_hq_en.jsonl": [0, 1]}, None),
+        ],
+    )
+    def test_get_train_indices(self, tmp_path, train_indices, indices):
+        data_train = str(tmp_path)
+        write_sample_indices(data_train, train_indices)
+        if indices is None:
+            with pytest.raises(AssertionError):
+                _get_train_indices(data_train, "books", "en")
+        else:
+            test_indices = list(_get_train_indices(data_train, "books", "en"))
+            assert (
+                test_indices == indices
+            ), f"ERROR! test_indices = {test_indices} != {indices}"
+
+    @pytest.mark.parametrize(
+        "size, number_of_bytes",
+        [
+            ("1000", 1000),
+            ("64k", 64 * 1024),
+            ("500M", 500 * 1024**2),
+            ("2G", 2 * 1024**3),
+            ("1.5g", int(1.5 * 1024**3)),
+            ("2X", None),
+        ],
+    )
+    def test_parse_size(self, size: str, number_of_bytes: int):
+        if number_of_bytes is None:
+            with pytest.raises(argparse.ArgumentTypeError):
+                _parse_size(size)
+        else:
+            test_number_of_bytes = _parse_size(size)
+            assert (
+                test_number_of_bytes == number_of_bytes
+            ), f"ERROR! test_number_of_bytes = {test_number_of_bytes} != {number_of_bytes}"
+
+    @pytest.mark.parametrize(
+        "single_pass, shards, exclude",
+        [
+            (1, 1, ()),
+            (1, 1, (1, 4, 50)),
+            (1, 3, (1, 4, 50)),
+            (0, 1, (1, 4, 50)),
+        ],
+    )
+    def test_sample_documents(
+        self, single_pass: int, shards: int, exclude: Tuple[int, ...]
+    ):
+        lines = _read_lines(INPUT_FILE_PATH)
+        args = argparse.Namespace(single_pass=single_pass, shards=shards)
+        random.seed(42)
+        (
+            sample,
+            sample_indices,
+            number_of_original_documents,
+            number_of_bytes_read,
+        ) = _sample_documents(INPUT_FILE_PATH, 0.3, exclude, args, CellLogger())
+        sample = list(sample)
+        assert number_of_original_documents == len(lines)
+        assert len(sample) == len(sample_indices) == int(0.3 * len(lines))
+        assert not set(sample_indices) & set(exclude)
+        assert number_of_bytes_read >= sum(len(line) for line in lines)
+        for (offset, length), index in zip(sample, sample_indices):
+            assert length == len(lines[index]), f"ERROR! wrong byte range for {index}"
+
+    def test_sample_line_index(self, tmp_path):
+        file_path = join(str(tmp_path), "test.jsonl")
+        with open(file_path, "wb") as file:
+            file.write(b"".join(_read_lines(INPUT_FILE_PATH)))
+        line_index = get_line_index(file_path)
+        random.seed(42)
+        (
+            sample,
+            sample_indices,
+            number_of_original_documents,
+            number_of_bytes_read,
+        ) = _sample_line_index(line_index, 0.3, (1, 4, 50))
+        assert number_of_original_documents == 100
+        assert number_of_bytes_read == 0
+        assert list(sample) == [line_index.get_range(i) for i in sample_indices]
+        assert len(sample_indices) == 30 and not {1, 4, 50} & set(sample_indices)
+
+    @pytest.mark.parametrize(
+        "use_line_index, budget", [(False, None), (True, None), (False, 200)]
+    )
+    def test_sample_bytes(self, tmp_path, use_line_index: bool, budget: Optional[int]):
+        lines = _read_lines(INPUT_FILE_PATH)
+        file_path = join(str(tmp_path), "test.jsonl")
+        with open(file_path, "wb") as file:
+            file.write(b"".join(lines))
+        line_index = get_line_index(file_path) if use_line_index else None
+        random.seed(42)
+        (
+            sample,
+            sample_indices,
+            number_of_original_documents,
+            number_of_bytes_read,
+            number_of_bytes_reference,
+        ) = _sample_bytes(file_path, line_index, 0.3, (), budget, CellLogger())
+        number_of_bytes = sum(len(line) for line in lines)
+        assert number_of_original_documents == len(lines)
+        assert number_of_bytes_read == (0 if use_line_index else number_of_bytes)
+        assert number_of_bytes_reference == (budget or number_of_bytes)
+        lengths = [length for _, length in sample]
+        assert lengths == [len(lines[index]) for index in sample_indices]
+        budget_bytes = int(0.3 * number_of_bytes_reference)
+        assert sum(lengths) >= budget_bytes > sum(lengths[:-1])
+
+    @pytest.mark.parametrize(
+        "unit, evaluation_percent, weights, rank_ranges",
+        [
+            ("documents", 0, [0.1, 0.2, 0.5], [(0, 1), (0, 2), (0, 5)]),
+            ("documents", 10, [0.3, 0.2], [(0, 3), (3, 5)]),
+            ("bytes", 0, [0.2, 0.5], [(0, 2), (0, 5)]),
+            ("bytes", 10, [0.3, 0.2], [(0, 3), (3, 5)]),
+        ],
+    )
+    def test_get_rank_ranges(
+        self,
+        unit: str,
+        evaluation_percent: int,
+        weights: List[float],
+        rank_ranges: List[Tuple[int, int]],
+    ):
+        args = argparse.Namespace(unit=unit, evaluation_percent=evaluation_percent)
+        sample = [(10 * i, 10) for i in range(5)]  # 10 documents of 10 bytes
+        random.seed(42)
+        ranks, test_rank_ranges = _get_rank_ranges(
+            args, weights, sample, 10, 5, 100 if unit == "bytes" else None
+        )
+        assert sorted(ranks) == list(range(5)), f"ERROR! ranks = {ranks}"
+        assert (
+            test_rank_ranges == rank_ranges
+        ), f"ERROR! rank_ranges = {test_rank_ranges} != {rank_ranges}"
+
+    @pytest.mark.parametrize("nested", [False, True])
+    @pytest.mark.parametrize("dedup", [False, True])
+    def test_write_samples(self, tmp_path, nested: bool, dedup: bool):
+        lines = [
+            b'{"text": "a"}\n',
+            b'{"text": "b"}\n',
+            b'{"text": "a"}\n',
+            b'{"text": "c"}\n',
+        ]
+        file_path_original = join(str(tmp_path), "original", "books_en.jsonl")
+        outputs = [
+            (str(tmp_path), key, join(str(tmp_path), "sampled", key))
+            for key in (
+                ["books_en_50p.jsonl", "books_en_100p.jsonl"]
+                if nested
+                else ["books_en.jsonl"]
+            )
+        ]
+        os.makedirs(dirname(file_path_original))
+        with open(file_path_original, "wb") as file:
+            file.write(b"".join(lines))
+        # a sampled file of a previous run with a different compression is removed
+        file_path_stale = outputs[0][2] + ".gz"
+        _prepare_outputs(outputs)
+        with open(file_path_stale, "wb") as file:
+            file.write(b"")
+        _prepare_outputs(outputs)
+        assert not isfile(file_path_stale), f"ERROR! {file_path_stale} not removed"
+        sample = [(0, 14), (14, 14), (28, 14), (42, 14)]
+        sample_indices = (0, 1, 2, 3)
+        ranks, rank_ranges = (
+            ([0, 2, 1, 3], [(0, 2), (0, 4)]) if nested else (None, None)
+        )
+
+        deduplicator = Deduplicator(100, directory=str(tmp_path)) if dedup else None
+        _set_deduplicator(deduplicator)
+        try:
+            (
+                cell_sample_indices,
+                number_of_bytes_sampled,
+                number_of_duplicates,
+            ) = _write_samples(
+                file_path_original,
+                outputs,
+                sample,
+                sample_indices,
+                ranks,
+                rank_ranges,
+                disjunct=False,
+            )
+        finally:
+            _set_deduplicator(None)
+            if deduplicator is not None:
+                deduplicator.close()
+
+        assert number_of_bytes_sampled == (3 if dedup else 4) * 14
+        assert number_of_duplicates == (1 if dedup else 0)
+        expected = [0, 1, 3] if dedup else [0, 1, 2, 3]
+        indices = cell_sample_indices[str(tmp_path)]
+        if nested:
+            assert list(indices["books_en_100p.jsonl"]) == expected
+            assert list(indices["books_en_50p.jsonl"]) == [0, 2][: 2 - dedup]
+        else:
+            assert list(indices["books_en.jsonl"]) == expected
+        for _, key, file_path_sampled in outputs:
+            assert isfile(file_path_sampled)
+            assert _read_lines(file_path_sampled) == [lines[i] for i in indices[key]]
+
+    @pytest.mark.parametrize(
+        "arguments",
+        [
+            [],
+            ["--single_pass", "0"],
+            ["--shards", "2"],
+            ["--line_index", "1"],  # with up-to-date line indices
+            ["--unit", "bytes"],
+            ["--unit", "bytes", "--budget", "64"],
+            ["--compression", "gz"],
+            ["--dedup", "text"],
+            ["--sample_indices_format", "json"],
+        ],
+    )
+    @pytest.mark.parametrize("percents", [[50], [25, 50]])
+    def test_main(
+        self, tmp_path, monkeypatch, arguments: List[str], percents: List[int]
+    ):
+        """train & disjunct evaluation sampling with script_sampling.main()"""
+        env = _copy_test_data(tmp_path, monkeypatch)
+        if "--line_index" in arguments:
+            for file_name in os.listdir(env.data_original):
+                get_line_index(join(env.data_original, file_name))
+        compression = dict(zip(arguments[::2], arguments[1::2])).get(
+            "--compression", "none"
+        )
+        unit = dict(zip(arguments[::2], arguments[1::2])).get("--unit", "documents")
+        arguments += ["--seed", "42"]
+
+        _run_main(["--percent", *map(str, percents)] + arguments)
+        _check_samples(env, env.data_train, percents, compression, unit)
+
+        _run_main(["--percent", "50", "--evaluation", "1"] + arguments)
+        _check_samples(env, env.data_eval, [50], compression, unit)
+        _check_disjunct(env)
+        assert isfile(join(env.data_eval, "all_en" + COMPRESSIONS[compression]))
+
+    @pytest.mark.parametrize("unit", ["documents", "bytes"])
+    def test_main_evaluation_percent(self, tmp_path, monkeypatch, unit: str):
+        """training & disjunct evaluation sampling in the same scan"""
+        env = _copy_test_data(tmp_path, monkeypatch)
+        _run_main(["--percent", "50", "--evaluation_percent", "25", "--unit", unit])
+        _check_samples(env, env.data_train, [50], unit=unit)
+        _check_samples(env, env.data_eval, [25], unit=unit)
+        _check_disjunct(env)
+
+    def test_main_cache(self, tmp_path, monkeypatch):
+        """unchanged combinations are skipped & keep their sample indices"""
+        env = _copy_test_data(tmp_path, monkeypatch)
+        _run_main(["--percent", "50", "--seed", "42"])
+        sample_indices = {
+            key: list(indices)
+            for key, indices in _check_samples(env, env.data_train, [50]).items()
+        }
+
+        _run_main(["--percent", "50", "--seed", "42"])
+        with open(join(env.data_train, "SAMPLING.log"), "r", encoding="utf-8") as file:
+            assert file.read().count("unchanged (cache)") == len(sample_indices)
+        test_sample_indices = _check_samples(env, env.data_train, [50])
+        assert {
+            key: list(indices) for key, indices in test_sample_indices.items()
+        } == sample_indices, "ERROR! sample indices changed"
+
+    @pytest.mark.parametrize(
+        "arguments",
+        [
+            ["--percent", "50"],
+            ["--percent", "25", "50", "--unit", "bytes"],
+            ["--percent", "50", "--evaluation_percent", "25"],
+        ],
+    )
+    def test_main_workers(self, tmp_path, monkeypatch, arguments: List[str]):
+        """the sampled data does not depend on the nr. of worker processes (for a given seed)"""
+        samples = []
+        for workers in [1, 2]:
+            env = _copy_test_data(tmp_path / f"workers_{workers}", monkeypatch)
+            _run_main(arguments + ["--seed", "42", "--workers", str(workers)])
+            samples.append(
+                {
+                    (folder, key): (list(indices), _read_lines(join(folder, key)))
+                    for folder in [env.data_train, env.data_eval]
+                    if isfile(join(folder, "SAMPLING.idx"))
+                    for key, indices in read_sample_indices(folder).items()
+                }
+            )
+        assert len(samples[0]) > 0, "ERROR! nothing sampled"
+        assert [sample for _, sample in sorted(samples[0].items())] == [
+            sample for _, sample in sorted(samples[1].items())
+        ], "ERROR! sampled data depends on --workers"
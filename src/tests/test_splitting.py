@@ -0,0 +1,41 @@
+import pytest
+from typing import List
+
+from src.splitting import split_text, split_documents
+
+
+class TestSplitting:
+    @pytest.mark.parametrize(
+        "text, max_length, chunks",
+        [
+            ("", 5, [""]),
+            ("short", 5, ["short"]),
+            (
+                "This is a test. This is another test.",
+                20,
+                ["This is a test. ", "This is another ", "test."],
+            ),
+            ("line one\nline two", 12, ["line one\n", "line two"]),
+            ("a" * 25, 10, ["a" * 10, "a" * 10, "a" * 5]),
+            # boundaries in the first half of the window are ignored
+            ("a b" + "c" * 20, 10, ["a b" + "c" * 7, "c" * 10, "c" * 3]),
+        ],
+    )
+    def test_split_text(self, text: str, max_length: int, chunks: List[str]):
+        test_chunks = list(split_text(text, max_length))
+        assert test_chunks == chunks, f"ERROR! test_chunks = {test_chunks} != {chunks}"
+
+    @pytest.mark.parametrize("max_length", [1, 2, 7, 50, 1000])
+    def test_split_text_lossless(self, max_length: int):
+        text = "Ein Test. Noch ein Test!\nUnd?  Ja  " * 20 + "x" * 120
+        test_chunks = list(split_text(text, max_length))
+        assert "".join(test_chunks) == text, "ERROR! chunks do not add up to the text"
+        assert all(
+            len(chunk) <= max_length for chunk in test_chunks
+        ), f"ERROR! chunk longer than {max_length} found"
+
+    def test_split_documents(self):
+        texts = iter(["This is a test. This is another test.", "short"])
+        test_chunks = list(split_documents(texts, 20))
+        chunks = ["This is a test. ", "This is another ", "test.", "short"]
+        assert test_chunks == chunks, f"ERROR! test_chunks = {test_chunks} != {chunks}"
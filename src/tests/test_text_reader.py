@@ -0,0 +1,88 @@
+import pytest
+import gzip
+import json
+from os.path import join
+from typing import List, Optional
+
+from src.text_reader import get_text, get_texts, read_texts
+
+LINES = [
+    '{"text": "this is a test"}',
+    '{"title": "test", "filters": [{"a": 1}], "text": "this is a test"}',
+    '{ "text" : "this is a test" , "lang": "en"}',
+    '{"text": "this is a \\"test\\"\\nwith escapes \\\\ \\u00f6 \\ud83d\\ude00"}',
+    '{"text": "this is a \\"test\\"\\nwith escapes \\\\ ö 😀"}',
+    '{"text": ""}',
+    # key inside a string
+    '{"title": "\\"text\\": \\"no\\"", "text": "yes"}',
+    '{"title": "x\\"text", "text": "yes"}',
+    '{"x\\"text": "no", "text": "yes"}',
+    '{"title": "\\\\", "text": "yes"}',
+    # nested key
+    '{"meta": {"text": "no"}, "text": "yes"}',
+    '{"text": "yes", "filters": [{"text": "no"}]}',
+    # brackets inside strings
+    '{"title": "}]", "url": "\\\\", "meta": {"a": "{[\\"{"}, "text": "yes"}',
+    '{"meta": {"a": "}"}, "filters": [{"text": "no"}], "text": "yes"}',
+    # escaped key
+    '{"t\\u0065xt": "yes"}',
+]
+
+
+class TestTextReader:
+    @pytest.mark.parametrize("line", LINES)
+    def test_get_text(self, line: str):
+        text = json.loads(line)["text"]
+        for _line in [line, line + "\n", line.encode("utf-8") + b"\n"]:
+            test_text = get_text(_line)
+            assert test_text == text, f"ERROR! test_text = {test_text} != {text}"
+
+    @pytest.mark.parametrize(
+        "line, field, value",
+        [
+            ('{"text": null}', "text", None),
+            ('{"title": "yes", "text": "no"}', "title", "yes"),
+            ('{"text": "no", "len_char": 42}', "len_char", 42),
+        ],
+    )
+    def test_get_text_field(self, line: str, field: str, value: Optional[str]):
+        test_value = get_text(line, field)
+        assert test_value == value, f"ERROR! test_value = {test_value} != {value}"
+
+    def test_get_text_missing(self):
+        with pytest.raises(KeyError):
+            get_text('{"meta": {"text": "no"}}')
+        text = get_text('{"meta": {"text": "no"}}', default="")
+        assert text == "", f"ERROR! text = {text} != ''"
+
+    def test_get_texts(self):
+        texts = list(get_texts([line.encode("utf-8") for line in LINES]))
+        assert texts == [
+            json.loads(line)["text"] for line in LINES
+        ], f"ERROR! texts = {texts} wrong"
+
+    @pytest.mark.parametrize(
+        "compressed, batch_size, start, end, texts",
+        [
+            (False, 2, 0, None, [["0", "1"], ["2", "3"], ["4"]]),
+            (False, 10, 0, None, [["0", "1", "2", "3", "4"]]),
+            (False, 2, 14, 42, [["1", "2"]]),
+            (False, 2, 14, 43, [["1", "2"], ["3"]]),
+            (True, 3, 0, None, [["0", "1", "2"], ["3", "4"]]),
+        ],
+    )
+    def test_read_texts(
+        self,
+        tmp_path,
+        compressed: bool,
+        batch_size: int,
+        start: int,
+        end: Optional[int],
+        texts: List[List[str]],
+    ):
+        content = "".join(f'{{"text": "{n}"}}\n' for n in range(5))  # 14 bytes per line
+        file_path = join(tmp_path, "test_en.jsonl" + (".gz" if compressed else ""))
+        with (gzip.open if compressed else open)(file_path, "wt") as file:
+            file.write(content)
+        test_texts = list(read_texts(file_path, batch_size, start, end))
+        assert test_texts == texts, f"ERROR! test_texts = {test_texts} != {texts}"
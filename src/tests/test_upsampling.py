@@ -0,0 +1,126 @@
+import gzip
+import pytest
+from typing import Dict, List
+
+from src.line_index import get_line_index
+from src.upsampling import (
+    get_language,
+    count_documents,
+    get_repetition_factors,
+    get_repeats,
+    get_training_repeats,
+    repeat_documents,
+)
+from src.tests.helpers import write_jsonl
+
+
+def _documents(number_of_documents: int) -> List[Dict[str, str]]:
+    return [
+        {"text": f"this is test document number {i}"}
+        for i in range(number_of_documents)
+    ]
+
+
+class TestUpsampling:
+    @pytest.mark.parametrize(
+        "file_path, language",
+        [
+            ("data_train/books_en.jsonl", "en"),
+            ("data_train/web_crawl_sv.jsonl.gz", "sv"),
+        ],
+    )
+    def test_get_language(self, file_path: str, language: str):
+        test_language = get_language(file_path)
+        assert (
+            test_language == language
+        ), f"ERROR! test_language = {test_language} != {language}"
+
+    @pytest.mark.parametrize("file_name", ["books_en.jsonl", "books_en.jsonl.gz"])
+    @pytest.mark.parametrize("line_index", [False, True])
+    def test_count_documents(self, tmp_path, file_name: str, line_index: bool):
+        file_path = str(tmp_path / file_name)
+        write_jsonl(file_path, _documents(7))
+        if line_index and not file_name.endswith(".gz"):
+            get_line_index(file_path)
+        with gzip.open(file_path) if file_name.endswith(".gz") else open(
+            file_path, "rb"
+        ) as file:
+            number_of_bytes = len(file.read())
+        test_counts = count_documents(file_path)
+        assert test_counts == (
+            7,
+            number_of_bytes,
+        ), f"ERROR! test_counts = {test_counts} != {(7, number_of_bytes)}"
+
+    @pytest.mark.parametrize(
+        "sizes, alpha, factors",
+        [
+            ({"en": 300, "sv": 100}, 1.0, {"en": 1.0, "sv": 1.0}),
+            ({"en": 300, "sv": 100}, 0.0, {"en": 1.0, "sv": 3.0}),
+            ({"en": 400, "sv": 100}, 0.5, {"en": 1.0, "sv": 2.0}),
+            ({"en": 400, "sv": 0}, 0.5, {"en": 1.0, "sv": 1.0}),
+        ],
+    )
+    def test_get_repetition_factors(
+        self, sizes: Dict[str, int], alpha: float, factors: Dict[str, float]
+    ):
+        test_factors = get_repetition_factors(sizes, alpha)
+        assert test_factors == pytest.approx(
+            factors
+        ), f"ERROR! test_factors = {test_factors} != {factors}"
+
+    def test_get_repeats(self):
+        test_repeats = list(get_repeats([1000, 1000], [1.0, 2.25], seed=42))
+        assert test_repeats[:1000] == [1] * 1000, "ERROR! factor 1.0 needs to give 1"
+        assert set(test_repeats[1000:]) == {
+            2,
+            3,
+        }, "ERROR! factor 2.25 needs to give 2 or 3"
+        assert (
+            2200 <= sum(test_repeats[1000:]) <= 2300
+        ), "ERROR! unexpected nr. of repeats"
+        assert test_repeats == list(
+            get_repeats([1000, 1000], [1.0, 2.25], seed=42)
+        ), "ERROR! repeats are not reproducible"
+
+    @pytest.mark.parametrize(
+        "texts, repeats, repeated_texts",
+        [
+            (["a", "b", "c"], [1, 0, 2], ["a", "c", "c"]),
+            (["a", "b"], [1, 1, 1], None),
+            (["a", "b"], [1], None),
+        ],
+    )
+    def test_repeat_documents(
+        self, texts: List[str], repeats: List[int], repeated_texts: List[str]
+    ):
+        if repeated_texts is None:
+            with pytest.raises(AssertionError):
+                list(repeat_documents(texts, iter(repeats)))
+        else:
+            test_repeated_texts = list(repeat_documents(texts, iter(repeats)))
+            assert (
+                test_repeated_texts == repeated_texts
+            ), f"ERROR! test_repeated_texts = {test_repeated_texts} != {repeated_texts}"
+
+    def test_get_training_repeats(self, tmp_path):
+        file_paths = [
+            str(tmp_path / "books_en.jsonl"),
+            str(tmp_path / "books_is.jsonl.gz"),
+        ]
+        write_jsonl(file_paths[0], _documents(400))
+        write_jsonl(file_paths[1], _documents(100))
+        assert get_training_repeats(file_paths, -1) is None, "ERROR! expected None"
+        assert get_training_repeats(file_paths[:1], 0.5) is None, "ERROR! expected None"
+        training_repeats = get_training_repeats(file_paths, 0.0)
+        assert (
+            training_repeats.number_of_documents == 500
+        ), f"ERROR! number_of_documents = {training_repeats.number_of_documents} != 500"
+        test_repeats = list(training_repeats)
+        assert (
+            len(test_repeats) == 500
+        ), f"ERROR! len(test_repeats) = {len(test_repeats)} != 500"
+        assert (
+            test_repeats[:400] == [1] * 400
+        ), "ERROR! the largest language needs to have factor 1"
+        assert 350 <= sum(test_repeats[400:]) <= 450, "ERROR! unexpected nr. of repeats"
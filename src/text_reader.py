@@ -0,0 +1,124 @@
+"""Module that contains functions to read only the text field of jsonl documents, without parsing the other fields"""
+import json
+import re
+from itertools import islice
+from json.decoder import scanstring  # type: ignore
+from typing import Iterable, Iterator, List, Optional, Union
+
+from src.compression import open_jsonl
+
+BACKSLASH = ord("\\")
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+
+
+def get_text(
+    line: Union[str, bytes], field: str = "text", default: Optional[str] = None
+) -> str:
+    """
+    get the (unescaped) value of a top-level string field of a json document, like json.loads(line)[field],
+    without parsing the other fields. the document is assumed to be valid json.
+
+    the line is scanned for the key. only the value is decoded, i.e. the other fields are neither parsed nor decoded.
+    if the key is not found (e.g. it is escaped) or its value is not a string, the whole document is parsed.
+    if the document does not contain the field, default is returned (or a KeyError is raised if default is None).
+
+    Args:
+        line: e.g. b'{"title": "test", "filters": [], "text": "this is a \\\\"test\\\\""}\\n'
+        field: e.g. 'text'
+        default: e.g. '', None = the field is required
+
+    Returns:
+        text: e.g. 'this is a "test"'
+    """
+    if isinstance(line, str):
+        line = line.encode("utf-8")
+    position = _find_value(line, f'"{field}"'.encode("utf-8"))
+    if position is not None and line.startswith(b'"', position):
+        return scanstring(line[position:].decode("utf-8"), 1)[0]
+    document = json.loads(line)
+    if default is not None:
+        return document.get(field, default)
+    return document[field]
+
+
+def _find_value(line: bytes, key: bytes) -> Optional[int]:
+    """
+    position of the value of the first top-level occurrence of key, e.g. b'"text"'.
+    in valid json, key is a key (and not part of a string) if its first quote is not escaped
+    and it is followed by a colon. it is top-level if the brackets before it (outside of strings) have depth 1.
+    """
+    index = line.find(key)
+    while index != -1:
+        backslashes = 0
+        while index > backslashes and line[index - backslashes - 1] == BACKSLASH:
+            backslashes += 1
+        if backslashes % 2 == 0:
+            position = _WHITESPACE.match(line, index + len(key)).end()  # type: ignore
+            if line.startswith(b":", position) and _get_depth(line[:index]) == 1:
+                return _WHITESPACE.match(line, position + 1).end()  # type: ignore
+        index = line.find(key, index + len(key))
+    return None
+
+
+def _get_depth(prefix: bytes) -> int:
+    """
+    nr. of open brackets at the end of prefix (outside of strings), e.g. b'{"a": [{"b": "[{\\\\""}, ' -> 2
+    """
+    # without escaped backslashes & quotes, every other part between quotes is outside of strings
+    parts = prefix.replace(b"\\\\", b"").replace(b'\\"', b"").split(b'"')
+    outside = b"".join(parts[::2])
+    return (
+        outside.count(b"{")
+        + outside.count(b"[")
+        - outside.count(b"}")
+        - outside.count(b"]")
+    )
+
+
+def get_texts(lines: Iterable[Union[str, bytes]]) -> Iterator[str]:
+    """
+    Args:
+        lines: e.g. [b'{"text": "this is a test"}\\n', ..]
+
+    Returns:
+        texts: e.g. ['this is a test', ..]
+    """
+    return map(get_text, lines)
+
+
+def read_texts(
+    file_path: str,
+    batch_size: int = 10000,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Iterator[List[str]]:
+    """
+    read the texts of the documents in the byte range [start, end) of a (compressed) jsonl file in batches
+
+    Args:
+        file_path: e.g. '<data_eval>/all_en.jsonl'
+        batch_size: e.g. 10000
+        start: e.g. 0, only 0 for compressed files
+        end: e.g. 126, None = end of file
+
+    Returns:
+        batches: e.g. [['this is a test', ..], ..]
+    """
+    with open_jsonl(file_path, "rb") as infile:
+        if start > 0:
+            infile.seek(start)
+        lines: Iterable[bytes] = infile
+        if end is not None:
+            lines = _read_until(infile, start, end)
+        texts = get_texts(lines)
+        while batch := list(islice(texts, batch_size)):
+            yield batch
+
+
+def _read_until(lines: Iterable[bytes], start: int, end: int) -> Iterator[bytes]:
+    position = start
+    for line in lines:
+        if position >= end:
+            break
+        position += len(line)
+        yield line
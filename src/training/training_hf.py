@@ -13,6 +13,7 @@ from src.helpers import get_normalizer, get_training_corpus_combined
 from src.parameters import Parameters
 from src.output import Output
 from src.training.training import HFDataset
+from src.upsampling import get_training_repeats
 
 
 def train_hf(
@@ -52,7 +53,11 @@ def train_hf(
         # https://github.com/huggingface/tokenizers/issues/813#issuecomment-937847770
     )
     tokenizer.train_from_iterator(
-        get_training_corpus_combined(_datasets_combined), trainer=trainer
+        get_training_corpus_combined(
+            _datasets_combined,
+            repeats=get_training_repeats(_parameters.dataset_files, _parameters.alpha),
+        ),
+        trainer=trainer,
     )
 
     # 3. Post-Processing
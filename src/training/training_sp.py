@@ -5,6 +5,12 @@ from src.helpers import get_training_corpus_combined, add_special_tokens
 from src.parameters import Parameters
 from src.output import Output
 from src.training.training import HFDataset
+from src.upsampling import get_training_repeats
+from src.splitting import MAX_DOCUMENT_LENGTH
+
+# upper bound for the nr. of bytes of str([chunk]): 4 characters for brackets & quotes,
+# at most 10 bytes per character (e.g. escaped as '\\U0010ffff' by repr, else <= 4 bytes in utf-8)
+MAX_SENTENCE_BYTES = 10 * MAX_DOCUMENT_LENGTH + 4
 
 
 def train_sp(
@@ -22,7 +28,10 @@ def train_sp(
     """
     spm.SentencePieceTrainer.train(
         sentence_iterator=get_training_corpus_combined(
-            _datasets_combined, batch_size=1
+            _datasets_combined,
+            batch_size=1,
+            max_length=MAX_DOCUMENT_LENGTH,
+            repeats=get_training_repeats(_parameters.dataset_files, _parameters.alpha),
         ),
         model_prefix=_output.model_prefix,
         model_type="BPE",
@@ -34,7 +43,7 @@ def train_sp(
         # unk_piece="<unk>",  # previously: "<unk>",  default: "<unk>"
         # bos_piece="<s>",    # previously: not used, default: "<s>"
         eos_piece="<|endoftext|>",  # previously: not used, default: "</s>"
-        max_sentence_length=2000000,  # default: 4192
+        max_sentence_length=MAX_SENTENCE_BYTES,  # default: 4192
         normalization_rule_name="identity",  # 1. unicode normalization
         split_digits=_parameters.individual_digits,  # 2. individual digits
         add_dummy_prefix=_parameters.add_prefix_space,  # 3. add prefix space
@@ -0,0 +1,176 @@
+"""Module that contains functions for virtual (alpha) upsampling of the training data, i.e. without writing copies"""
+import random
+from os.path import basename
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.compression import BUFFER_SIZE, is_compressed, open_jsonl, strip_jsonl_suffix
+from src.line_index import get_line_index
+
+
+def get_language(file_path: str) -> str:
+    """
+    Args:
+        file_path: e.g. '<data_train>/books_en.jsonl.gz'
+
+    Returns:
+        language: e.g. 'en'
+    """
+    return strip_jsonl_suffix(basename(file_path)).split("_")[-1]
+
+
+def count_documents(file_path: str) -> Tuple[int, int]:
+    """
+    count the documents (lines) & bytes of file_path, using an up-to-date line index if there is one
+
+    Args:
+        file_path: e.g. '<data_train>/books_en.jsonl'
+
+    Returns:
+        number_of_documents: e.g. 3
+        number_of_bytes: decompressed size, e.g. 126
+    """
+    if not is_compressed(file_path):
+        line_index = get_line_index(file_path, create=False)
+        if line_index is not None:
+            return line_index.number_of_documents, line_index.file_size
+
+    number_of_documents, number_of_bytes, last = 0, 0, b"\n"
+    with open_jsonl(file_path, "rb") as infile:
+        while chunk := infile.read(BUFFER_SIZE):
+            number_of_documents += chunk.count(b"\n")
+            number_of_bytes += len(chunk)
+            last = chunk[-1:]
+    # last line without line break
+    if last != b"\n":
+        number_of_documents += 1
+    return number_of_documents, number_of_bytes
+
+
+def get_repetition_factors(sizes: Dict[str, int], alpha: float) -> Dict[str, float]:
+    """
+    alpha-smoothed upsampling factors (like in script_upsampling.py):
+    the language distribution p is smoothed to q ~ p**alpha & scaled such that the largest language is not upsampled
+
+    Args:
+        sizes: e.g. {'en': 300, 'sv': 100, 'is': 10}
+        alpha: 0 <= alpha <= 1, e.g. 0.5
+
+    Returns:
+        factors: e.g. {'en': 1.0, 'sv': 1.73, 'is': 5.48}
+    """
+    assert 0 <= alpha <= 1, f"ERROR! alpha = {alpha} needs to be in [0, 1]"
+    total = sum(sizes.values())
+    p = {language: size / total for language, size in sizes.items() if size > 0}
+    if not p:
+        return {language: 1.0 for language in sizes}
+    denominator = sum(_p**alpha for _p in p.values())
+    q = {language: _p**alpha / denominator for language, _p in p.items()}
+    largest = max(p, key=p.get)
+    scale = p[largest] / q[largest]
+    factors = {
+        language: q[language] * scale / p[language] if language in p else 1.0
+        for language in sizes
+    }
+    # avoid rounding errors, e.g. 0.9999999999999999
+    factors[largest] = 1.0
+    return factors
+
+
+def get_repeats(
+    numbers_of_documents: Sequence[int], factors: Sequence[float], seed: int = 42
+) -> Iterator[int]:
+    """
+    nr. of repeats for each document (in order): int(f) plus a bernoulli trial with probability f - int(f),
+    where f is the factor of the file the document belongs to. the repeats are generated lazily.
+
+    Args:
+        numbers_of_documents: nr. of documents of each file, e.g. [3, 2]
+        factors: repetition factor of each file, e.g. [1.0, 2.5]
+        seed: e.g. 42
+
+    Returns:
+        repeats: e.g. [1, 1, 1, 3, 2]
+    """
+    _random = random.Random(seed)
+    for number_of_documents, factor in zip(numbers_of_documents, factors):
+        repeats = int(factor)
+        fraction = factor - repeats
+        for _ in range(number_of_documents):
+            yield repeats + (_random.random() < fraction)
+
+
+class TrainingRepeats:
+    """Class used to iterate over the repeats of the training documents, see get_repeats
+
+    the nr. of documents is kept, such that it can be checked against the loaded dataset before the repeats
+    are applied (by position) to its documents.
+    """
+
+    def __init__(self, number_of_documents: int, repeats: Iterator[int]):
+        """
+        Args:
+            number_of_documents: e.g. 5
+            repeats: e.g. iter([1, 1, 1, 3, 2])
+        """
+        self.number_of_documents = number_of_documents
+        self.repeats = repeats
+
+    def __iter__(self) -> "TrainingRepeats":
+        return self
+
+    def __next__(self) -> int:
+        return next(self.repeats)
+
+
+def get_training_repeats(
+    file_paths: List[str], alpha: float, seed: int = 42
+) -> Optional[TrainingRepeats]:
+    """
+    repeats for the documents of file_paths (concatenated in this order, like load_dataset does),
+    based on the nr. of bytes per language
+
+    Args:
+        file_paths: e.g. ['<data_train>/books_en.jsonl', '<data_train>/books_is.jsonl']
+        alpha: e.g. 0.5, -1 or 1 = no upsampling
+        seed: e.g. 42
+
+    Returns:
+        repeats: see get_repeats (incl. the nr. of documents), None if no document is repeated
+    """
+    if alpha in [-1, 1]:
+        return None
+    languages = [get_language(file_path) for file_path in file_paths]
+    counts = [count_documents(file_path) for file_path in file_paths]
+    sizes: Dict[str, int] = {}
+    for language, (_, number_of_bytes) in zip(languages, counts):
+        sizes[language] = sizes.get(language, 0) + number_of_bytes
+    factors = get_repetition_factors(sizes, alpha)
+    print(f"> upsampling factors (alpha={alpha}): {factors}")
+    if all(factor == 1.0 for factor in factors.values()):
+        return None
+    numbers_of_documents = [number_of_documents for number_of_documents, _ in counts]
+    return TrainingRepeats(
+        sum(numbers_of_documents),
+        get_repeats(
+            numbers_of_documents, [factors[language] for language in languages], seed
+        ),
+    )
+
+
+def repeat_documents(texts: Iterable[str], repeats: Iterator[int]) -> Iterator[str]:
+    """
+    generator stage that yields each document (i.e. the same object, without parsing it again) repeat times
+
+    Args:
+        texts: e.g. ['a', 'b', 'c']
+        repeats: e.g. iter([1, 0, 2])
+
+    Returns:
+        texts: e.g. ['a', 'c', 'c']
+    """
+    for text in texts:
+        repeat = next(repeats, None)
+        assert repeat is not None, "ERROR! there are more documents than repeats"
+        for _ in range(repeat):
+            yield text
+    assert next(repeats, None) is None, "ERROR! there are more repeats than documents"